@@ -2,9 +2,9 @@ from flask import Flask
 from config import Config
 from app.extensions import db, migrate, login
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     db.init_app(app)
     migrate.init_app(app, db)
@@ -13,16 +13,41 @@ def create_app():
     login.login_message = 'Please log in to access this page.'
     login.login_message_category = 'info'
     
+    from app.passwords import password_hasher
+    password_hasher.init_app(app)
+    
     from app.auth import bp as auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
     
     from app.main import bp as main_bp
     app.register_blueprint(main_bp)
     
-    from app.models import User
+    from app.reports import bp as reports_bp
+    app.register_blueprint(reports_bp, url_prefix='/reports')
+    
+    from app.commands import register_commands
+    register_commands(app)
+    
+    from app.notices import delivery_worker
+    delivery_worker.init_app(app)
+    
+    from app.extension_requests import expiry_sweeper
+    expiry_sweeper.init_app(app)
+    
+    from app.circulation import circulation_refresher
+    circulation_refresher.init_app(app)
+    
+    from app.gate import gate_recorder
+    gate_recorder.init_app(app)
+    
+    from app.identity import identity_cache
+    identity_cache.init_app(app)
+    
+    from app.occupancy import occupancy_cache
+    occupancy_cache.init_app(app)
     
     @login.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return identity_cache.get(int(user_id))
     
     return app
\ No newline at end of file
@@ -0,0 +1,120 @@
+import csv
+from datetime import datetime, timedelta
+from itertools import islice
+from sqlalchemy import insert, select, tuple_
+from app.extensions import db
+from app.models import User, LibrarySession
+from app.library_hours import add_many
+from app.transactions import run_with_retry
+
+SESSION_START = '09:00:00'  # registers only record hours, so sessions start at opening time
+MAX_HOURS = 12
+
+class AttendanceImportError(Exception):
+    """The upload itself can't be read, e.g. a required column is missing."""
+
+def csv_rows(stream):
+    """(line_number, prn, date, hours) tuples from a CSV with prn, date and hours columns."""
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None:
+        raise AttendanceImportError('The file is empty.')
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    missing = [column for column in ('prn', 'date', 'hours') if column not in reader.fieldnames]
+    if missing:
+        raise AttendanceImportError('Missing column(s): ' + ', '.join(missing))
+    for row in reader:
+        yield reader.line_num, row.get('prn'), row.get('date'), row.get('hours')
+
+def json_rows(items):
+    """(item_number, prn, date, hours) tuples from a list of objects or [prn, date, hours] lists."""
+    if not isinstance(items, list):
+        raise AttendanceImportError('Expected a JSON array of rows.')
+    for number, item in enumerate(items, start=1):
+        if isinstance(item, dict):
+            yield number, item.get('prn'), item.get('date'), item.get('hours')
+        elif isinstance(item, (list, tuple)) and len(item) == 3:
+            yield number, item[0], item[1], item[2]
+        else:
+            yield number, None, None, None
+
+def _parse(prn, date, hours):
+    prn = str(prn or '').strip()
+    if not prn:
+        raise ValueError('Missing PRN')
+    try:
+        check_in = datetime.strptime(f'{str(date).strip()} {SESSION_START}', '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise ValueError('Date must be YYYY-MM-DD')
+    try:
+        hours = float(hours)
+    except (TypeError, ValueError):
+        raise ValueError('Hours must be a number')
+    if not 0 < hours <= MAX_HOURS:
+        raise ValueError(f'Hours must be between 0 and {MAX_HOURS}')
+    return prn, check_in, hours
+
+def _import_batch(parsed, errors):
+    del errors[:]  # a retried batch reports its rows afresh
+    prns = {prn for _, prn, _, _ in parsed}
+    student_ids = dict(db.session.execute(
+        select(User.prn_number, User.id).where(User.prn_number.in_(prns), User.role == 'student')
+    ).all())
+
+    candidates = []
+    for number, prn, check_in, hours in parsed:
+        if prn not in student_ids:
+            errors.append((number, f'Unknown PRN {prn}'))
+        else:
+            candidates.append((number, student_ids[prn], check_in, hours))
+    if not candidates:
+        return 0
+
+    # Re-uploading a register must not count the same day twice
+    recorded = set(db.session.execute(
+        select(LibrarySession.user_id, LibrarySession.check_in).where(
+            tuple_(LibrarySession.user_id, LibrarySession.check_in).in_(
+                {(user_id, check_in) for _, user_id, check_in, _ in candidates})
+        )
+    ).all())
+    rows = []
+    for number, user_id, check_in, hours in candidates:
+        if (user_id, check_in) in recorded:
+            errors.append((number, 'Session already recorded for this date'))
+            continue
+        recorded.add((user_id, check_in))
+        rows.append({'user_id': user_id, 'check_in': check_in,
+                     'check_out': check_in + timedelta(hours=hours), 'duration_hours': hours})
+    if not rows:
+        return 0
+
+    db.session.execute(insert(LibrarySession), rows)
+    add_many([(row['user_id'], row['check_in'], row['duration_hours']) for row in rows])
+    return len(rows)
+
+def import_sessions(rows, batch_size=400):
+    """Record library sessions from ``(number, prn, date, hours)`` rows.
+
+    Each batch is one transaction: one query resolves its PRNs, one finds
+    days already recorded, an executemany INSERT adds the sessions and a
+    single upsert adds their hours to the monthly and yearly aggregates.
+    Returns ``(created, errors)`` where ``errors`` is a list of
+    ``(row number, message)``.
+    """
+    rows = iter(rows)
+    created = 0
+    errors = []
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        parsed = []
+        for number, prn, date, hours in chunk:
+            try:
+                parsed.append((number, *_parse(prn, date, hours)))
+            except ValueError as e:
+                errors.append((number, str(e)))
+        if parsed:
+            batch_errors = []
+            created += run_with_retry(lambda: _import_batch(parsed, batch_errors))
+            errors.extend(batch_errors)
+    return created, errors
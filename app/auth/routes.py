@@ -1,9 +1,23 @@
 from flask import render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, current_user, login_required
 from app.extensions import db
+from app import notices
 from app.auth import bp
 from app.auth.forms import LoginForm, ProfileForm, RegisterForm
 from app.models import User
+from app.passwords import password_hasher, PasswordHasherBusy
+from app.gate import gate_recorder
+from app.identity import identity_cache
+
+def authenticate(prn_number, password):
+    """Return the user if the credentials match, upgrading an outdated password hash."""
+    user = User.query.filter_by(prn_number=prn_number).first()
+    if user is None or not user.check_password(password):
+        return None
+    if password_hasher.needs_rehash(user.password_hash):
+        user.set_password(password)
+        db.session.commit()
+    return user
 
 @bp.route('/login')
 def login():
@@ -17,9 +31,12 @@ def student_login():
     form = LoginForm()
     if form.validate_on_submit():
         print(f"Form submitted with PRN: {form.prn_number.data}")
-        user = User.query.filter_by(prn_number=form.prn_number.data).first()
-        print(f"User found: {user}")
-        if user and user.check_password(form.password.data):
+        try:
+            user = authenticate(form.prn_number.data, form.password.data)
+        except PasswordHasherBusy:
+            flash('Too many sign-ins right now. Please try again in a moment.', 'warning')
+            return render_template('auth/student_login.html', title='Student Login', form=form), 503
+        if user:
             print(f"Password correct, user role: {user.role}")
             if user.role != 'student':
                 flash('This is Student Login. Please use Admin Login for admin access.', 'warning')
@@ -42,8 +59,12 @@ def admin_login():
     
     form = LoginForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(prn_number=form.prn_number.data).first()
-        if user and user.check_password(form.password.data):
+        try:
+            user = authenticate(form.prn_number.data, form.password.data)
+        except PasswordHasherBusy:
+            flash('Too many sign-ins right now. Please try again in a moment.', 'warning')
+            return render_template('auth/admin_login.html', title='Admin Login', form=form), 503
+        if user:
             if user.role != 'admin':
                 flash('This is Admin Login. Please use Student Login for student access.', 'warning')
                 return render_template('auth/admin_login.html', title='Admin Login', form=form)
@@ -87,6 +108,8 @@ def register():
         )
         user.set_password(form.password.data)
         db.session.add(user)
+        db.session.flush()
+        notices.backfill_broadcasts([user.id])
         db.session.commit()
         flash('Registration successful!', 'success')
         return redirect(url_for('auth.login'))
@@ -105,9 +128,12 @@ def logout():
 def profile():
     form = ProfileForm()
     if form.validate_on_submit():
-        current_user.name = form.name.data
-        current_user.email = form.email.data
+        user = current_user.record()
+        user.name = form.name.data
+        user.email = form.email.data
         db.session.commit()
+        identity_cache.invalidate(user.id)
+        gate_recorder.forget(user.id)
         flash('Your profile has been updated!', 'success')
         return redirect(url_for('auth.profile'))
     elif request.method == 'GET':
@@ -0,0 +1,192 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, func, case, literal
+from sqlalchemy.dialects.sqlite import insert
+from app.extensions import db
+from app.models import User, Book, Loan, BookCirculation, CourseCirculation, ReportWatermark
+from app.transactions import run_with_retry
+
+WATERMARK = 'circulation'
+EPOCH = datetime(1970, 1, 1)
+COUNTS = ('loans_count', 'returned_count', 'on_time_count', 'loan_days')
+UNASSIGNED = 'Unassigned'
+
+def _fold(model, keys, query):
+    """Add the counts ``query`` selects (the key columns, then COUNTS) onto ``model``'s rows."""
+    statement = insert(model).from_select(list(keys) + list(COUNTS), query)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: getattr(model, column) + statement.excluded[column] for column in COUNTS}
+    ))
+
+ISSUED = (func.count(Loan.id), literal(0), literal(0), literal(0.0))
+RETURNED = (
+    literal(0),
+    func.count(Loan.id),
+    func.sum(case((Loan.return_date <= Loan.due_date, 1), else_=0)),
+    func.sum(func.julianday(Loan.return_date) - func.julianday(Loan.issue_date))
+)
+
+def issued_between(last_loan_id, up_to_id):
+    return (Loan.id > last_loan_id, Loan.id <= up_to_id)
+
+def returned_between(returned_until, until):
+    return (Loan.return_date > returned_until, Loan.return_date <= until)
+
+def fold_queries(window, counts):
+    """(model, key columns, SELECT) for each summary table that loans in ``window`` fold into."""
+    period = func.strftime('%Y-%m', Loan.issue_date)
+    course = func.coalesce(User.course, UNASSIGNED)
+    return [
+        (BookCirculation, ['book_id'],
+         select(Loan.book_id, *counts).where(*window).group_by(Loan.book_id)),
+        (CourseCirculation, ['period', 'course'],
+         select(period, course, *counts).select_from(Loan).outerjoin(User, User.id == Loan.user_id)
+         .where(*window).group_by(period, course)),
+    ]
+
+def _fold_loans(window, counts):
+    for model, keys, query in fold_queries(window, counts):
+        _fold(model, keys, query)
+
+def _refresh(now, lag):
+    mark = db.session.execute(
+        select(ReportWatermark.last_loan_id, ReportWatermark.returned_until)
+        .where(ReportWatermark.name == WATERMARK)
+    ).first()
+    if mark is None:
+        db.session.execute(insert(ReportWatermark).values(
+            name=WATERMARK, last_loan_id=0, returned_until=EPOCH).on_conflict_do_nothing())
+        last_loan_id, returned_until = 0, EPOCH
+    else:
+        last_loan_id, returned_until = mark
+
+    up_to_id = max(db.session.scalar(select(func.max(Loan.id))) or 0, last_loan_id)
+    # A return stamped just before another one commits can land behind it, so
+    # returns are only counted once they are ``lag`` old
+    until = max(now - lag, returned_until)
+
+    # Claiming the range first makes a concurrent refresh of the same range a no-op
+    claimed = db.session.execute(
+        update(ReportWatermark).where(
+            ReportWatermark.name == WATERMARK,
+            ReportWatermark.last_loan_id == last_loan_id,
+            ReportWatermark.returned_until == returned_until
+        ).values(last_loan_id=up_to_id, returned_until=until, refreshed_at=now)
+    ).rowcount
+    if claimed != 1:
+        return 0, 0
+
+    issued = issued_between(last_loan_id, up_to_id)
+    returned = returned_between(returned_until, until)
+    issued_count = db.session.scalar(select(func.count(Loan.id)).where(*issued))
+    returned_count = db.session.scalar(select(func.count(Loan.id)).where(*returned))
+    if issued_count:
+        _fold_loans(issued, ISSUED)
+    if returned_count:
+        _fold_loans(returned, RETURNED)
+    return issued_count, returned_count
+
+def _rebuild(now, lag):
+    db.session.execute(delete(BookCirculation))
+    db.session.execute(delete(CourseCirculation))
+    db.session.execute(delete(ReportWatermark).where(ReportWatermark.name == WATERMARK))
+    return _refresh(now, lag)
+
+def refresh(full=False, lag_seconds=60):
+    """Fold loans issued and returned since the last refresh into the summary tables.
+
+    New loans are found by ``Loan.id`` above the watermark and new returns
+    by ``return_date`` after it, both through indexes, so a refresh costs
+    what changed rather than the size of the loan table. ``full`` rebuilds
+    from scratch. Returns ``(loans counted, returns counted)``.
+    """
+    now = datetime.utcnow()
+    lag = timedelta(seconds=lag_seconds)
+    return run_with_retry(lambda: (_rebuild if full else _refresh)(now, lag))
+
+def _rates(loans_count, returned_count, on_time_count, loan_days):
+    return {
+        'loans': loans_count or 0,
+        'returned': returned_count or 0,
+        'on_time_rate': on_time_count / returned_count if returned_count else None,
+        'average_days': loan_days / returned_count if returned_count else None,
+    }
+
+def watermark():
+    return db.session.get(ReportWatermark, WATERMARK)
+
+def years():
+    """Years with loans in the summaries, newest first."""
+    year = func.substr(CourseCirculation.period, 1, 4)
+    return [row[0] for row in db.session.execute(select(year).distinct().order_by(year.desc()))]
+
+def most_borrowed_query(limit):
+    return db.session.query(Book, BookCirculation).join(
+        BookCirculation, BookCirculation.book_id == Book.id
+    ).order_by(BookCirculation.loans_count.desc(), Book.id).limit(limit)
+
+def most_borrowed(limit=20):
+    """(Book, rates) pairs for the most borrowed books of all time."""
+    rows = most_borrowed_query(limit).all()
+    return [(book, _rates(*(getattr(counts, column) for column in COUNTS))) for book, counts in rows]
+
+def year_totals_query(year, *group_by):
+    sums = [func.sum(getattr(CourseCirculation, column)) for column in COUNTS]
+    return select(*group_by, *sums).where(CourseCirculation.period >= f'{year}-01',
+                                          CourseCirculation.period <= f'{year}-12').group_by(*group_by)
+
+def _year_totals(year, *group_by):
+    return db.session.execute(year_totals_query(year, *group_by)).all()
+
+def year_summary(year):
+    """Loans, on-time rate and average loan length for loans issued in ``year``."""
+    return _rates(*_year_totals(year)[0])
+
+def course_summary(year):
+    """(course, rates) pairs for loans issued in ``year``, most loans first."""
+    rows = [(row[0], _rates(*row[1:])) for row in _year_totals(year, CourseCirculation.course)]
+    return sorted(rows, key=lambda row: (-row[1]['loans'], row[0]))
+
+class CirculationRefresher:
+    """Per-process daemon thread that runs ``refresh`` every REPORTS_REFRESH_INTERVAL_SECONDS.
+
+    Starts with the first request like the other background workers. Several
+    processes may run it: the watermark claim lets only one of them count a
+    given range.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if not app.config['REPORTS_REFRESH_ENABLED']:
+            return
+
+        @app.before_request
+        def start_circulation_refresher():
+            self.start(app)
+
+    def start(self, app):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, args=(app,),
+                                                name='circulation-refresher', daemon=True)
+                self._thread.start()
+
+    def _run(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    refresh(lag_seconds=app.config['REPORTS_RETURN_LAG_SECONDS'])
+                except Exception:
+                    app.logger.exception('Circulation report refresh failed')
+                finally:
+                    db.session.remove()
+            time.sleep(app.config['REPORTS_REFRESH_INTERVAL_SECONDS'])
+
+circulation_refresher = CirculationRefresher()
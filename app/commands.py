@@ -0,0 +1,146 @@
+import click
+
+def register_commands(app):
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Rebuild the full-text book search index."""
+        from app.search import rebuild_search_index
+        count = rebuild_search_index()
+        click.echo(f'Search index rebuilt for {count} book(s).')
+
+    @app.cli.command('db-explain')
+    @click.option('--fail-on-scan', is_flag=True, help='Exit with status 1 if any query does an unexpected full table scan.')
+    def db_explain_command(fail_on_scan):
+        """Print EXPLAIN QUERY PLAN for the app's main queries."""
+        from app.explain import main_queries, explain_query, is_full_scan, EXPECTED_SCANS
+        full_scans = 0
+        expected = 0
+        for label, query in main_queries():
+            click.echo(label)
+            for detail in explain_query(query):
+                if not is_full_scan(detail):
+                    click.echo(f'    {detail}')
+                elif label in EXPECTED_SCANS:
+                    expected += 1
+                    click.echo(f'    {detail}    <-- full scan (expected)')
+                else:
+                    full_scans += 1
+                    click.echo(f'    {detail}    <-- FULL SCAN')
+        click.echo(f'{full_scans} unexpected full table scan(s) found, {expected} expected.')
+        if fail_on_scan and full_scans:
+            raise SystemExit(1)
+
+    @app.cli.command('deliver-notices')
+    @click.option('--retry-failed', is_flag=True, help='Requeue deliveries that previously failed.')
+    def deliver_notices_command(retry_failed):
+        """Drain the broadcast notice delivery queue in the foreground."""
+        from app.extensions import db
+        from app.models import NoticeDelivery
+        from app.notices import process_deliveries
+        if retry_failed:
+            requeued = NoticeDelivery.query.filter_by(status='failed').update(
+                {'status': 'pending', 'error': None}, synchronize_session=False)
+            db.session.commit()
+            click.echo(f'Requeued {requeued} failed delivery(ies).')
+        processed = process_deliveries(app.config['NOTICE_DELIVERY_BATCH_SIZE'],
+                                       app.config['NOTICE_DELIVERY_STALE_SECONDS'])
+        click.echo(f'Processed {processed} delivery(ies).')
+
+    @app.cli.command('sweep-extensions')
+    def sweep_extensions_command():
+        """Archive extension request decisions whose status has expired."""
+        from app.extension_requests import sweep_expired
+        from app.transactions import run_with_retry
+        archived = run_with_retry(sweep_expired)
+        click.echo(f'Archived {archived} expired extension request(s).')
+
+    @app.cli.command('import-students')
+    @click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--batch-size', type=int, default=None, help='Rows per transaction.')
+    @click.option('--workers', type=int, default=None, help='Password hashing processes (default: all cores; 0 hashes inline).')
+    def import_students_command(csv_file, batch_size, workers):
+        """Create students from a CSV file with a header row."""
+        from app.student_import import import_students, StudentImportError
+        try:
+            created, errors = import_students(csv_file, batch_size or app.config['STUDENT_IMPORT_BATCH_SIZE'],
+                                              workers)
+        except StudentImportError as e:
+            raise click.ClickException(str(e))
+        for line_number, message in errors:
+            click.echo(f'Line {line_number}: {message}', err=True)
+        click.echo(f'Imported {created} student(s), {len(errors)} row(s) rejected.')
+
+    @app.cli.command('import-attendance')
+    @click.argument('register', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--batch-size', type=int, default=None, help='Rows per transaction.')
+    def import_attendance_command(register, batch_size):
+        """Record library sessions from a CSV (prn, date, hours) or a .json array of rows."""
+        import json
+        from app.attendance import csv_rows, json_rows, import_sessions, AttendanceImportError
+        try:
+            if register.name.lower().endswith('.json'):
+                rows = json_rows(json.load(register))
+            else:
+                rows = csv_rows(register)
+            created, errors = import_sessions(rows, batch_size or app.config['ATTENDANCE_IMPORT_BATCH_SIZE'])
+        except (AttendanceImportError, ValueError) as e:
+            raise click.ClickException(str(e))
+        for number, message in errors:
+            click.echo(f'Row {number}: {message}', err=True)
+        click.echo(f'Recorded {created} library session(s), {len(errors)} row(s) rejected.')
+
+    @app.cli.command('bench-passwords')
+    @click.option('--logins', type=int, default=200, help='Password checks to time.')
+    @click.option('--workers', type=int, default=None, help='Processes (default: all cores).')
+    def bench_passwords_command(logins, workers):
+        """Measure login password checks per second with the configured hash method."""
+        import os
+        from app.passwords import benchmark
+        workers = workers or os.cpu_count() or 1
+        method = app.config['PASSWORD_HASH_METHOD']
+        elapsed, rate, per_core = benchmark(logins, workers, method)
+        click.echo(f'{method}: {logins} logins in {elapsed:.2f}s on {workers} process(es)')
+        click.echo(f'{rate:.1f} logins/s, {per_core:.1f} logins/s per core')
+
+    @app.cli.command('backfill-loan-rollups')
+    def backfill_loan_rollups_command():
+        """Rebuild the per-user monthly loan counts from the loan history."""
+        from app.loans import rebuild_rollups
+        rows = rebuild_rollups()
+        click.echo(f'Rebuilt {rows} loan rollup row(s).')
+
+    @app.cli.command('refresh-reports')
+    @click.option('--full', is_flag=True, help='Rebuild the summaries from the whole loan history.')
+    def refresh_reports_command(full):
+        """Fold loans issued and returned since the last refresh into the circulation reports."""
+        from app.circulation import refresh
+        issued, returned = refresh(full=full, lag_seconds=app.config['REPORTS_RETURN_LAG_SECONDS'])
+        click.echo(f'Counted {issued} loan(s) and {returned} return(s).')
+
+    @app.cli.command('build-recommendations')
+    @click.option('--top-k', type=int, default=None, help='Neighbors kept per book.')
+    @click.option('--metric', type=click.Choice(['cosine', 'lift']), default=None, help='Pair similarity score.')
+    def build_recommendations_command(top_k, metric):
+        """Rebuild the "borrowed together" neighbors of every book from the loan history."""
+        from app.recommendations import build
+        rows = build(top_k or app.config['RECOMMENDATIONS_TOP_K'],
+                     metric or app.config['RECOMMENDATIONS_METRIC'],
+                     app.config['RECOMMENDATIONS_MIN_TOGETHER'],
+                     app.config['RECOMMENDATIONS_MAX_BASKET'])
+        click.echo(f'Stored {rows} book neighbor(s).')
+
+    @app.cli.command('rollover-library-hours')
+    @click.option('--period', multiple=True, help='Period to close, YYYY-MM or YYYY (default: the ones that just ended).')
+    def rollover_library_hours_command(period):
+        """Close finished library-hours periods by recounting them from their sessions."""
+        from app.library_hours import close_period, previous_periods
+        for closing in period or previous_periods():
+            rows = close_period(closing)
+            click.echo(f'Closed {closing}: {rows} student(s) with library hours.')
+
+    @app.cli.command('reconcile-library-hours')
+    def reconcile_library_hours_command():
+        """Rebuild all library-hours aggregates from the library sessions."""
+        from app.library_hours import reconcile
+        rows = reconcile()
+        click.echo(f'Rebuilt {rows} library hours row(s).')
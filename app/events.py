@@ -0,0 +1,60 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+
+class EventBroker:
+    """In-process pub/sub feeding the /events Server-Sent Events stream.
+
+    Each open stream gets its own bounded queue. A slow client never blocks a
+    publisher: when its queue is full the oldest event is dropped. Events only
+    reach streams served by the same process, so run the app with threaded
+    workers (e.g. gunicorn ``--worker-class gthread``) to hold streams open.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, maxsize):
+        events = queue.Queue(maxsize=maxsize)
+        with self._lock:
+            self._subscribers[user_id].add(events)
+        return events
+
+    def unsubscribe(self, user_id, events):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(events)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id, event, data):
+        self.publish_many([user_id], event, data)
+
+    def publish_many(self, user_ids, event, data):
+        with self._lock:
+            targets = [events for user_id in user_ids for events in self._subscribers.get(user_id, ())]
+        for events in targets:
+            _put_dropping_oldest(events, (event, data))
+
+def _put_dropping_oldest(events, item):
+    while True:
+        try:
+            events.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                events.get_nowait()
+            except queue.Empty:
+                pass
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+broker = EventBroker()
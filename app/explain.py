@@ -0,0 +1,121 @@
+from datetime import date, datetime
+from sqlalchemy import func
+from app import circulation, extension_requests, library_hours, notices, occupancy, recommendations
+from app.extensions import db
+from app.models import User, Book, Loan, LoanRollup, Notice, ExtensionRequest, CourseCirculation
+from app.pagination import seek
+from app.search import student_prefix_filter, student_prefix_query
+
+# Substring searches can't use a B-tree index; these scans are accepted
+EXPECTED_SCANS = {'manage_users: search page'}
+
+def main_queries(user_id=1, book_id=1):
+    """The queries the routes, CLI commands and workers issue, labelled by caller.
+
+    Each query comes from the same builder its caller uses, with sample
+    arguments, so ``flask db-explain`` checks what actually runs. Paginated
+    lists are checked as a page after a cursor, through ``seek``.
+    """
+    now = datetime(2026, 1, 15)
+    today = date(2026, 1, 15)
+    month = LoanRollup.period_of(now)
+    queries = [
+        ('dashboards: catalog page',
+         seek(Book.query, (Book.title, Book.id), ('', 0), 24)),
+        ('admin_dashboard: active loans per book',
+         Loan.active_counts(Loan.book_id, [book_id])),
+        ('admin_dashboard: active loans page',
+         seek(Loan.active(), (Loan.due_date, Loan.id), (now, 0), 20)),
+        ('admin_dashboard: overdue loans page',
+         seek(Loan.overdue(), (Loan.due_date, Loan.id), (now, 0), 20)),
+        ('admin_dashboard, view_notices: sent notices',
+         Notice.sent_by(user_id).limit(20)),
+        ('student_dashboard: my loans',
+         Loan.active(user_id=user_id)),
+        ('student_dashboard: current extension requests',
+         ExtensionRequest.current_for([1, 2], now)),
+        ('student_dashboard, view_notices: notice inbox',
+         Notice.inbox_for(user_id).limit(20)),
+        ('student_dashboard: recent loans',
+         recommendations.recent_books_query(user_id, 5)),
+        ('student_dashboard: suggested books',
+         recommendations.suggestions_query(user_id, [book_id], 6)),
+        ('view_notices: unread on page',
+         notices.unread_query(user_id, [1, 2])),
+        ('manage_users: users page',
+         seek(User.query, (User.id,), (0,), 50)),
+        ('manage_users: search page',
+         seek(User.matching('smith'), (User.id,), None, 50)),
+        ('manage_users: active loans per user',
+         Loan.active_counts(Loan.user_id, [user_id])),
+        ('user_details: active loans',
+         Loan.active(user_id=user_id)),
+        ('api_search_students: name prefix',
+         student_prefix_query(func.lower(User.name), 'a', 21)),
+        ('api_search_students: PRN prefix',
+         student_prefix_query(func.lower(User.prn_number), 'a', 21)),
+        ('manage_students: students page',
+         seek(User.query.filter_by(role='student'), (User.id,), (0,), 50)),
+        ('manage_students: search page',
+         seek(User.query.filter(student_prefix_filter('a')), (User.id,), (0,), 50)),
+        ('manage_students: library hours',
+         library_hours.hours_query([user_id], now)),
+        ('library_attendance: students page',
+         seek(User.query.filter(student_prefix_filter('a')), (User.id,), (0,), 50)),
+        ('library_attendance: library hours',
+         library_hours.hours_query([user_id], now)),
+        ('user_activity: loans this month',
+         LoanRollup.top_borrowers(month)),
+        ('user_activity: library hours this month',
+         library_hours.top_students_query(month)),
+        ('rollover-library-hours: sessions in period',
+         library_hours.period_totals(month)),
+        ('occupancy_report: sessions per day',
+         occupancy.fingerprints_query(today, today)),
+        ('occupancy_report: session intervals',
+         occupancy.sessions_query(today, 30)),
+        ('circulation_report: most borrowed books',
+         circulation.most_borrowed_query(20)),
+        ('circulation_report: loans per course',
+         circulation.year_totals_query(2026, CourseCirculation.course)),
+        ('book_details, delete_book: active loans',
+         Loan.active(book_id=book_id)),
+        ('book_details: loan history',
+         Loan.history_for_book(book_id)),
+        ('book_details: borrowed together',
+         recommendations.neighbors_query(book_id, 6)),
+        ('borrow_book: already borrowed',
+         Loan.active(user_id=user_id, book_id=book_id)),
+        ('manage_extensions: pending requests page',
+         seek(ExtensionRequest.pending(), (ExtensionRequest.request_date, ExtensionRequest.id), (now, 0), 25)),
+        ('manage_extensions: history page',
+         seek(ExtensionRequest.history(), (ExtensionRequest.request_date, ExtensionRequest.id), (now, 0), 25,
+              descending=True)),
+        ('manage_extensions: history page with archived',
+         seek(ExtensionRequest.history(archived=True), (ExtensionRequest.request_date, ExtensionRequest.id),
+              (now, 0), 25, descending=True)),
+        ('request_extension: pending for loan',
+         ExtensionRequest.pending_for(1)),
+        ('sweep-extensions: expired decisions',
+         extension_requests.archive_expired(now)),
+    ]
+    for label, window, counts in (('loans issued', circulation.issued_between(0, 100), circulation.ISSUED),
+                                  ('loans returned', circulation.returned_between(now, now), circulation.RETURNED)):
+        for model, _, query in circulation.fold_queries(window, counts):
+            queries.append((f'refresh-reports: {label} into {model.__tablename__}', query))
+    return queries
+
+def explain_query(query):
+    """Return the ``EXPLAIN QUERY PLAN`` detail lines for an ORM query or a Core statement."""
+    statement = getattr(query, 'statement', query)
+    # Expand in_() lists into plain placeholders; EXPLAIN can't take [POSTCOMPILE_...] markers
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.params
+    args = tuple(params[name] for name in compiled.positiontup or ())
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), args).fetchall()
+    return [row[-1] for row in rows]
+
+def is_full_scan(detail):
+    # "SCAN book" is a full table scan; "SCAN book USING INDEX ..." walks an index
+    return detail.startswith('SCAN ') and ' USING ' not in detail
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from app.extensions import db
+from app.models import Book, Loan, ExtensionRequest
+from app.transactions import run_with_retry
+
+class ConcurrentResponseError(Exception):
+    """Another admin answered some of the requests while we were working."""
+
+def _respond_bulk(request_ids, action, admin_response, admin_id):
+    status = 'approved' if action == 'approve' else 'rejected'
+    now = datetime.utcnow()
+
+    rows = db.session.execute(
+        select(ExtensionRequest.id, ExtensionRequest.requested_days,
+               Loan.id, Loan.user_id, Loan.due_date, Book.title)
+        .join(Loan, ExtensionRequest.loan_id == Loan.id)
+        .join(Book, Loan.book_id == Book.id)
+        .where(ExtensionRequest.id.in_(request_ids), ExtensionRequest.status == 'pending')
+    ).all()
+    pending_ids = [row[0] for row in rows]
+
+    if pending_ids:
+        # One conditional UPDATE for every request; a short rowcount means we raced
+        updated = db.session.execute(
+            update(ExtensionRequest).where(
+                ExtensionRequest.id.in_(pending_ids),
+                ExtensionRequest.status == 'pending'
+            ).values(
+                status=status,
+                admin_response=admin_response or 'Extension approved',
+                response_date=now,
+                responded_by=admin_id,
+                status_expires_at=ExtensionRequest.status_expiry(status, now)
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        if updated != len(pending_ids):
+            raise ConcurrentResponseError()
+
+    new_due_dates = {}
+    if status == 'approved':
+        extra_days = defaultdict(int)
+        due_dates = {}
+        for _, requested_days, loan_id, _, due_date, _ in rows:
+            extra_days[loan_id] += requested_days
+            due_dates[loan_id] = due_date
+        new_due_dates = {loan_id: due_dates[loan_id] + timedelta(days=days)
+                         for loan_id, days in extra_days.items()}
+        if new_due_dates:
+            # executemany of UPDATE loan SET due_date=? WHERE id=?
+            db.session.execute(
+                update(Loan),
+                [{'id': loan_id, 'due_date': due_date} for loan_id, due_date in new_due_dates.items()]
+            )
+
+    decided = {}
+    for request_id, requested_days, loan_id, user_id, due_date, title in rows:
+        decided[request_id] = {
+            'id': request_id,
+            'result': status,
+            'loan_id': loan_id,
+            'user_id': user_id,
+            'book': title,
+            'due_date': new_due_dates.get(loan_id, due_date).strftime('%Y-%m-%d')
+        }
+    return [decided.get(request_id, {'id': request_id, 'result': 'skipped',
+                                     'error': 'Not found or already answered'})
+            for request_id in request_ids]
+
+def respond_bulk(request_ids, action, admin_response, admin_id, attempts=3):
+    """Approve or reject many extension requests in one transaction.
+
+    Returns one result dict per requested id, in the order given. Requests
+    that are missing or no longer pending are reported as skipped.
+    """
+    request_ids = list(dict.fromkeys(request_ids))
+    for attempt in range(attempts):
+        try:
+            return run_with_retry(lambda: _respond_bulk(request_ids, action, admin_response, admin_id))
+        except ConcurrentResponseError:
+            # Re-read the pending set; requests answered meanwhile come back as skipped
+            if attempt == attempts - 1:
+                raise
+
+def sweep_expired(now=None):
+    """Archive every decision whose status has expired; return how many.
+
+    A single UPDATE driven by the (archived_at, status_expires_at) index, so
+    it only touches rows that actually expired since the last sweep.
+    """
+    return db.session.execute(archive_expired(now or datetime.utcnow())).rowcount
+
+def archive_expired(now):
+    """The UPDATE that archives decisions expired by ``now``."""
+    return update(ExtensionRequest).where(
+        ExtensionRequest.archived_at.is_(None),
+        ExtensionRequest.status_expires_at <= now
+    ).values(archived_at=now).execution_options(synchronize_session=False)
+
+class ExpirySweeper:
+    """Per-process daemon thread that runs sweep_expired periodically.
+
+    Like the notice delivery worker it starts with the first request, so CLI
+    commands never start it. The sweep is idempotent, so it is harmless for
+    several processes to run it.
+    """
+    
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        if not app.config['EXTENSION_SWEEPER_ENABLED']:
+            return
+        
+        @app.before_request
+        def start_expiry_sweeper():
+            self.start(app)
+    
+    def start(self, app):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, args=(app,),
+                                                name='extension-expiry-sweeper', daemon=True)
+                self._thread.start()
+    
+    def _run(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    run_with_retry(sweep_expired)
+                except Exception:
+                    app.logger.exception('Extension request expiry sweep failed')
+                finally:
+                    db.session.remove()
+            time.sleep(app.config['EXTENSION_SWEEP_INTERVAL_SECONDS'])
+
+expiry_sweeper = ExpirySweeper()
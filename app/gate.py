@@ -0,0 +1,239 @@
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+try:
+    import fcntl
+except ImportError:  # Windows: the single-process check is skipped
+    fcntl = None
+from sqlalchemy import select, insert, update, bindparam
+from app.extensions import db
+from app.models import User, LibrarySession
+from app.library_hours import add_many
+from app.transactions import run_with_retry
+
+class GateError(Exception):
+    """A scan that can't be recorded; the message is returned to the gate."""
+
+class GateBusy(Exception):
+    """Another app process is already serving the gate API."""
+
+class GateRecorder:
+    """Toggles library sessions for gate scans and writes them in micro-batches.
+
+    Which students are inside is held in memory, loaded from the open
+    sessions in the database on first use, so a scan is answered without a
+    query. Scans are buffered and written by a background thread every
+    ``GATE_FLUSH_SECONDS`` or ``GATE_BATCH_SIZE`` scans, one transaction per
+    batch. The index is per process, so the first process to serve a scan
+    takes an exclusive lock on ``GATE_LOCK_FILE`` and any other process
+    answers with GateBusy. Expect at most one flush interval of scans to be
+    lost if that process dies.
+
+    PRNs are resolved through a bounded TTL + LRU cache. Routes that edit or
+    delete a student call ``forget``; the demo data reset calls ``reset``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._app = None
+        self._open = None  # user_id -> check_in of the open session
+        self._students = OrderedDict()  # prn_number -> (expires_at, user_id, name)
+        self._lock_file = None
+        self._check_ins = []  # (user_id, check_in) not yet written
+        self._check_outs = []  # (user_id, check_in, check_out) not yet written
+        self.scans = 0
+        self.flushes = 0
+
+    def init_app(self, app):
+        self._app = app
+        self.ttl = app.config['GATE_STUDENT_CACHE_TTL']
+        self.size = app.config['GATE_STUDENT_CACHE_SIZE']
+        atexit.register(self._flush_at_exit)
+    
+    def _flush_at_exit(self):
+        with self._app.app_context():
+            self.flush()
+
+    def _claim(self):
+        # An flock is released by the OS when the process exits, however it exits
+        if self._lock_file is not None or fcntl is None:
+            return
+        path = self._app.config['GATE_LOCK_FILE'] or os.path.join(self._app.instance_path, 'gate.lock')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            if self._lock_file is not None:
+                return
+            lock_file = open(path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                raise GateBusy('The gate API is served by another app process') from None
+            self._lock_file = lock_file
+
+    def _load(self):
+        self._claim()
+        if self._open is not None:
+            return
+        rows = db.session.execute(
+            select(LibrarySession.user_id, LibrarySession.check_in)
+            .where(LibrarySession.check_out.is_(None))
+        ).all()
+        with self._lock:
+            if self._open is None:
+                # The latest open session wins if an old one was never closed
+                self._open = {}
+                for user_id, check_in in sorted(rows, key=lambda row: row[1]):
+                    self._open[user_id] = check_in
+
+    def _student(self, prn_number):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._students.get(prn_number)
+            if entry is not None and entry[0] > now:
+                self._students.move_to_end(prn_number)
+                return entry[1:]
+        row = db.session.execute(
+            select(User.id, User.name).where(User.prn_number == prn_number, User.role == 'student')
+        ).first()
+        if row is None:
+            raise GateError(f'Unknown PRN {prn_number}')
+        with self._lock:
+            self._students[prn_number] = (now + self.ttl, row.id, row.name)
+            self._students.move_to_end(prn_number)
+            while len(self._students) > self.size:
+                self._students.popitem(last=False)
+        return row.id, row.name
+
+    def forget(self, user_id, deleted=False):
+        """Drop ``user_id`` from the PRN cache, and from the open sessions if ``deleted``."""
+        with self._lock:
+            for prn_number in [prn for prn, entry in self._students.items() if entry[1] == user_id]:
+                del self._students[prn_number]
+            if deleted:
+                if self._open is not None:
+                    self._open.pop(user_id, None)
+                self._check_ins = [scan for scan in self._check_ins if scan[0] != user_id]
+                self._check_outs = [scan for scan in self._check_outs if scan[0] != user_id]
+
+    def reset(self):
+        """Forget every student, open session and unwritten scan, e.g. after the users were replaced."""
+        with self._lock:
+            self._students.clear()
+            self._open = None
+            self._check_ins = []
+            self._check_outs = []
+
+    def scan(self, prn_number, at=None):
+        """Check the student in, or out if they are inside; return what happened."""
+        self._load()
+        user_id, name = self._student(prn_number)
+        at = at or datetime.utcnow()
+        with self._lock:
+            check_in = self._open.pop(user_id, None)
+            if check_in is None:
+                self._open[user_id] = at
+                self._check_ins.append((user_id, at))
+                result = {'prn': prn_number, 'name': name, 'action': 'check_in', 'at': at.isoformat()}
+            else:
+                if at < check_in:
+                    self._open[user_id] = check_in
+                    raise GateError('Scan is older than the open check-in')
+                self._check_outs.append((user_id, check_in, at))
+                result = {'prn': prn_number, 'name': name, 'action': 'check_out', 'at': at.isoformat(),
+                          'hours': round((at - check_in).total_seconds() / 3600, 2)}
+            self.scans += 1
+            pending = len(self._check_ins) + len(self._check_outs)
+        self._start()
+        if pending >= self._app.config['GATE_BATCH_SIZE']:
+            self._wake.set()
+        return result
+
+    def occupancy(self):
+        self._load()
+        with self._lock:
+            return len(self._open)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'inside': len(self._open) if self._open is not None else None,
+                'cached_students': len(self._students),
+                'pending_writes': len(self._check_ins) + len(self._check_outs),
+                'scans': self.scans,
+                'flushes': self.flushes,
+            }
+
+    def _write(self, check_ins, check_outs):
+        # A visit that started and ended within this batch becomes one complete row
+        closed = {(user_id, check_in): check_out for user_id, check_in, check_out in check_outs}
+        new_rows = []
+        for user_id, check_in in check_ins:
+            check_out = closed.pop((user_id, check_in), None)
+            new_rows.append({
+                'user_id': user_id, 'check_in': check_in, 'check_out': check_out,
+                'duration_hours': (check_out - check_in).total_seconds() / 3600 if check_out else None
+            })
+        if new_rows:
+            db.session.execute(insert(LibrarySession), new_rows)
+        if closed:
+            table = LibrarySession.__table__
+            db.session.execute(
+                update(table).where(
+                    table.c.user_id == bindparam('b_user_id'),
+                    table.c.check_in == bindparam('b_check_in'),
+                    table.c.check_out.is_(None)
+                ).values(check_out=bindparam('b_check_out'), duration_hours=bindparam('b_hours')),
+                [{'b_user_id': user_id, 'b_check_in': check_in, 'b_check_out': check_out,
+                  'b_hours': (check_out - check_in).total_seconds() / 3600}
+                 for (user_id, check_in), check_out in closed.items()]
+            )
+        add_many([(user_id, check_in, (check_out - check_in).total_seconds() / 3600)
+                  for user_id, check_in, check_out in check_outs])
+
+    def flush(self):
+        """Write all buffered scans in one transaction; return how many."""
+        with self._lock:
+            check_ins, self._check_ins = self._check_ins, []
+            check_outs, self._check_outs = self._check_outs, []
+        if not check_ins and not check_outs:
+            return 0
+        try:
+            run_with_retry(lambda: self._write(check_ins, check_outs))
+        except Exception:
+            # Put the batch back in front of anything that arrived meanwhile
+            with self._lock:
+                self._check_ins[:0] = check_ins
+                self._check_outs[:0] = check_outs
+            raise
+        with self._lock:
+            self.flushes += 1
+        return len(check_ins) + len(check_outs)
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, args=(self._app,),
+                                                name='gate-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self, app):
+        while True:
+            self._wake.wait(app.config['GATE_FLUSH_SECONDS'])
+            self._wake.clear()
+            with app.app_context():
+                try:
+                    self.flush()
+                except Exception:
+                    app.logger.exception('Writing gate scans failed')
+                finally:
+                    db.session.remove()
+
+gate_recorder = GateRecorder()
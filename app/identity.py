@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import g
+from flask_login import UserMixin
+from sqlalchemy import select
+from app.extensions import db
+from app.models import User
+
+class UserSnapshot(UserMixin):
+    """Read-only copy of the User columns that requests need to identify the caller.
+
+    It is what ``current_user`` is on every request after login. Code that
+    writes to the user must load the row with ``record()`` or issue an UPDATE.
+    """
+
+    FIELDS = ('id', 'prn_number', 'username', 'email', 'name', 'role', 'year', 'course')
+
+    def __init__(self, user):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(user, field))
+
+    @property
+    def unread_notice_count(self):
+        # Changes with every delivered notice, so it is read once per request and never cached longer
+        counts = g.setdefault('unread_notice_counts', {})
+        if self.id not in counts:
+            counts[self.id] = db.session.scalar(select(User.unread_notice_count).where(User.id == self.id)) or 0
+        return counts[self.id]
+
+    def record(self):
+        """The live ORM row for this user."""
+        return db.session.get(User, self.id)
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.username}>'
+
+class IdentityCache:
+    """Per-process TTL + LRU cache of UserSnapshots for the login user_loader.
+
+    Routes that change a user's identity call ``invalidate``. That only
+    reaches the current process; other processes pick the change up within
+    ``IDENTITY_CACHE_TTL`` seconds, which bounds how long a demoted or
+    deleted user keeps their old permissions there.
+    """
+
+    def __init__(self):
+        self.ttl = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.ttl = app.config['IDENTITY_CACHE_TTL']
+        self.size = app.config['IDENTITY_CACHE_SIZE']
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            self.invalidate(user_id)
+            return None
+        snapshot = UserSnapshot(user)
+        if self.ttl > 0 and self.size > 0:
+            with self._lock:
+                self._entries[user_id] = (now + self.ttl, snapshot)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+identity_cache = IdentityCache()
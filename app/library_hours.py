@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, func, literal, union_all
+from sqlalchemy.dialects.sqlite import insert
+from app.extensions import db
+from app.models import User, LibrarySession, LibraryHours
+from app.transactions import run_with_retry
+
+def _upsert(rows):
+    if not rows:
+        return
+    statement = insert(LibraryHours)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=['period', 'user_id'],
+            set_={'hours': LibraryHours.hours + statement.excluded.hours}
+        ),
+        rows
+    )
+
+def add_hours(user_id, check_in, hours):
+    """Count ``hours`` towards the month and year of ``check_in``. The caller commits."""
+    _upsert([{'period': period, 'user_id': user_id, 'hours': hours}
+             for period in LibraryHours.periods_of(check_in)])
+
+def add_many(sessions):
+    """Count many ``(user_id, check_in, hours)`` sessions with one upsert per period row.
+
+    Sessions for the same user and period are summed first, so the upsert
+    touches each aggregate row once. The caller commits.
+    """
+    totals = {}
+    for user_id, check_in, hours in sessions:
+        for period in LibraryHours.periods_of(check_in):
+            totals[period, user_id] = totals.get((period, user_id), 0.0) + hours
+    _upsert([{'period': period, 'user_id': user_id, 'hours': hours}
+             for (period, user_id), hours in totals.items()])
+
+def hours_query(user_ids, now=None):
+    return select(LibraryHours.period, LibraryHours.user_id, LibraryHours.hours).where(
+        LibraryHours.period.in_(LibraryHours.periods_of(now or datetime.utcnow())),
+        LibraryHours.user_id.in_(user_ids)
+    )
+
+def hours_for(user_ids, now=None):
+    """{user_id: (hours this month, hours this year)} for ``user_ids``, in one query."""
+    if not user_ids:
+        return {}
+    month, year = LibraryHours.periods_of(now or datetime.utcnow())
+    hours = {}
+    for period, user_id, total in db.session.execute(hours_query(user_ids, now)):
+        month_hours, year_hours = hours.get(user_id, (0.0, 0.0))
+        hours[user_id] = (total, year_hours) if period == month else (month_hours, total)
+    return hours
+
+def top_students_query(period):
+    return db.session.query(User, LibraryHours.hours).join(
+        LibraryHours, LibraryHours.user_id == User.id
+    ).filter(
+        LibraryHours.period == period, LibraryHours.hours > 0
+    ).order_by(LibraryHours.hours.desc(), User.id)
+
+def top_students(period, limit=None):
+    """(User, hours) pairs for ``period``, most hours first."""
+    query = top_students_query(period)
+    return query.limit(limit).all() if limit else query.all()
+
+def _period_bounds(period):
+    if len(period) == 4:
+        start = datetime(int(period), 1, 1)
+        return start, start.replace(year=start.year + 1)
+    start = datetime.strptime(period, '%Y-%m')
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+def period_totals(period):
+    """Hours per student in ``period``, summed from its sessions."""
+    start, end = _period_bounds(period)
+    return select(literal(period), LibrarySession.user_id, func.sum(LibrarySession.duration_hours)).where(
+        LibrarySession.check_in >= start, LibrarySession.check_in < end,
+        LibrarySession.duration_hours.isnot(None)
+    ).group_by(LibrarySession.user_id)
+
+def _recount(period):
+    db.session.execute(delete(LibraryHours).where(LibraryHours.period == period))
+    return db.session.execute(
+        insert(LibraryHours).from_select(['period', 'user_id', 'hours'], period_totals(period))
+    ).rowcount
+
+def close_period(period):
+    """Recount one finished period from its sessions; return the row count.
+
+    Periods roll over by themselves because aggregates are keyed by period,
+    so closing only makes the finished period exact. It reads that period's
+    sessions through the check_in index and touches no user rows.
+    """
+    return run_with_retry(lambda: _recount(period))
+
+def previous_periods(now=None):
+    """The periods that ended most recently: last month, plus last year in January."""
+    now = now or datetime.utcnow()
+    last_month = now.replace(day=1) - timedelta(days=1)
+    periods = [last_month.strftime('%Y-%m')]
+    if now.month == 1:
+        periods.append(last_month.strftime('%Y'))
+    return periods
+
+def _reconcile():
+    db.session.execute(delete(LibraryHours))
+    grouped = [
+        select(period, LibrarySession.user_id, func.sum(LibrarySession.duration_hours))
+        .where(LibrarySession.duration_hours.isnot(None))
+        .group_by(period, LibrarySession.user_id)
+        for period in (func.strftime('%Y-%m', LibrarySession.check_in),
+                       func.strftime('%Y', LibrarySession.check_in))
+    ]
+    return db.session.execute(
+        insert(LibraryHours).from_select(['period', 'user_id', 'hours'], union_all(*grouped))
+    ).rowcount
+
+def reconcile():
+    """Rebuild every aggregate from LibrarySession; return the row count."""
+    return run_with_retry(_reconcile)
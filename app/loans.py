@@ -0,0 +1,86 @@
+from datetime import datetime
+from sqlalchemy import insert, update, delete, select, func
+from app.extensions import db
+from app.models import User, Book, Loan, LoanRollup
+from app.transactions import run_with_retry
+
+MAX_ACTIVE_LOANS = 2
+
+class LoanError(Exception):
+    """A borrow or return that was refused; the message is shown to the user."""
+
+def _borrow(user_id, book_id):
+    # Take the write lock on the borrower first. On SQLite this serializes the
+    # whole transaction; on row-locking databases it serializes the same
+    # student's borrows, which makes the 2-book limit check below race-free.
+    db.session.execute(
+        update(User).where(User.id == user_id)
+        .values(total_books_borrowed=db.func.coalesce(User.total_books_borrowed, 0) + 1)
+    )
+
+    if Loan.active(user_id=user_id).count() >= MAX_ACTIVE_LOANS:
+        raise LoanError('You can only borrow maximum 2 books at a time. Please return a book first.')
+    if Loan.active(user_id=user_id, book_id=book_id).first():
+        raise LoanError('You have already borrowed this book.')
+
+    # Only one of several concurrent borrowers can take the last copy
+    taken = db.session.execute(
+        update(Book).where(Book.id == book_id, Book.copies_available > 0)
+        .values(copies_available=Book.copies_available - 1)
+    ).rowcount
+    if taken != 1:
+        raise LoanError('Sorry, this book is currently not available.')
+
+    loan = Loan(user_id=user_id, book_id=book_id)
+    db.session.add(loan)
+    db.session.flush()
+    _count_in_rollup(user_id, loan.issue_date)
+    return loan
+
+def _count_in_rollup(user_id, issue_date):
+    # The borrower's row lock taken in _borrow makes update-then-insert race-free
+    period = LoanRollup.period_of(issue_date)
+    counted = db.session.execute(
+        update(LoanRollup).where(LoanRollup.period == period, LoanRollup.user_id == user_id)
+        .values(loans_count=LoanRollup.loans_count + 1)
+    ).rowcount
+    if not counted:
+        db.session.execute(insert(LoanRollup).values(period=period, user_id=user_id, loans_count=1))
+
+def borrow_book(user_id, book_id):
+    """Atomically issue ``book_id`` to ``user_id`` and return the new Loan."""
+    return run_with_retry(lambda: _borrow(user_id, book_id))
+
+def _return(loan_id):
+    # Only the first of several concurrent returns gets to close the loan
+    closed = db.session.execute(
+        update(Loan).where(Loan.id == loan_id, Loan.return_date.is_(None))
+        .values(return_date=datetime.utcnow())
+    ).rowcount
+    if closed != 1:
+        raise LoanError('This book has already been returned.')
+
+    loan = db.session.get(Loan, loan_id)
+    db.session.execute(
+        update(Book).where(Book.id == loan.book_id, Book.copies_available < Book.copies_total)
+        .values(copies_available=Book.copies_available + 1)
+    )
+    return loan
+
+def return_loan(loan_id):
+    """Atomically close ``loan_id`` and put its copy back on the shelf."""
+    return run_with_retry(lambda: _return(loan_id))
+
+def _rebuild_rollups():
+    db.session.execute(delete(LoanRollup))
+    period = func.strftime('%Y-%m', Loan.issue_date)
+    return db.session.execute(
+        insert(LoanRollup).from_select(
+            ['period', 'user_id', 'loans_count'],
+            select(period, Loan.user_id, func.count(Loan.id)).group_by(period, Loan.user_id)
+        )
+    ).rowcount
+
+def rebuild_rollups():
+    """Recompute loan_rollup from the whole loan history; return the row count."""
+    return run_with_retry(_rebuild_rollups)
@@ -1,10 +1,27 @@
-from datetime import datetime, timedelta
-from flask import render_template, redirect, url_for, flash, request, jsonify
+import hmac
+import io
+import os
+import queue
+import time
+from functools import wraps
+from datetime import date, datetime, timedelta, timezone
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app, Response
 from flask_login import login_required, current_user
+from app import loans, notices, extension_requests, library_hours, occupancy, recommendations
+from app.events import broker, format_event
 from app.extensions import db
 from app.main import bp
-from app.models import User, Book, Loan, Notice, ExtensionRequest, LibrarySession
-from sqlalchemy import func, extract
+from app.models import (User, Book, Loan, LoanRollup, Notice, ExtensionRequest, LibrarySession, LibraryHours,
+                        BookCirculation, CourseCirculation, ReportWatermark, BookNeighbor, NoticeDelivery,
+                        NoticeRecipient)
+from app.search import search_books, search_students, student_prefix_filter
+from app.pagination import keyset_paginate
+from app.transactions import run_with_retry
+from app.passwords import password_hasher
+from app.identity import identity_cache
+from app.gate import gate_recorder, GateError, GateBusy
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
 
 @bp.route('/')
 @bp.route('/index')
@@ -20,6 +37,8 @@ def emergency_setup():
         # Clear and create fresh admin
         db.session.query(User).delete()
         db.session.commit()
+        identity_cache.clear()
+        gate_recorder.reset()
         
         admin = User(
             prn_number='ADMIN2024',
@@ -52,34 +71,66 @@ def dashboard():
     else:
         return redirect(url_for('main.student_dashboard'))
 
+def keyset_page(query, columns, cursor_prefix='', per_page=None, descending=False):
+    """Paginate ``query`` with the ``<prefix>after``/``<prefix>before`` cursors of this request."""
+    if per_page is None:
+        per_page = request.args.get('per_page', current_app.config['CATALOG_PER_PAGE'], type=int)
+        per_page = max(1, min(per_page, current_app.config['CATALOG_MAX_PER_PAGE']))
+    return keyset_paginate(query, columns,
+                           after=request.args.get(cursor_prefix + 'after'),
+                           before=request.args.get(cursor_prefix + 'before'),
+                           per_page=per_page, descending=descending)
+
+def parse_date_arg(name):
+    """A YYYY-MM-DD query-string argument as a datetime, or None if missing or invalid."""
+    try:
+        return datetime.strptime(request.args.get(name, ''), '%Y-%m-%d')
+    except ValueError:
+        return None
+
+def catalog_page():
+    """One keyset-paginated page of the book catalog, ordered by (title, id)."""
+    return keyset_page(Book.query, (Book.title, Book.id))
+
+@bp.app_template_global()
+def cursor_url(cursor_prefix, direction, cursor):
+    """URL of the current page with one paginated list moved to ``cursor``."""
+    args = request.args.to_dict()
+    args.pop(cursor_prefix + 'after', None)
+    args.pop(cursor_prefix + 'before', None)
+    args[cursor_prefix + direction] = cursor
+    args.update(request.view_args or {})
+    return url_for(request.endpoint, **args)
+
 @bp.route('/student-dashboard')
 @login_required
 def student_dashboard():
     from app.models import Notice
     from datetime import datetime, timedelta
     
-    books = Book.query.all()
-    my_loans = Loan.query.filter_by(user_id=current_user.id, return_date=None).all()
-    
-    # Get recent notices for student
-    all_notices = Notice.query.filter(
-        (Notice.recipient_type == 'all') |
-        (Notice.recipient_type == 'student')
-    ).all()
+    catalog = catalog_page()
+    total_books = Book.query.count()
+    my_loans = Loan.active(user_id=current_user.id).options(joinedload(Loan.book)).all()
     
-    specific_notices = Notice.query.filter(
-        Notice.recipient_type == 'specific'
-    ).all()
+    # The request to show per loan: a pending one, else the latest unexpired decision
+    extension_status = {}
+    if my_loans:
+        current_requests = sorted(ExtensionRequest.current_for([loan.id for loan in my_loans]),
+                                  key=lambda extension_request: extension_request.request_date)
+        for extension_request in current_requests:
+            shown = extension_status.get(extension_request.loan_id)
+            if shown is None or shown.status != 'pending':
+                extension_status[extension_request.loan_id] = extension_request
     
-    student_specific = []
-    for notice in specific_notices:
-        if notice.recipient_ids and str(current_user.id) in notice.recipient_ids.split(','):
-            student_specific.append(notice)
+    # Get recent notices for student
+    recent_notices = Notice.inbox_for(current_user.id).options(joinedload(Notice.creator)).limit(5).all()
     
-    recent_notices = sorted(all_notices + student_specific, key=lambda x: x.created_date, reverse=True)[:5]
+    suggested_books = recommendations.for_student(current_user.id, current_app.config['RECOMMENDATIONS_SHOWN'])
     
     return render_template('main/dashboard_student.html', title='Student Dashboard', 
-                         books=books, my_loans=my_loans, recent_notices=recent_notices)
+                         books=catalog.items, catalog=catalog, total_books=total_books,
+                         my_loans=my_loans, extension_status=extension_status,
+                         recent_notices=recent_notices, suggested_books=suggested_books)
 
 @bp.route('/admin-dashboard')
 @login_required
@@ -90,61 +141,55 @@ def admin_dashboard():
     
     from app.models import Notice
     
-    books = Book.query.all()
-    active_loans = Loan.query.filter_by(return_date=None).all()
-    overdue_loans = [loan for loan in active_loans if loan.is_overdue]
-    recent_notices = Notice.query.filter_by(created_by=current_user.id).order_by(Notice.created_date.desc()).limit(5).all()
+    catalog = catalog_page()
+    
+    # Active-loan counts for the whole page in one grouped query
+    book_ids = [book.id for book in catalog.items]
+    active_loan_counts = {}
+    if book_ids:
+        active_loan_counts = dict(Loan.active_counts(Loan.book_id, book_ids).all())
+    
+    # Both loan lists are index range scans on loan(return_date, due_date)
+    per_page = current_app.config['LOANS_PER_PAGE']
+    with_people = (joinedload(Loan.borrower), joinedload(Loan.book))
+    active_loans = keyset_page(Loan.active().options(*with_people), (Loan.due_date, Loan.id), 'loans_', per_page)
+    overdue_loans = keyset_page(Loan.overdue().options(*with_people), (Loan.due_date, Loan.id), 'overdue_', per_page)
+    # Catalog size and both loan totals in one statement
+    total_books, active_loan_total, overdue_total = db.session.execute(select(
+        select(func.count(Book.id)).scalar_subquery(),
+        Loan.active().with_entities(func.count(Loan.id)).scalar_subquery(),
+        Loan.overdue().with_entities(func.count(Loan.id)).scalar_subquery()
+    )).one()
+    recent_notices = Notice.sent_by(current_user.id).options(joinedload(Notice.delivery)).limit(5).all()
     
     return render_template('main/dashboard_admin.html', title='Admin Dashboard',
-                         books=books, active_loans=active_loans, overdue_loans=overdue_loans, recent_notices=recent_notices)
+                         books=catalog.items, catalog=catalog, total_books=total_books,
+                         active_loan_counts=active_loan_counts, active_loans=active_loans, overdue_loans=overdue_loans,
+                         active_loan_total=active_loan_total, overdue_total=overdue_total, recent_notices=recent_notices)
 
 @bp.route('/search')
 def search():
     query = request.args.get('q', '')
-    if query:
-        books = Book.query.filter(
-            (Book.title.contains(query)) | (Book.author.contains(query))
-        ).all()
-    else:
-        books = []
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = current_app.config['SEARCH_RESULTS_PER_PAGE']
+    
+    books, total = search_books(query, page=page, per_page=per_page)
+    has_next = page * per_page < total
     
     return render_template('main/search_results.html', title='Search Results', 
-                         books=books, query=query)
+                         books=books, query=query, total=total, page=page, has_next=has_next)
 
 @bp.route('/borrow/<int:book_id>')
 @login_required
 def borrow_book(book_id):
     book = Book.query.get_or_404(book_id)
     
-    if book.copies_available <= 0:
-        flash('Sorry, this book is currently not available.', 'warning')
-        return redirect(url_for('main.dashboard'))
-    
-    # Check 2-book limit
-    current_loans = Loan.query.filter_by(user_id=current_user.id, return_date=None).count()
-    if current_loans >= 2:
-        flash('You can only borrow maximum 2 books at a time. Please return a book first.', 'warning')
-        return redirect(url_for('main.dashboard'))
-    
-    # Check if user already has this book
-    existing_loan = Loan.query.filter_by(
-        user_id=current_user.id, book_id=book_id, return_date=None
-    ).first()
-    
-    if existing_loan:
-        flash('You have already borrowed this book.', 'warning')
+    try:
+        loan = loans.borrow_book(current_user.id, book_id)
+    except loans.LoanError as e:
+        flash(str(e), 'warning')
         return redirect(url_for('main.dashboard'))
     
-    # Create new loan
-    loan = Loan(user_id=current_user.id, book_id=book_id)
-    book.copies_available -= 1
-    
-    # Update user activity
-    current_user.total_books_borrowed += 1
-    
-    db.session.add(loan)
-    db.session.commit()
-    
     flash(f'Successfully borrowed "{book.title}". Due date: {loan.due_date.strftime("%Y-%m-%d")}', 'success')
     return redirect(url_for('main.dashboard'))
 
@@ -157,14 +202,12 @@ def return_book(loan_id):
         flash('Access denied.', 'danger')
         return redirect(url_for('main.dashboard'))
     
-    if loan.return_date:
-        flash('This book has already been returned.', 'warning')
+    try:
+        loan = loans.return_loan(loan_id)
+    except loans.LoanError as e:
+        flash(str(e), 'warning')
         return redirect(url_for('main.dashboard'))
     
-    # Process return
-    loan.return_date = datetime.utcnow()
-    loan.book.copies_available += 1
-    
     # Calculate fine if overdue
     fine = loan.fine_amount
     if fine > 0:
@@ -172,7 +215,6 @@ def return_book(loan_id):
     else:
         flash('Book returned successfully!', 'success')
     
-    db.session.commit()
     return redirect(url_for('main.dashboard'))
 
 @bp.route('/add-book', methods=['GET', 'POST'])
@@ -209,7 +251,7 @@ def delete_book(book_id):
     book = Book.query.get_or_404(book_id)
     
     # Check for active loans
-    active_loans = Loan.query.filter_by(book_id=book_id, return_date=None).count()
+    active_loans = Loan.active(book_id=book_id).count()
     if active_loans > 0:
         flash(f'Cannot delete book "{book.title}". It has {active_loans} active loan(s).', 'danger')
         return redirect(url_for('main.admin_dashboard'))
@@ -239,17 +281,31 @@ def manage_users():
         return redirect(url_for('main.dashboard'))
     
     search_query = request.args.get('search', '')
-    if search_query:
-        users = User.query.filter(
-            (User.name.contains(search_query)) | 
-            (User.prn_number.contains(search_query)) |
-            (User.email.contains(search_query))
-        ).all()
-    else:
-        users = User.query.all()
+    user_query = User.matching(search_query) if search_query else User.query
+    users = keyset_page(user_query, (User.id,), per_page=current_app.config['USERS_PER_PAGE'])
+    total_users = user_query.count()
+    
+    # Active-loan counts for the whole page in one grouped query
+    user_ids = [user.id for user in users.items]
+    active_loan_counts = {}
+    if user_ids:
+        active_loan_counts = dict(Loan.active_counts(Loan.user_id, user_ids).all())
     
     return render_template('main/manage_users.html', title='Manage Users', 
-                         users=users, search_query=search_query)
+                         users=users, total_users=total_users,
+                         active_loan_counts=active_loan_counts, search_query=search_query)
+
+@bp.route('/manage-users/<int:user_id>/details')
+@login_required
+def user_details(user_id):
+    """HTML fragment for the user detail modal, loaded when the modal opens."""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    user = User.query.get_or_404(user_id)
+    # At most MAX_ACTIVE_LOANS rows; sorting them here keeps the plan on the borrower's index
+    active_loans = sorted(Loan.active(user_id=user_id).options(joinedload(Loan.book)), key=lambda loan: loan.due_date)
+    return render_template('main/user_details_fragment.html', user=user, active_loans=active_loans)
 
 @bp.route('/extend-loan/<int:loan_id>')
 @login_required
@@ -309,9 +365,7 @@ def request_extension(loan_id):
         return redirect(url_for('main.dashboard'))
     
     # Check if there's already a pending request
-    pending_request = ExtensionRequest.query.filter_by(
-        loan_id=loan_id, status='pending'
-    ).first()
+    pending_request = ExtensionRequest.pending_for(loan_id).first()
     
     if pending_request:
         flash('You already have a pending extension request for this book.', 'warning')
@@ -329,7 +383,10 @@ def request_extension(loan_id):
             )
             
             # Update user activity
-            current_user.total_extension_requests += 1
+            User.query.filter_by(id=current_user.id).update(
+                {'total_extension_requests': func.coalesce(User.total_extension_requests, 0) + 1},
+                synchronize_session=False
+            )
             
             db.session.add(extension_request)
             db.session.commit()
@@ -350,11 +407,56 @@ def manage_extensions():
     
     from app.models import ExtensionRequest
     
-    pending_requests = ExtensionRequest.query.filter_by(status='pending').all()
-    all_requests = ExtensionRequest.query.order_by(ExtensionRequest.request_date.desc()).all()
+    per_page = current_app.config['EXTENSIONS_PER_PAGE']
+    with_loan = (joinedload(ExtensionRequest.loan).joinedload(Loan.borrower),
+                 joinedload(ExtensionRequest.loan).joinedload(Loan.book))
+    
+    # Oldest pending requests first so nothing waits forever
+    pending_requests = keyset_page(
+        ExtensionRequest.pending().options(*with_loan),
+        (ExtensionRequest.request_date, ExtensionRequest.id), 'pending_', per_page
+    )
+    pending_total = ExtensionRequest.pending().count()
+    
+    status = request.args.get('status', '')
+    date_from = parse_date_arg('date_from')
+    date_to = parse_date_arg('date_to')
+    show_archived = request.args.get('archived') == '1'
+    
+    history = ExtensionRequest.history(status if status in ('pending', 'approved', 'rejected') else None,
+                                       date_from, date_to, archived=show_archived).options(*with_loan)
+    all_requests = keyset_page(history, (ExtensionRequest.request_date, ExtensionRequest.id),
+                               'history_', per_page, descending=True)
     
     return render_template('main/manage_extensions.html', title='Manage Extensions',
-                         pending_requests=pending_requests, all_requests=all_requests)
+                         pending_requests=pending_requests, pending_total=pending_total,
+                         all_requests=all_requests, status=status, show_archived=show_archived,
+                         date_from=request.args.get('date_from', ''), date_to=request.args.get('date_to', ''))
+
+@bp.route('/extension-request/<int:request_id>')
+@login_required
+def extension_request_details(request_id):
+    """Modal content for one extension request, loaded when the modal opens."""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    extension_request = ExtensionRequest.query.options(
+        joinedload(ExtensionRequest.loan).joinedload(Loan.borrower),
+        joinedload(ExtensionRequest.loan).joinedload(Loan.book)
+    ).filter_by(id=request_id).first_or_404()
+    loan = extension_request.loan
+    
+    return jsonify({
+        'id': extension_request.id,
+        'student': loan.borrower.name,
+        'book': loan.book.title,
+        'requested_days': extension_request.requested_days,
+        'reason': extension_request.reason,
+        'status': extension_request.status,
+        'due_date': loan.due_date.strftime('%Y-%m-%d'),
+        'new_due_date': (loan.due_date + timedelta(days=extension_request.requested_days)).strftime('%Y-%m-%d'),
+        'respond_url': url_for('main.respond_extension', request_id=extension_request.id)
+    })
 
 @bp.route('/respond-extension/<int:request_id>', methods=['POST'])
 @login_required
@@ -397,6 +499,83 @@ def respond_extension(request_id):
         flash('Extension request rejected.', 'info')
     
     db.session.commit()
+    
+    if extension_request.status != 'pending':
+        loan = extension_request.loan
+        broker.publish(loan.user_id, 'extension', {
+            'loan_id': loan.id,
+            'book': loan.book.title,
+            'status': extension_request.status,
+            'response': extension_request.admin_response,
+            'due_date': loan.due_date.strftime('%Y-%m-%d')
+        })
+    return redirect(url_for('main.manage_extensions'))
+
+@bp.route('/respond-extensions/bulk', methods=['POST'])
+@login_required
+def respond_extensions_bulk():
+    wants_json = request.is_json
+    if current_user.role != 'admin':
+        if wants_json:
+            return jsonify({'error': 'Admin privileges required'}), 403
+        flash('Access denied. Admin privileges required.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    error = None
+    request_ids = []
+    if wants_json:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            data = {}
+        raw_ids = data.get('request_ids', [])
+        # bool is an int subclass, and a string would be iterated per character
+        if isinstance(raw_ids, list) and all(type(request_id) is int for request_id in raw_ids):
+            request_ids = raw_ids
+        else:
+            error = 'request_ids must be a list of integers.'
+    else:
+        data = request.form
+        try:
+            request_ids = [int(request_id) for request_id in request.form.getlist('request_ids')]
+        except ValueError:
+            error = 'Request ids must be integers.'
+    action = data.get('action')
+    admin_response = data.get('admin_response') or ''
+    admin_response = admin_response.strip() if isinstance(admin_response, str) else ''
+    
+    if error is None:
+        if not request_ids:
+            error = 'Select at least one extension request.'
+        elif action not in ('approve', 'reject'):
+            error = 'Unknown action.'
+        elif action == 'reject' and not admin_response:
+            error = 'Please provide a reason for rejection.'
+    if error:
+        if wants_json:
+            return jsonify({'error': error}), 400
+        flash(error, 'danger')
+        return redirect(url_for('main.manage_extensions'))
+    
+    results = extension_requests.respond_bulk(request_ids, action, admin_response, current_user.id)
+    
+    decided = [result for result in results if result['result'] != 'skipped']
+    for result in decided:
+        broker.publish(result['user_id'], 'extension', {
+            'loan_id': result['loan_id'],
+            'book': result['book'],
+            'status': result['result'],
+            'response': admin_response or 'Extension approved',
+            'due_date': result['due_date']
+        })
+    
+    if wants_json:
+        return jsonify({'results': results, 'updated': len(decided),
+                        'skipped': len(results) - len(decided)})
+    
+    verb = 'approved' if action == 'approve' else 'rejected'
+    flash(f'{len(decided)} extension request(s) {verb}.', 'success' if action == 'approve' else 'info')
+    if len(decided) < len(results):
+        flash(f'{len(results) - len(decided)} request(s) skipped: not found or already answered.', 'warning')
     return redirect(url_for('main.manage_extensions'))
 
 @bp.route('/book-details/<int:book_id>')
@@ -407,11 +586,13 @@ def book_details(book_id):
         return redirect(url_for('main.dashboard'))
     
     book = Book.query.get_or_404(book_id)
-    active_loans = Loan.query.filter_by(book_id=book_id, return_date=None).all()
-    loan_history = Loan.query.filter_by(book_id=book_id).order_by(Loan.issue_date.desc()).all()
+    active_loans = Loan.active(book_id=book_id).all()
+    loan_history = Loan.history_for_book(book_id).all()
+    borrowed_together = recommendations.borrowed_together(book_id, current_app.config['RECOMMENDATIONS_SHOWN'])
     
     return render_template('main/book_details.html', title=f'Book Details - {book.title}',
-                         book=book, active_loans=active_loans, loan_history=loan_history)
+                         book=book, active_loans=active_loans, loan_history=loan_history,
+                         borrowed_together=borrowed_together)
 
 @bp.route('/send-notice', methods=['GET', 'POST'])
 @login_required
@@ -429,57 +610,137 @@ def send_notice():
         recipient_ids = request.form.getlist('recipient_ids')
         
         if title and message:
-            recipient_ids_str = ','.join(recipient_ids) if recipient_ids else None
-            
             notice = Notice(
                 title=title,
                 message=message,
                 created_by=current_user.id,
-                recipient_type=recipient_type,
-                recipient_ids=recipient_ids_str
+                recipient_type=recipient_type
             )
             db.session.add(notice)
+            delivered = notices.deliver_notice(notice, [int(id) for id in recipient_ids if id.isdigit()])
             db.session.commit()
             
-            if recipient_type == 'specific' and recipient_ids:
-                flash(f'Notice sent to {len(recipient_ids)} student(s) successfully!', 'success')
+            if recipient_type == 'specific':
+                broker.publish_many([int(id) for id in recipient_ids if id.isdigit()],
+                                    'notice', notices.notice_event(notice))
+                flash(f'Notice sent to {delivered} student(s) successfully!', 'success')
             else:
-                flash('Notice sent successfully!', 'success')
+                notices.delivery_worker.wake()
+                flash(f'Notice queued for delivery to {delivered} student(s).', 'success')
             return redirect(url_for('main.admin_dashboard'))
         else:
             flash('Please fill in all required fields.', 'danger')
     
-    students = User.query.filter_by(role='student').all()
-    return render_template('main/send_notice.html', title='Send Notice', students=students)
+    return render_template('main/send_notice.html', title='Send Notice')
 
 @bp.route('/notices')
 @login_required
 def view_notices():
     from app.models import Notice
     
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = current_app.config['NOTICES_PER_PAGE']
+    
     if current_user.role == 'student':
         # Student sees notices for all students and specific notices for them
-        all_notices = Notice.query.filter(
-            (Notice.recipient_type == 'all') |
-            (Notice.recipient_type == 'student')
-        ).all()
-        
-        specific_notices = Notice.query.filter(
-            Notice.recipient_type == 'specific'
-        ).all()
-        
-        # Filter specific notices that include this student
-        student_specific = []
-        for notice in specific_notices:
-            if notice.recipient_ids and str(current_user.id) in notice.recipient_ids.split(','):
-                student_specific.append(notice)
-        
-        notices = sorted(all_notices + student_specific, key=lambda x: x.created_date, reverse=True)
+        notices_query = Notice.inbox_for(current_user.id).options(joinedload(Notice.creator))
     else:
         # Admin sees all notices they created
-        notices = Notice.query.filter_by(created_by=current_user.id).order_by(Notice.created_date.desc()).all()
+        notices_query = Notice.sent_by(current_user.id).options(joinedload(Notice.delivery))
+    
+    pagination = notices_query.paginate(page=page, per_page=per_page, error_out=False)
     
-    return render_template('main/notices.html', title='Notices', notices=notices)
+    # Opening the notice board marks the notices on this page as read
+    unread = set()
+    if current_user.role == 'student':
+        notice_ids = [notice.id for notice in pagination.items]
+        unread = notices.unread_ids(current_user.id, notice_ids)
+        if unread:
+            notices.mark_read(current_user.id, list(unread))
+            db.session.commit()
+    
+    return render_template('main/notices.html', title='Notices', notices=pagination.items,
+                         pagination=pagination, unread=unread)
+
+@bp.route('/notices/<int:notice_id>/delivery')
+@login_required
+def notice_delivery_status(notice_id):
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    notice = Notice.query.get_or_404(notice_id)
+    delivery = notice.delivery
+    if delivery is None:
+        return jsonify({'status': 'done', 'delivered': notice.recipient_count,
+                        'total': notice.recipient_count, 'progress': 100})
+    return jsonify({'status': delivery.status, 'delivered': delivery.delivered,
+                    'total': delivery.total, 'progress': delivery.progress,
+                    'error': delivery.error})
+
+@bp.route('/admin/metrics')
+@login_required
+def admin_metrics():
+    """Per-process runtime counters, as JSON."""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Admin privileges required'}), 403
+    return jsonify({
+        'pid': os.getpid(),
+        'gate': gate_recorder.stats(),
+        'identity_cache': identity_cache.stats(),
+        'occupancy_cache': occupancy.occupancy_cache.stats(),
+        'password_hasher': password_hasher.stats(),
+        'sse_connections': broker.connection_count()
+    })
+
+@bp.route('/events')
+@login_required
+def events():
+    """Server-Sent Events stream of notices, extension decisions and due-soon reminders."""
+    user_id = current_user.id
+    subscription = broker.subscribe(user_id, current_app.config['SSE_QUEUE_SIZE'])
+    heartbeat = current_app.config['SSE_HEARTBEAT_SECONDS']
+    max_age = current_app.config['SSE_MAX_STREAM_SECONDS']
+    
+    # Reminders are computed once per connection; the client shows each at most once per session
+    due_soon = Loan.active(user_id=user_id).filter(
+        Loan.due_date <= datetime.utcnow() + timedelta(days=current_app.config['DUE_SOON_DAYS'])
+    ).options(joinedload(Loan.book)).all()
+    reminders = [format_event('due_soon', {
+        'loan_id': loan.id,
+        'book': loan.book.title,
+        'due_date': loan.due_date.strftime('%Y-%m-%d'),
+        'overdue': loan.is_overdue
+    }) for loan in due_soon]
+    db.session.remove()  # don't hold a connection for the life of the stream
+    
+    def stream():
+        # Each stream holds a worker thread, so it ends after max_age and the
+        # browser reconnects; the reconnect also refreshes the unread badge.
+        deadline = time.monotonic() + max_age
+        try:
+            yield 'retry: 10000\n\n'
+            yield from reminders
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event, data = subscription.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_event(event, data)
+            yield 'retry: 1000\n\n'
+        finally:
+            broker.unsubscribe(user_id, subscription)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/notices/unread-count')
+@login_required
+def unread_notice_count():
+    return jsonify({'unread': current_user.unread_notice_count or 0})
 
 @bp.route('/send-user-notice/<int:user_id>', methods=['POST'])
 @login_required
@@ -499,11 +760,12 @@ def send_user_notice(user_id):
             title=title,
             message=message,
             created_by=current_user.id,
-            recipient_type='specific',
-            recipient_ids=str(user_id)
+            recipient_type='specific'
         )
         db.session.add(notice)
+        notices.deliver_notice(notice, [user.id])
         db.session.commit()
+        broker.publish(user.id, 'notice', notices.notice_event(notice))
         flash(f'Notice sent to {user.name} successfully!', 'success')
     else:
         flash('Please fill in all required fields.', 'danger')
@@ -527,7 +789,7 @@ def delete_notice(notice_id):
         return redirect(url_for('main.view_notices'))
     
     try:
-        db.session.delete(notice)
+        notices.delete_notice(notice)
         db.session.commit()
         flash('Notice deleted successfully!', 'success')
     except Exception as e:
@@ -543,8 +805,14 @@ def manage_students():
         flash('Access denied.', 'danger')
         return redirect(url_for('main.dashboard'))
     
-    students = User.query.filter_by(role='student').all()
-    return render_template('main/manage_students.html', title='Manage Students', students=students)
+    search_query = request.args.get('q', '').strip()
+    student_query = User.query.filter_by(role='student')
+    if search_query:
+        student_query = User.query.filter(student_prefix_filter(search_query))
+    students = keyset_page(student_query, (User.id,), per_page=current_app.config['USERS_PER_PAGE'])
+    hours = library_hours.hours_for([student.id for student in students.items])
+    return render_template('main/manage_students.html', title='Manage Students',
+                         students=students, hours=hours, search_query=search_query)
 
 @bp.route('/add-student', methods=['GET', 'POST'])
 @login_required
@@ -586,6 +854,8 @@ def add_student():
         student.set_password(password)
         
         db.session.add(student)
+        db.session.flush()
+        notices.backfill_broadcasts([student.id])
         db.session.commit()
         
         flash(f'Student {name} added! Password: {password}', 'success')
@@ -593,6 +863,36 @@ def add_student():
     
     return render_template('main/add_student.html', title='Add Student')
 
+@bp.route('/import-students', methods=['GET', 'POST'])
+@login_required
+def import_students():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    if request.method == 'POST':
+        from app.student_import import import_students as run_import, StudentImportError
+        
+        # Checked before request.files, which would read and spool the whole body
+        if (request.content_length or 0) > current_app.config['STUDENT_IMPORT_MAX_BYTES']:
+            flash('File is too large; use the flask import-students command instead.', 'danger')
+        elif not request.files.get('csv_file') or not request.files['csv_file'].filename:
+            flash('Please choose a CSV file.', 'danger')
+        else:
+            upload = request.files['csv_file']
+            try:
+                created, errors = run_import(io.TextIOWrapper(upload.stream, encoding='utf-8-sig'),
+                                             current_app.config['STUDENT_IMPORT_BATCH_SIZE'],
+                                             current_app.config['STUDENT_IMPORT_WEB_WORKERS'])
+            except (StudentImportError, UnicodeDecodeError) as e:
+                flash(f'Could not import file: {e}', 'danger')
+            else:
+                flash(f'Imported {created} student(s).', 'success' if created else 'warning')
+                return render_template('main/import_students.html', title='Import Students',
+                                     created=created, errors=errors)
+    
+    return render_template('main/import_students.html', title='Import Students')
+
 @bp.route('/edit-student/<int:user_id>', methods=['GET', 'POST'])
 @login_required
 def edit_student(user_id):
@@ -616,6 +916,8 @@ def edit_student(user_id):
         student.set_password(password)
         
         db.session.commit()
+        identity_cache.invalidate(student.id)
+        gate_recorder.forget(student.id)
         flash('Student updated successfully!', 'success')
         return redirect(url_for('main.manage_students'))
     
@@ -630,13 +932,15 @@ def delete_student(user_id):
     
     student = User.query.get_or_404(user_id)
     
-    active_loans = Loan.query.filter_by(user_id=user_id, return_date=None).count()
+    active_loans = Loan.active(user_id=user_id).count()
     if active_loans > 0:
         flash('Cannot delete student with active loans.', 'danger')
         return redirect(url_for('main.manage_students'))
     
     db.session.delete(student)
     db.session.commit()
+    identity_cache.invalidate(user_id)
+    gate_recorder.forget(user_id, deleted=True)
     
     flash('Student deleted successfully!', 'success')
     return redirect(url_for('main.manage_students'))
@@ -650,32 +954,67 @@ def user_activity():
         flash('Access denied.', 'danger')
         return redirect(url_for('main.dashboard'))
     
-    current_month = datetime.utcnow().month
-    current_year = datetime.utcnow().year
-    
-    monthly_loans = db.session.query(
-        User.id, User.name, func.count(Loan.id).label('loans_count')
-    ).join(Loan).filter(
-        extract('month', Loan.issue_date) == current_month,
-        extract('year', Loan.issue_date) == current_year
-    ).group_by(User.id).all()
+    # One primary-key range read of this month's rollup rows
+    monthly_loans = LoanRollup.top_borrowers(LoanRollup.period_of(datetime.utcnow())).all()
     
-    library_hours = User.query.filter(
-        User.role == 'student',
-        User.library_hours_this_month > 0
-    ).order_by(User.library_hours_this_month.desc()).all()
+    month, year = LibraryHours.periods_of(datetime.utcnow())
+    monthly_hours = library_hours.top_students(month)
+    yearly_hours = library_hours.top_students(year, limit=10)
     
     return render_template('main/user_activity.html', title='User Activity',
-                         monthly_loans=monthly_loans, library_hours=library_hours)
+                         monthly_loans=monthly_loans, monthly_hours=monthly_hours,
+                         yearly_hours=yearly_hours)
+
+@bp.route('/admin/occupancy')
+@login_required
+def occupancy_report():
+    """Hourly library occupancy, peak hours and seat utilization between start and end (YYYY-MM-DD)."""
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    wants_json = request.args.get('format') == 'json'
+    max_days = current_app.config['OCCUPANCY_REPORT_MAX_DAYS']
+    try:
+        last = date.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow().date()
+        first = date.fromisoformat(request.args['start']) if request.args.get('start') else last - timedelta(days=29)
+    except ValueError:
+        error = 'start and end must be dates (YYYY-MM-DD)'
+    else:
+        error = None
+        if first > last:
+            error = 'start must not be after end'
+        elif (last - first).days >= max_days:
+            error = f'The report covers at most {max_days} days'
+    
+    if error:
+        if wants_json:
+            return jsonify({'error': error}), 400
+        flash(error, 'danger')
+        last = datetime.utcnow().date()
+        first = last - timedelta(days=29)
+    
+    report = occupancy.report(first, last)
+    if wants_json:
+        return jsonify(report)
+    return render_template('main/occupancy_report.html', title='Library Occupancy', report=report)
 
 @bp.route('/create-demo-data')
 def create_demo_data():
     """Create sample users and books for demo"""
     try:
         # Clear existing data
+        db.session.query(LoanRollup).delete()
+        db.session.query(BookCirculation).delete()
+        db.session.query(CourseCirculation).delete()
+        db.session.query(ReportWatermark).delete()
+        db.session.query(BookNeighbor).delete()
         db.session.query(Loan).delete()
+        db.session.query(NoticeDelivery).delete()
+        db.session.query(NoticeRecipient).delete()
         db.session.query(Notice).delete()
         db.session.query(ExtensionRequest).delete()
+        db.session.query(LibraryHours).delete()
         db.session.query(LibrarySession).delete()
         db.session.query(User).delete()
         db.session.query(Book).delete()
@@ -748,6 +1087,9 @@ def create_demo_data():
             db.session.add(book)
         
         db.session.commit()
+        # Every user was replaced and their ids are reused
+        identity_cache.clear()
+        gate_recorder.reset()
         
         return '''<h2>✅ Demo Data Created Successfully!</h2>
         <h3>🔑 LOGIN CREDENTIALS:</h3>
@@ -800,6 +1142,27 @@ def check_users():
     
     return result
 
+@bp.route('/api/students/search')
+@login_required
+def api_search_students():
+    """Typeahead lookup of students by name or PRN prefix."""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    limit = current_app.config['STUDENT_SEARCH_LIMIT']
+    limit = max(1, min(request.args.get('limit', limit, type=int), limit))
+    students, truncated = search_students(request.args.get('q', ''), limit)
+    return jsonify({
+        'results': [{
+            'id': student.id,
+            'prn': student.prn_number,
+            'name': student.name,
+            'year': student.year,
+            'course': student.course
+        } for student in students],
+        'truncated': truncated
+    })
+
 @bp.route('/library-attendance')
 @login_required
 def library_attendance():
@@ -807,8 +1170,14 @@ def library_attendance():
         flash('Access denied.', 'danger')
         return redirect(url_for('main.dashboard'))
     
-    students = User.query.filter_by(role='student').all()
-    return render_template('main/library_attendance.html', title='Library Attendance', students=students)
+    summary_query = request.args.get('q', '').strip()
+    student_query = User.query.filter_by(role='student')
+    if summary_query:
+        student_query = User.query.filter(student_prefix_filter(summary_query))
+    students = keyset_page(student_query, (User.id,), per_page=current_app.config['USERS_PER_PAGE'])
+    hours = library_hours.hours_for([student.id for student in students.items])
+    return render_template('main/library_attendance.html', title='Library Attendance',
+                         students=students, hours=hours, summary_query=summary_query)
 
 @bp.route('/manage-admins')
 @login_required
@@ -882,10 +1251,79 @@ def delete_admin(user_id):
     
     db.session.delete(admin)
     db.session.commit()
+    identity_cache.invalidate(user_id)
+    gate_recorder.forget(user_id, deleted=True)
     
     flash('Admin deleted successfully!', 'success')
     return redirect(url_for('main.manage_admins'))
 
+def gate_access_required(view):
+    """Allow gate devices presenting GATE_API_TOKEN as X-Gate-Token, and logged-in admins."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        token = current_app.config['GATE_API_TOKEN']
+        presented = request.headers.get('X-Gate-Token', '')
+        if token and hmac.compare_digest(presented.encode(), token.encode()):
+            return view(*args, **kwargs)
+        if current_user.is_authenticated and current_user.role == 'admin':
+            return view(*args, **kwargs)
+        return jsonify({'error': 'Gate token or admin login required'}), 403
+    return wrapped
+
+def parse_scan_time(value):
+    """An ISO 8601 scan time as naive UTC, or None for 'now'."""
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+@bp.route('/api/gate/scan', methods=['POST'])
+@gate_access_required
+def gate_scan():
+    """Toggle the library session of the student with this PRN."""
+    data = request.get_json(silent=True) or request.form
+    prn_number = (data.get('prn') or '').strip()
+    if not prn_number:
+        return jsonify({'error': 'prn is required'}), 400
+    try:
+        return jsonify(gate_recorder.scan(prn_number, parse_scan_time(data.get('at'))))
+    except ValueError:
+        return jsonify({'error': 'at must be an ISO 8601 timestamp'}), 400
+    except GateError as e:
+        return jsonify({'error': str(e)}), 404
+    except GateBusy as e:
+        return jsonify({'error': str(e)}), 503
+
+@bp.route('/api/gate/scans', methods=['POST'])
+@gate_access_required
+def gate_scans():
+    """Record scans a gate buffered while offline, in order: {"scans": [{"prn", "at"}, ...]}."""
+    scans = (request.get_json(silent=True) or {}).get('scans')
+    if not isinstance(scans, list):
+        return jsonify({'error': 'scans must be a list'}), 400
+    
+    results = []
+    for scan in scans:
+        try:
+            results.append(gate_recorder.scan(str(scan.get('prn', '')).strip(), parse_scan_time(scan.get('at'))))
+        except (AttributeError, ValueError):
+            results.append({'error': 'Each scan needs a prn and an optional ISO 8601 at'})
+        except GateError as e:
+            results.append({'prn': scan.get('prn'), 'error': str(e)})
+        except GateBusy as e:
+            return jsonify({'error': str(e)}), 503
+    return jsonify({'results': results})
+
+@bp.route('/api/gate/occupancy')
+@gate_access_required
+def gate_occupancy():
+    try:
+        return jsonify({'inside': gate_recorder.occupancy()})
+    except GateBusy as e:
+        return jsonify({'error': str(e)}), 503
+
 @bp.route('/add-library-session', methods=['POST'])
 @login_required
 def add_library_session():
@@ -900,21 +1338,51 @@ def add_library_session():
     
     # Create library session
     session = LibrarySession(
-        user_id=student_id,
+        user_id=student.id,
         check_in=datetime.strptime(date + ' 09:00:00', '%Y-%m-%d %H:%M:%S'),
         check_out=datetime.strptime(date + ' 09:00:00', '%Y-%m-%d %H:%M:%S') + timedelta(hours=hours),
         duration_hours=hours
     )
     
-    # Update student's library hours
-    student.library_hours_this_month += hours
-    student.library_hours_this_year += hours
-    
-    db.session.add(session)
-    db.session.commit()
+    # Count the hours towards the session's month and year
+    def record():
+        db.session.add(session)
+        library_hours.add_hours(student.id, session.check_in, hours)
+    run_with_retry(record)
     
     return jsonify({'success': True, 'message': f'Added {hours} hours for {student.name}'})
 
+@bp.route('/library-attendance/bulk', methods=['POST'])
+@login_required
+def bulk_library_sessions():
+    """Record a register of sessions: a CSV upload (csv_file) or a JSON array of {prn, date, hours}."""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    from app.attendance import csv_rows, json_rows, import_sessions, AttendanceImportError
+    
+    if (request.content_length or 0) > current_app.config['ATTENDANCE_IMPORT_MAX_BYTES']:
+        return jsonify({'error': 'Upload is too large; use the flask import-attendance command instead'}), 413
+    
+    upload = request.files.get('csv_file')
+    try:
+        if upload and upload.filename:
+            rows = csv_rows(io.TextIOWrapper(upload.stream, encoding='utf-8-sig'))
+        elif request.is_json:
+            data = request.get_json(silent=True)
+            rows = json_rows(data.get('rows') if isinstance(data, dict) else data)
+        else:
+            return jsonify({'error': 'Send a csv_file upload or a JSON array of rows'}), 400
+        created, errors = import_sessions(rows, current_app.config['ATTENDANCE_IMPORT_BATCH_SIZE'])
+    except (AttendanceImportError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'created': created,
+        'errors': [{'row': number, 'error': message} for number, message in errors]
+    })
+
 @bp.route('/view-database')
 def view_database():
     """View all database contents"""
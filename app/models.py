@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.passwords import password_hasher
 from app.extensions import db
 from sqlalchemy import func
 
@@ -24,8 +24,7 @@ class User(UserMixin, db.Model):
     # Activity Tracking
     total_books_borrowed = db.Column(db.Integer, default=0)
     total_extension_requests = db.Column(db.Integer, default=0)
-    library_hours_this_month = db.Column(db.Float, default=0.0)
-    library_hours_this_year = db.Column(db.Float, default=0.0)
+    unread_notice_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -34,11 +33,25 @@ class User(UserMixin, db.Model):
     loans = db.relationship('Loan', backref='borrower', lazy='dynamic')
     library_sessions = db.relationship('LibrarySession', backref='user', lazy='dynamic')
     
+    __table_args__ = (
+        # Case-insensitive prefix lookups for the student directory search
+        db.Index('ix_user_role_lower_name', 'role', db.func.lower(name)),
+        db.Index('ix_user_role_lower_prn_number', 'role', db.func.lower(prn_number)),
+        db.Index('ix_user_role_id', 'role', 'id'),  # student list keyset pagination
+    )
+    
+    @classmethod
+    def matching(cls, text):
+        """Query for users whose name, PRN or email contains ``text``."""
+        return cls.query.filter(
+            cls.name.contains(text) | cls.prn_number.contains(text) | cls.email.contains(text)
+        )
+    
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -51,6 +64,10 @@ class Book(db.Model):
     copies_available = db.Column(db.Integer, nullable=False, default=1)
     loans = db.relationship('Loan', backref='book', lazy='dynamic')
     
+    __table_args__ = (
+        db.Index('ix_book_title_id', 'title', 'id'),  # catalog keyset pagination
+    )
+    
     def __repr__(self):
         return f'<Book {self.title}>'
 
@@ -62,11 +79,44 @@ class Loan(db.Model):
     due_date = db.Column(db.DateTime, nullable=False)
     return_date = db.Column(db.DateTime, nullable=True)
     
+    __table_args__ = (
+        db.Index('ix_loan_return_date_due_date', 'return_date', 'due_date'),  # overdue scans
+        db.Index('ix_loan_user_id_return_date', 'user_id', 'return_date'),
+        db.Index('ix_loan_book_id_return_date', 'book_id', 'return_date'),
+    )
+    
     def __init__(self, **kwargs):
         super(Loan, self).__init__(**kwargs)
         if not self.due_date:
             self.due_date = datetime.utcnow() + timedelta(days=14)
     
+    @classmethod
+    def active(cls, user_id=None, book_id=None):
+        """Query for loans not returned yet, optionally of one borrower and/or one book."""
+        query = cls.query.filter(cls.return_date.is_(None))
+        if user_id is not None:
+            query = query.filter(cls.user_id == user_id)
+        if book_id is not None:
+            query = query.filter(cls.book_id == book_id)
+        return query
+    
+    @classmethod
+    def active_counts(cls, column, ids):
+        """Query for (id, active loans) pairs, grouped by ``column`` (book_id or user_id) over ``ids``."""
+        return db.session.query(column, func.count(cls.id)).filter(
+            column.in_(ids), cls.return_date.is_(None)
+        ).group_by(column)
+    
+    @classmethod
+    def overdue(cls):
+        """Query for active loans past their due date, evaluated in SQL."""
+        return cls.query.filter(cls.return_date.is_(None), cls.due_date < datetime.utcnow())
+    
+    @classmethod
+    def history_for_book(cls, book_id):
+        """Query for every loan of ``book_id``, latest issue first."""
+        return cls.query.filter(cls.book_id == book_id).order_by(cls.issue_date.desc())
+    
     @property
     def is_overdue(self):
         return self.return_date is None and datetime.utcnow() > self.due_date
@@ -90,6 +140,90 @@ class Loan(db.Model):
     def __repr__(self):
         return f'<Loan {self.id}: {self.borrower.username} - {self.book.title}>'
 
+class LoanRollup(db.Model):
+    """Loans issued per user per calendar month, kept current by app.loans."""
+    period = db.Column(db.String(7), primary_key=True)  # YYYY-MM of Loan.issue_date
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    loans_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    user = db.relationship('User')
+    
+    @staticmethod
+    def period_of(moment):
+        return moment.strftime('%Y-%m')
+    
+    @classmethod
+    def top_borrowers(cls, period):
+        """Query for (user id, name, loans) in ``period``, most loans first."""
+        return db.session.query(User.id, User.name, cls.loans_count).join(
+            cls, cls.user_id == User.id
+        ).filter(cls.period == period).order_by(cls.loans_count.desc(), User.name)
+    
+    def __repr__(self):
+        return f'<LoanRollup {self.period} {self.user_id}: {self.loans_count}>'
+
+class BookCirculation(db.Model):
+    """All-time loan totals per book, folded in incrementally by app.circulation."""
+    __tablename__ = 'book_circulation'
+    
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id'), primary_key=True)
+    loans_count = db.Column(db.Integer, nullable=False, default=0)
+    returned_count = db.Column(db.Integer, nullable=False, default=0)
+    on_time_count = db.Column(db.Integer, nullable=False, default=0)
+    loan_days = db.Column(db.Float, nullable=False, default=0.0)  # summed over returned loans
+    
+    book = db.relationship('Book')
+    
+    __table_args__ = (
+        db.Index('ix_book_circulation_loans_count', 'loans_count'),  # most borrowed books
+    )
+    
+    def __repr__(self):
+        return f'<BookCirculation {self.book_id}: {self.loans_count}>'
+
+class BookNeighbor(db.Model):
+    """A book's top-K "borrowed together" books, rebuilt offline by app.recommendations."""
+    __tablename__ = 'book_neighbor'
+    
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 1 is the closest neighbor
+    neighbor_id = db.Column(db.Integer, db.ForeignKey('book.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    together = db.Column(db.Integer, nullable=False)  # students who borrowed both
+    
+    def __repr__(self):
+        return f'<BookNeighbor {self.book_id} #{self.rank}: {self.neighbor_id}>'
+
+class CourseCirculation(db.Model):
+    """Loan totals per borrower course per month of issue, folded in by app.circulation.
+
+    Returns count towards the month the loan was issued in, so a month's
+    on-time rate and average loan length describe the loans made that month.
+    """
+    __tablename__ = 'course_circulation'
+    
+    period = db.Column(db.String(7), primary_key=True)  # YYYY-MM of Loan.issue_date
+    course = db.Column(db.String(50), primary_key=True)
+    loans_count = db.Column(db.Integer, nullable=False, default=0)
+    returned_count = db.Column(db.Integer, nullable=False, default=0)
+    on_time_count = db.Column(db.Integer, nullable=False, default=0)
+    loan_days = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f'<CourseCirculation {self.period} {self.course}: {self.loans_count}>'
+
+class ReportWatermark(db.Model):
+    """How far the loan table has been folded into a set of summary tables."""
+    __tablename__ = 'report_watermark'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_loan_id = db.Column(db.Integer, nullable=False, default=0)  # loans up to this id are counted
+    returned_until = db.Column(db.DateTime, nullable=False)  # returns up to this time are counted
+    refreshed_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ReportWatermark {self.name}: {self.last_loan_id}, {self.returned_until}>'
+
 class Notice(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -97,17 +231,33 @@ class Notice(db.Model):
     created_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     recipient_type = db.Column(db.String(20), nullable=False, default='all')  # 'all', 'student', 'specific'
-    recipient_ids = db.Column(db.Text, nullable=True)  # Comma-separated IDs for multiple recipients
-    is_read = db.Column(db.Boolean, nullable=False, default=False)
+    recipient_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_notices')
+    recipient_links = db.relationship('NoticeRecipient', backref='notice', cascade='all, delete-orphan')
+    recipients = db.relationship('User', secondary='notice_recipient', viewonly=True)
     
-    @property
-    def recipients(self):
-        if self.recipient_ids:
-            ids = [int(id.strip()) for id in self.recipient_ids.split(',') if id.strip()]
-            return User.query.filter(User.id.in_(ids)).all()
-        return []
+    __table_args__ = (
+        db.Index('ix_notice_recipient_type_created_date', 'recipient_type', 'created_date'),
+        db.Index('ix_notice_created_by_created_date', 'created_by', 'created_date'),
+    )
+    
+    @classmethod
+    def inbox_for(cls, user_id):
+        """Query for the notices delivered to a user, newest first.
+        
+        Every delivered notice has a notice_recipient row. Notice ids grow with
+        created_date, so walking the (user_id, notice_id) index backwards
+        returns the rows already in order and a LIMIT stops the read early.
+        """
+        return cls.query.join(NoticeRecipient).filter(
+            NoticeRecipient.user_id == user_id
+        ).order_by(NoticeRecipient.notice_id.desc())
+    
+    @classmethod
+    def sent_by(cls, user_id):
+        """Query for the notices ``user_id`` created, newest first."""
+        return cls.query.filter(cls.created_by == user_id).order_by(cls.created_date.desc(), cls.id.desc())
     
     @property
     def is_new(self):
@@ -123,6 +273,45 @@ class Notice(db.Model):
     def __repr__(self):
         return f'<Notice {self.id}: {self.title}>'
 
+class NoticeRecipient(db.Model):
+    notice_id = db.Column(db.Integer, db.ForeignKey('notice.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    read_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_notice_recipient_user_id_notice_id', 'user_id', 'notice_id'),
+    )
+    
+    def __repr__(self):
+        return f'<NoticeRecipient {self.notice_id}: {self.user_id}>'
+
+class NoticeDelivery(db.Model):
+    """Durable queue entry for fanning a broadcast notice out to students."""
+    id = db.Column(db.Integer, primary_key=True)
+    notice_id = db.Column(db.Integer, db.ForeignKey('notice.id'), nullable=False, unique=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    total = db.Column(db.Integer, nullable=False, default=0)
+    delivered = db.Column(db.Integer, nullable=False, default=0)
+    last_user_id = db.Column(db.Integer, nullable=False, default=0)  # resume point, deliveries go in user id order
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    notice = db.relationship('Notice', backref=db.backref('delivery', uselist=False))
+    
+    __table_args__ = (
+        db.Index('ix_notice_delivery_status_updated_at', 'status', 'updated_at'),
+    )
+    
+    @property
+    def progress(self):
+        if not self.total:
+            return 100 if self.status == 'done' else 0
+        return min(100, int(self.delivered * 100 / self.total))
+    
+    def __repr__(self):
+        return f'<NoticeDelivery {self.id}: {self.status} {self.delivered}/{self.total}>'
+
 class ExtensionRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     loan_id = db.Column(db.Integer, db.ForeignKey('loan.id'), nullable=False)
@@ -134,15 +323,72 @@ class ExtensionRequest(db.Model):
     response_date = db.Column(db.DateTime, nullable=True)
     responded_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     status_expires_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=True)  # set by the expiry sweeper
     
     loan = db.relationship('Loan', backref='extension_requests')
     admin = db.relationship('User', foreign_keys=[responded_by])
     
+    __table_args__ = (
+        db.Index('ix_extension_request_status_request_date', 'status', 'request_date'),
+        db.Index('ix_extension_request_loan_id_archived_at', 'loan_id', 'archived_at'),  # a loan's requests
+        db.Index('ix_extension_request_request_date', 'request_date'),  # unfiltered history
+        db.Index('ix_extension_request_archived_at_request_date', 'archived_at', 'request_date'),
+        db.Index('ix_extension_request_archived_at_status_expires_at', 'archived_at', 'status_expires_at'),
+    )
+    
+    @classmethod
+    def pending(cls):
+        """Requests still waiting for an admin."""
+        return cls.query.filter(cls.status == 'pending')
+    
+    @classmethod
+    def pending_for(cls, loan_id):
+        """The pending request on ``loan_id``, if any."""
+        return cls.pending().filter(cls.loan_id == loan_id)
+    
+    @classmethod
+    def current(cls, now=None):
+        """Requests that are pending or whose decision has not expired yet."""
+        now = now or datetime.utcnow()
+        return cls.query.filter(
+            cls.archived_at.is_(None),
+            db.or_(cls.status_expires_at.is_(None), cls.status_expires_at > now)
+        )
+    
+    @classmethod
+    def current_for(cls, loan_ids, now=None):
+        """Current requests on any of ``loan_ids``, read through the loan_id index."""
+        return cls.current(now).filter(cls.loan_id.in_(loan_ids))
+    
+    @classmethod
+    def history(cls, status=None, date_from=None, date_to=None, archived=False):
+        """Query for the request history, optionally narrowed by status and request date.
+        
+        ``date_to`` is inclusive; archived requests are left out unless ``archived``.
+        """
+        query = cls.query
+        if not archived:
+            query = query.filter(cls.archived_at.is_(None))
+        if status:
+            query = query.filter(cls.status == status)
+        if date_from:
+            query = query.filter(cls.request_date >= date_from)
+        if date_to:
+            query = query.filter(cls.request_date < date_to + timedelta(days=1))
+        return query
+    
+    @staticmethod
+    def status_expiry(status, now=None):
+        now = now or datetime.utcnow()
+        if status == 'approved':
+            return now + timedelta(hours=24)
+        elif status == 'rejected':
+            return now + timedelta(days=2)
+        return None
+    
     def set_status_expiry(self):
-        if self.status == 'approved':
-            self.status_expires_at = datetime.utcnow() + timedelta(hours=24)
-        elif self.status == 'rejected':
-            self.status_expires_at = datetime.utcnow() + timedelta(days=2)
+        if self.status in ('approved', 'rejected'):
+            self.status_expires_at = self.status_expiry(self.status)
     
     def is_status_expired(self):
         return self.status_expires_at and datetime.utcnow() > self.status_expires_at
@@ -157,10 +403,42 @@ class LibrarySession(db.Model):
     check_out = db.Column(db.DateTime, nullable=True)
     duration_hours = db.Column(db.Float, nullable=True)
     
+    __table_args__ = (
+        db.Index('ix_library_session_check_in', 'check_in'),  # per-period recounts
+        db.Index('ix_library_session_user_id_check_in', 'user_id', 'check_in'),  # gate check-outs
+    )
+    
     def calculate_duration(self):
         if self.check_out:
             delta = self.check_out - self.check_in
             self.duration_hours = delta.total_seconds() / 3600
     
     def __repr__(self):
-        return f'<LibrarySession {self.id}: {self.user.name}>'
\ No newline at end of file
+        return f'<LibrarySession {self.id}: {self.user.name}>'
+
+class LibraryHours(db.Model):
+    """Library hours per user per month ('YYYY-MM') and per year ('YYYY').
+
+    Maintained by app.library_hours as sessions are recorded, attributed to
+    the period of the session's check-in.
+    """
+    __tablename__ = 'library_hours'
+    
+    period = db.Column(db.String(7), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    hours = db.Column(db.Float, nullable=False, default=0.0)
+    
+    user = db.relationship('User')
+    
+    __table_args__ = (
+        db.Index('ix_library_hours_period_hours', 'period', 'hours'),  # top students per period
+    )
+    
+    @staticmethod
+    def periods_of(moment):
+        """The (month, year) period keys ``moment`` counts towards."""
+        return moment.strftime('%Y-%m'), moment.strftime('%Y')
+    
+    def __repr__(self):
+        return f'<LibraryHours {self.period} {self.user_id}: {self.hours}>'
+
@@ -0,0 +1,275 @@
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, literal, or_, and_, case
+from sqlalchemy.dialects.sqlite import insert
+from app.extensions import db
+from app.models import User, Notice, NoticeRecipient, NoticeDelivery
+from app.transactions import run_with_retry
+from app.events import broker
+
+def deliver_notice(notice, user_ids=None):
+    """Deliver ``notice`` and return the number of recipients.
+
+    Targeted notices are written inline: one set-based INSERT ... SELECT for
+    the inbox rows and one UPDATE for the unread counters. Broadcasts can
+    reach thousands of students, so they are queued as a NoticeDelivery for
+    the background worker instead. The caller commits.
+    """
+    if notice.id is None:
+        db.session.flush()
+
+    if notice.recipient_type != 'specific':
+        total = User.query.filter_by(role='student').count()
+        db.session.add(NoticeDelivery(notice_id=notice.id, total=total))
+        return total
+
+    condition = User.id.in_(sorted(set(user_ids or ())))
+    count = db.session.execute(
+        insert(NoticeRecipient).from_select(
+            ['notice_id', 'user_id'],
+            select(literal(notice.id), User.id).where(condition)
+        )
+    ).rowcount
+    db.session.execute(
+        update(User).where(condition)
+        .values(unread_notice_count=User.unread_notice_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    notice.recipient_count = count
+    return count
+
+def backfill_broadcasts(user_ids):
+    """Give students created after a broadcast its inbox row, marked as read.
+
+    Broadcasts are fanned out to the students that exist when they are sent,
+    so new students would never see earlier ones. Their rows are added read,
+    so a new account does not start with every old notice unread. Rows the
+    delivery worker already wrote are left alone. The caller commits.
+    """
+    if not user_ids:
+        return 0
+    return db.session.execute(
+        insert(NoticeRecipient).from_select(
+            ['notice_id', 'user_id', 'read_at'],
+            select(Notice.id, User.id, literal(datetime.utcnow()))
+            .join(User, and_(User.id.in_(user_ids), User.role == 'student'))
+            .where(Notice.recipient_type != 'specific')
+        ).on_conflict_do_nothing()
+    ).rowcount
+
+def notice_event(notice):
+    """Payload of the 'notice' event pushed to recipients' /events streams."""
+    return {'id': notice.id, 'title': notice.title}
+
+def mark_read(user_id, notice_ids):
+    """Record read receipts for ``notice_ids`` and decrement the unread counter."""
+    if not notice_ids:
+        return 0
+    marked = db.session.execute(
+        update(NoticeRecipient).where(
+            NoticeRecipient.user_id == user_id,
+            NoticeRecipient.notice_id.in_(notice_ids),
+            NoticeRecipient.read_at.is_(None)
+        ).values(read_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if marked:
+        db.session.execute(
+            update(User).where(User.id == user_id)
+            .values(unread_notice_count=case(
+                (User.unread_notice_count > marked, User.unread_notice_count - marked), else_=0))
+            .execution_options(synchronize_session=False)
+        )
+    return marked
+
+def unread_query(user_id, notice_ids):
+    return select(NoticeRecipient.notice_id).where(
+        NoticeRecipient.user_id == user_id,
+        NoticeRecipient.notice_id.in_(notice_ids),
+        NoticeRecipient.read_at.is_(None)
+    )
+
+def unread_ids(user_id, notice_ids):
+    """The subset of ``notice_ids`` that ``user_id`` has not read yet."""
+    if not notice_ids:
+        return set()
+    return set(db.session.scalars(unread_query(user_id, notice_ids)))
+
+def delete_notice(notice):
+    """Delete ``notice`` and its inbox rows, fixing up unread counters first."""
+    db.session.execute(
+        update(User).where(User.id.in_(
+            select(NoticeRecipient.user_id).where(
+                NoticeRecipient.notice_id == notice.id,
+                NoticeRecipient.read_at.is_(None)
+            )
+        )).values(unread_notice_count=case(
+            (User.unread_notice_count > 0, User.unread_notice_count - 1), else_=0))
+        .execution_options(synchronize_session=False)
+    )
+    # Removing the queue entry stops any worker that is still fanning it out
+    NoticeDelivery.query.filter_by(notice_id=notice.id).delete(synchronize_session=False)
+    NoticeRecipient.query.filter_by(notice_id=notice.id).delete(synchronize_session=False)
+    db.session.delete(notice)
+
+def _claimable(now, stale_after):
+    # Pending jobs, plus running jobs whose worker stopped reporting progress
+    return or_(
+        NoticeDelivery.status == 'pending',
+        and_(NoticeDelivery.status == 'running',
+             NoticeDelivery.updated_at < now - timedelta(seconds=stale_after))
+    )
+
+def claim_delivery(stale_after):
+    """Mark the oldest claimable delivery as running and return its id."""
+    now = datetime.utcnow()
+    job_id = db.session.scalar(
+        select(NoticeDelivery.id).where(_claimable(now, stale_after))
+        .order_by(NoticeDelivery.id).limit(1)
+    )
+    if job_id is None:
+        db.session.rollback()
+        return None
+    claimed = db.session.execute(
+        update(NoticeDelivery).where(NoticeDelivery.id == job_id, _claimable(now, stale_after))
+        .values(status='running', updated_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return job_id if claimed else None
+
+def _deliver_batch(job_id, batch_size):
+    job = db.session.execute(
+        select(NoticeDelivery.notice_id, NoticeDelivery.last_user_id)
+        .where(NoticeDelivery.id == job_id, NoticeDelivery.status == 'running')
+    ).first()
+    if job is None:
+        return []
+    notice_id, last_user_id = job
+    now = datetime.utcnow()
+
+    user_ids = db.session.scalars(
+        select(User.id).where(User.role == 'student', User.id > last_user_id)
+        .order_by(User.id).limit(batch_size)
+    ).all()
+    # Moving the resume point first means a worker that lost the job (it was
+    # reclaimed or deleted) matches no row here and writes nothing.
+    moved = db.session.execute(
+        update(NoticeDelivery).where(
+            NoticeDelivery.id == job_id,
+            NoticeDelivery.status == 'running',
+            NoticeDelivery.last_user_id == last_user_id
+        ).values(
+            last_user_id=user_ids[-1] if user_ids else last_user_id,
+            delivered=NoticeDelivery.delivered + len(user_ids),
+            status='running' if user_ids else 'done',
+            updated_at=now
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    if not moved or not user_ids:
+        return []
+
+    # Students created while the job runs may already have a backfilled row
+    db.session.execute(
+        insert(NoticeRecipient).on_conflict_do_nothing(),
+        [{'notice_id': notice_id, 'user_id': user_id} for user_id in user_ids]
+    )
+    reached = db.session.execute(
+        update(User).where(
+            User.id.in_(user_ids),
+            User.id.in_(select(NoticeRecipient.user_id).where(
+                NoticeRecipient.notice_id == notice_id,
+                NoticeRecipient.read_at.is_(None)
+            ))
+        ).values(unread_notice_count=User.unread_notice_count + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.execute(
+        update(Notice).where(Notice.id == notice_id)
+        .values(recipient_count=Notice.recipient_count + reached)
+        .execution_options(synchronize_session=False)
+    )
+    return user_ids
+
+def run_delivery(job_id, batch_size):
+    """Fan a claimed delivery out in batches, one short transaction each."""
+    notice = db.session.execute(
+        select(Notice.id, Notice.title).join(NoticeDelivery, NoticeDelivery.notice_id == Notice.id)
+        .where(NoticeDelivery.id == job_id)
+    ).first()
+    try:
+        while True:
+            user_ids = run_with_retry(lambda: _deliver_batch(job_id, batch_size))
+            if not user_ids:
+                break
+            broker.publish_many(user_ids, 'notice', notice_event(notice))
+    except Exception as e:
+        db.session.rollback()
+        NoticeDelivery.query.filter_by(id=job_id).update(
+            {'status': 'failed', 'error': str(e)[:500], 'updated_at': datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.session.commit()
+        raise
+
+def process_deliveries(batch_size, stale_after, max_jobs=None):
+    """Claim and run queued deliveries; return how many jobs were run."""
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job_id = claim_delivery(stale_after)
+        if job_id is None:
+            break
+        run_delivery(job_id, batch_size)
+        processed += 1
+    return processed
+
+class DeliveryWorker:
+    """Per-process daemon thread that drains the notice delivery queue.
+
+    The thread starts with the first request a process serves, so CLI
+    commands such as ``flask db upgrade`` never start it. Every process may
+    run one; the conditional claim in claim_delivery keeps them apart.
+    """
+    
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+    
+    def init_app(self, app):
+        if not app.config['NOTICE_WORKER_ENABLED']:
+            return
+        
+        @app.before_request
+        def start_delivery_worker():
+            self.start(app)
+    
+    def start(self, app):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, args=(app,),
+                                                name='notice-delivery', daemon=True)
+                self._thread.start()
+    
+    def wake(self):
+        """Skip the rest of the idle wait, e.g. right after queueing a broadcast."""
+        self._wake.set()
+    
+    def _run(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    processed = process_deliveries(app.config['NOTICE_DELIVERY_BATCH_SIZE'],
+                                                   app.config['NOTICE_DELIVERY_STALE_SECONDS'])
+                except Exception:
+                    app.logger.exception('Notice delivery failed')
+                    processed = 0
+                finally:
+                    db.session.remove()
+            if not processed:
+                self._wake.wait(app.config['NOTICE_DELIVERY_POLL_SECONDS'])
+                self._wake.clear()
+
+delivery_worker = DeliveryWorker()
@@ -0,0 +1,184 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+import numpy as np
+from sqlalchemy import select, func
+from app.extensions import db
+from app.models import LibrarySession
+
+MINUTES_PER_DAY = 24 * 60
+
+def fingerprints_query(first, last):
+    day = func.date(LibrarySession.check_in)
+    return select(day, func.count(), func.max(LibrarySession.id), func.total(LibrarySession.duration_hours)).where(
+        LibrarySession.check_in >= datetime.combine(first, time.min),
+        LibrarySession.check_in < datetime.combine(last + timedelta(days=1), time.min)
+    ).group_by(day)
+
+def _fingerprints(first, last):
+    """{day: (sessions, highest id, total hours)} for sessions checking in from ``first`` to ``last``.
+
+    Any insert, check-out or correction changes the day's tuple, so it
+    tells a cached summary apart from a stale one without loading sessions.
+    """
+    rows = db.session.execute(fingerprints_query(first, last)).all()
+    return {date.fromisoformat(day): (count, last_id, hours) for day, count, last_id, hours in rows}
+
+def sessions_query(first, days):
+    """Check-in and check-out of sessions that can overlap ``days`` days from ``first``."""
+    start = datetime.combine(first, time.min)
+    return select(LibrarySession.check_in, LibrarySession.check_out).where(
+        LibrarySession.check_in >= start - timedelta(days=1),
+        LibrarySession.check_in < start + timedelta(days=days)
+    )
+
+def _occupancy(first, days, now):
+    """Students inside during each minute of ``days`` days from ``first``, shape (days, 24, 60).
+
+    Each session adds +1 at its check-in minute and -1 at its check-out
+    minute of a change array, and the running sum of that array is the
+    occupancy: one pass over the sessions whatever their number. Sessions
+    still open count until ``now`` but not past the end of their check-in day,
+    so a missed check-out can't inflate the following days.
+    """
+    start = datetime.combine(first, time.min)
+    rows = db.session.execute(sessions_query(first, days)).all()
+    minutes = days * MINUTES_PER_DAY
+    change = np.zeros(minutes + 1, dtype=np.int64)
+    if rows:
+        check_in = np.array([row[0] for row in rows], dtype='datetime64[m]')
+        check_out = np.array([row[1] for row in rows], dtype='datetime64[m]')
+        open_until = np.minimum(check_in.astype('datetime64[D]') + np.timedelta64(1, 'D'),
+                                np.datetime64(now, 'm'))
+        check_out = np.where(np.isnat(check_out), open_until, check_out)
+
+        origin = np.datetime64(start, 'm')
+        begins = np.clip((check_in - origin).astype(np.int64), 0, minutes)
+        ends = np.clip((check_out - origin).astype(np.int64), 0, minutes)
+        inside = ends > begins
+        np.add.at(change, begins[inside], 1)
+        np.add.at(change, ends[inside], -1)
+    return np.cumsum(change[:-1]).reshape(days, 24, 60)
+
+def _summaries(first, occupancy, seats, opening_hours):
+    """One summary dict per day of a (days, 24, 60) occupancy array."""
+    open_hour, close_hour = opening_hours
+    hourly_mean = occupancy.mean(axis=2)
+    hourly_peak = occupancy.max(axis=2)
+    by_minute = occupancy.reshape(len(occupancy), MINUTES_PER_DAY)
+    peak = by_minute.max(axis=1)
+    peak_minute = by_minute.argmax(axis=1)
+    seat_hours = by_minute.sum(axis=1) / 60
+    utilization = hourly_mean[:, open_hour:close_hour].mean(axis=1) / seats
+
+    return [{
+        'date': (first + timedelta(days=index)).isoformat(),
+        'hourly_mean': np.round(hourly_mean[index], 2).tolist(),
+        'hourly_peak': hourly_peak[index].tolist(),
+        'peak': int(peak[index]),
+        'peak_at': f'{peak_minute[index] // 60:02d}:{peak_minute[index] % 60:02d}' if peak[index] else None,
+        'peak_hour': int(hourly_mean[index].argmax()) if peak[index] else None,
+        'seat_hours': round(float(seat_hours[index]), 2),
+        'utilization': round(float(utilization[index]), 4),
+    } for index in range(len(occupancy))]
+
+class OccupancyCache:
+    """Per-process LRU cache of daily occupancy summaries.
+
+    A finished day is cached with its sessions' fingerprints and recomputed
+    only when they change, e.g. after a bulk register upload. Today is always
+    recomputed. Days that miss are computed together in one load and one
+    vectorised pass over their span.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.seats = 1
+        self.opening_hours = (0, 24)
+        self._entries = OrderedDict()  # day -> (fingerprints, summary)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.size = app.config['OCCUPANCY_CACHE_DAYS']
+        self.seats = app.config['LIBRARY_SEATS']
+        self.opening_hours = app.config['LIBRARY_OPENING_HOURS']
+
+    def days(self, first, last, now=None):
+        """Summaries for each day from ``first`` to ``last``, in order."""
+        now = now or datetime.utcnow()
+        today = now.date()
+        # A day's occupancy also depends on sessions running over from the day before
+        fingerprints = _fingerprints(first - timedelta(days=1), last)
+        keys = {}
+        summaries = {}
+        missing = []
+        with self._lock:
+            day = first
+            while day <= last:
+                keys[day] = (fingerprints.get(day - timedelta(days=1)), fingerprints.get(day))
+                entry = self._entries.get(day)
+                if day < today and entry is not None and entry[0] == keys[day]:
+                    self._entries.move_to_end(day)
+                    summaries[day] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.append(day)
+                    self.misses += 1
+                day += timedelta(days=1)
+
+        if missing:
+            span = (missing[-1] - missing[0]).days + 1
+            computed = _summaries(missing[0], _occupancy(missing[0], span, now), self.seats, self.opening_hours)
+            with self._lock:
+                for day in missing:
+                    summaries[day] = computed[(day - missing[0]).days]
+                    if day < today and self.size > 0:
+                        self._entries[day] = (keys[day], summaries[day])
+                        self._entries.move_to_end(day)
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return [summaries[day] for day in sorted(summaries)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+occupancy_cache = OccupancyCache()
+
+def report(first, last, now=None):
+    """Daily summaries from ``first`` to ``last`` plus the range's hourly profile and peaks.
+
+    ``hourly_profile`` is the average number of students inside in each
+    hour of the day; ``utilization`` is the share of seats in use during
+    opening hours, averaged over the days the library was used.
+    """
+    days = occupancy_cache.days(first, last, now)
+    hourly = np.array([day['hourly_mean'] for day in days])
+    profile = hourly.mean(axis=0)
+    used = [day for day in days if day['seat_hours'] > 0]
+    busiest = max(used, key=lambda day: (day['peak'], day['seat_hours'])) if used else None
+    return {
+        'first': first.isoformat(),
+        'last': last.isoformat(),
+        'seats': occupancy_cache.seats,
+        'opening_hours': list(occupancy_cache.opening_hours),
+        'hourly_profile': np.round(profile, 2).tolist(),
+        'peak_hours': [int(hour) for hour in np.argsort(-profile, kind='stable')[:3] if profile[hour] > 0],
+        'busiest_day': busiest,
+        'seat_hours': round(sum(day['seat_hours'] for day in days), 2),
+        'utilization': round(sum(day['utilization'] for day in used) / len(used), 4) if used else 0.0,
+        'days': days,
+    }
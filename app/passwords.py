@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+class PasswordHasherBusy(Exception):
+    """The hashing pool's queue stayed full for longer than the configured timeout."""
+
+def hash_password(password, method):
+    """Hash ``password`` with ``method``; a plain function so worker processes can run it."""
+    return generate_password_hash(password, method=method)
+
+def _check(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+def hash_method(password_hash):
+    # Werkzeug stores "<method>$<salt>$<hash>", e.g. "pbkdf2:sha256:600000$..."
+    return password_hash.split('$', 1)[0] if password_hash else None
+
+def normalize_method(method):
+    """``method`` as Werkzeug stores it in hashes, with its defaults filled in.
+
+    'scrypt' becomes 'scrypt:32768:8:1' and 'pbkdf2' 'pbkdf2:sha256:600000',
+    mirroring werkzeug.security without paying for a hash.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        if args and len(args) != 3:
+            raise ValueError("'scrypt' takes 3 arguments.")
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' takes 2 arguments.")
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    return method
+
+class PasswordHasher:
+    """Hashes and verifies passwords in a bounded per-process pool.
+
+    Hashing is deliberately slow. Running it in worker processes keeps
+    request threads free to serve other pages, and the bounded queue turns a
+    login burst into short waits instead of every worker pinned on CPU. That
+    only pays off with threaded workers (gthread): a sync worker serves one
+    request at a time and waits for its hash either way, so use
+    ``PASSWORD_HASH_WORKERS = 0`` there. With 0 (or outside an app) it hashes
+    inline.
+    """
+
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.workers = 0
+        self.timeout = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._depth = 0
+        self._max_depth = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def init_app(self, app):
+        # Stored hashes carry the full method, so compare against that form
+        self.method = normalize_method(app.config['PASSWORD_HASH_METHOD'])
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.timeout = app.config['PASSWORD_HASH_QUEUE_TIMEOUT']
+        # Each worker holds one job and has one more queued behind it
+        self._slots = threading.BoundedSemaphore(max(1, self.workers) * 2)
+
+    def _pool(self):
+        # Started on first use so CLI commands and imports never fork
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _run(self, function, *args):
+        if not self.workers:
+            return function(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherBusy()
+        with self._lock:
+            self._depth += 1
+            self._max_depth = max(self._max_depth, self._depth)
+        try:
+            return self._pool().submit(function, *args).result()
+        finally:
+            with self._lock:
+                self._depth -= 1
+                self._completed += 1
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(_check, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if ``password_hash`` was made with other parameters than the configured ones."""
+        return hash_method(password_hash) != self.method
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'queue_depth': self._depth,
+                'max_queue_depth': self._max_depth,
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+def benchmark(logins, workers, method=DEFAULT_METHOD):
+    """Time ``logins`` password verifications on ``workers`` processes.
+
+    Returns (seconds, logins per second, logins per second per core).
+    """
+    password_hash = hash_password('benchmark-password', method)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_check, [password_hash] * logins, ['benchmark-password'] * logins,
+                                    chunksize=max(1, logins // (workers * 4))))
+    elapsed = time.perf_counter() - started
+    assert all(results)
+    rate = logins / elapsed
+    return elapsed, rate, rate / min(workers, os.cpu_count() or 1)
+
+password_hasher = PasswordHasher()
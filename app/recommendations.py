@@ -0,0 +1,148 @@
+import numpy as np
+from sqlalchemy import select, delete, insert, func
+from app.extensions import db
+from app.models import Book, Loan, BookNeighbor
+from app.transactions import run_with_retry
+
+METRICS = ('cosine', 'lift')
+CHUNK_PAIRS = 4_000_000  # basket pairs expanded at once, bounding memory
+
+def _runs(keys):
+    """Start index and length of each run of equal values in sorted ``keys``."""
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    return starts, np.diff(np.append(starts, len(keys)))
+
+def _rank_in_runs(keys):
+    """Position of each element within its run of equal values in sorted ``keys``."""
+    starts, sizes = _runs(keys)
+    return np.arange(len(keys)) - np.repeat(starts, sizes)
+
+def baskets(max_basket):
+    """(users, books) arrays of each student's distinct books, sorted by user.
+
+    Students with more than ``max_basket`` books keep their most recent
+    ones, which bounds the pairs one student contributes.
+    """
+    rows = db.session.execute(
+        select(Loan.user_id, Loan.book_id, func.max(Loan.id)).group_by(Loan.user_id, Loan.book_id)
+    ).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    users, books, last_loan = np.array([tuple(row) for row in rows], dtype=np.int64).T
+    order = np.lexsort((-last_loan, users))
+    users, books = users[order], books[order]
+    keep = _rank_in_runs(users) < max_basket
+    return users[keep], books[keep]
+
+def _pairs(books, starts, sizes):
+    """Every ordered (a, b) pair of different books within each basket."""
+    per_element = np.repeat(sizes, sizes)
+    left = np.repeat(np.arange(starts[0], starts[0] + len(per_element)), per_element)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(per_element) - per_element, per_element)
+    right = np.repeat(np.repeat(starts, sizes), per_element) + offsets
+    distinct = left != right
+    return books[left[distinct]], books[right[distinct]]
+
+def co_occurrence(users, books):
+    """Sparse item-item matrix as ``(a, b, count)`` arrays: students who borrowed both a and b.
+
+    Each basket is expanded into its book pairs with array arithmetic and
+    the pairs are counted with ``np.unique`` on a packed ``a * span + b``
+    key, a chunk of baskets at a time.
+    """
+    if not len(books):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    span = int(books.max()) + 1
+    starts, sizes = _runs(users)
+    cost = np.cumsum(sizes * sizes)
+    breaks = np.searchsorted(cost, np.arange(CHUNK_PAIRS, cost[-1], CHUNK_PAIRS))
+    keys, counts = [], []
+    for first, last in zip(np.append(0, breaks), np.append(breaks, len(starts))):
+        if last <= first:
+            continue
+        a, b = _pairs(books, starts[first:last], sizes[first:last])
+        chunk_keys, chunk_counts = np.unique(a * span + b, return_counts=True)
+        keys.append(chunk_keys)
+        counts.append(chunk_counts)
+    merged, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    totals = np.zeros(len(merged), dtype=np.int64)
+    np.add.at(totals, inverse, np.concatenate(counts))
+    return merged // span, merged % span, totals
+
+def score(a, b, together, borrowers, students, metric):
+    """Similarity of each (a, b) pair; ``borrowers`` is the number of students per book id."""
+    expected = borrowers[a].astype(np.float64) * borrowers[b]
+    if metric == 'cosine':
+        return together / np.sqrt(expected)
+    if metric == 'lift':
+        return together * students / expected
+    raise ValueError(f'Unknown metric {metric!r}; use one of {", ".join(METRICS)}')
+
+def top_k(a, b, together, scores, k):
+    """The ``k`` best-scoring neighbors of each book, as (book, rank, neighbor, score, together) arrays."""
+    order = np.lexsort((b, -scores, a))
+    a, b, together, scores = a[order], b[order], together[order], scores[order]
+    rank = _rank_in_runs(a)
+    keep = rank < k
+    return a[keep], rank[keep] + 1, b[keep], scores[keep], together[keep]
+
+def _store(neighbors):
+    db.session.execute(delete(BookNeighbor))
+    rows = [{'book_id': int(book_id), 'rank': int(rank), 'neighbor_id': int(neighbor_id),
+             'score': float(value), 'together': int(count)}
+            for book_id, rank, neighbor_id, value, count in zip(*neighbors)]
+    if rows:
+        db.session.execute(insert(BookNeighbor), rows)
+    return len(rows)
+
+def build(k=10, metric='cosine', min_together=2, max_basket=200):
+    """Rebuild the book_neighbor table from the whole loan history; return its row count.
+
+    Pairs borrowed together by fewer than ``min_together`` students are
+    dropped as noise. The new table replaces the old one in a single
+    transaction, so readers never see a half-built table.
+    """
+    if metric not in METRICS:
+        raise ValueError(f'Unknown metric {metric!r}; use one of {", ".join(METRICS)}')
+    users, books = baskets(max_basket)
+    a, b, together = co_occurrence(users, books)
+    frequent = together >= min_together
+    a, b, together = a[frequent], b[frequent], together[frequent]
+    borrowers = np.bincount(books, minlength=int(books.max()) + 1 if len(books) else 0)
+    scores = score(a, b, together, borrowers, len(np.unique(users)), metric)
+    neighbors = top_k(a, b, together, scores, k)
+    return run_with_retry(lambda: _store(neighbors))
+
+def neighbors_query(book_id, limit):
+    return db.session.query(Book, BookNeighbor.score).join(
+        BookNeighbor, BookNeighbor.neighbor_id == Book.id
+    ).filter(BookNeighbor.book_id == book_id).order_by(BookNeighbor.rank).limit(limit)
+
+def borrowed_together(book_id, limit=10):
+    """(Book, score) pairs for the books most often borrowed with ``book_id``; one index range read."""
+    return neighbors_query(book_id, limit).all()
+
+def recent_books_query(user_id, recent):
+    return select(Loan.book_id).where(Loan.user_id == user_id).order_by(Loan.id.desc()).limit(recent)
+
+def suggestions_query(user_id, book_ids, limit):
+    """Neighbors of ``book_ids`` that ``user_id`` has never borrowed, best summed score first."""
+    total = func.sum(BookNeighbor.score)
+    return db.session.query(Book).join(
+        BookNeighbor, BookNeighbor.neighbor_id == Book.id
+    ).filter(
+        BookNeighbor.book_id.in_(book_ids),
+        BookNeighbor.neighbor_id.not_in(select(Loan.book_id).where(Loan.user_id == user_id))
+    ).group_by(Book.id).order_by(total.desc(), Book.id).limit(limit)
+
+def for_student(user_id, limit=6, recent=5):
+    """Books to suggest from the neighbors of the student's ``recent`` latest loans.
+
+    Reads at most ``recent`` neighbor lists and leaves out books the
+    student has already borrowed.
+    """
+    recent_books = db.session.scalars(recent_books_query(user_id, recent)).all()
+    if not recent_books:
+        return []
+    return suggestions_query(user_id, list(set(recent_books)), limit).all()
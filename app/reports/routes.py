@@ -0,0 +1,34 @@
+from datetime import datetime
+from flask import render_template, redirect, url_for, flash, request, current_app
+from flask_login import login_required, current_user
+from app import circulation
+from app.reports import bp
+
+@bp.route('/')
+@login_required
+def circulation_report():
+    """Circulation statistics, read from the summary tables only."""
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    years = circulation.years()
+    year = request.args.get('year') or (years[0] if years else str(datetime.utcnow().year))
+    
+    return render_template('reports/circulation.html', title='Circulation Reports',
+                         year=year, years=years,
+                         summary=circulation.year_summary(year),
+                         courses=circulation.course_summary(year),
+                         books=circulation.most_borrowed(current_app.config['REPORTS_TOP_BOOKS']),
+                         watermark=circulation.watermark())
+
+@bp.route('/refresh', methods=['POST'])
+@login_required
+def refresh():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    issued, returned = circulation.refresh(lag_seconds=current_app.config['REPORTS_RETURN_LAG_SECONDS'])
+    flash(f'Reports refreshed: counted {issued} new loan(s) and {returned} return(s).', 'success')
+    return redirect(url_for('reports.circulation_report', year=request.form.get('year')))
@@ -0,0 +1,108 @@
+import re
+from sqlalchemy import event, text, func, and_, or_, DDL
+from app.extensions import db
+from app.models import User, Book
+
+# External-content FTS5 table over book(title, author). The triggers keep it
+# in sync with every INSERT/UPDATE/DELETE on book, including raw SQL writes.
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(
+        title, author, content='book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+]
+
+# Make db.create_all() build the index alongside the book table
+for statement in FTS_DDL:
+    event.listen(Book.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def build_match_query(query):
+    """Turn free text into an FTS5 MATCH expression with prefix matching.
+
+    Every word must match (implicit AND); the last word is treated as a prefix
+    so results update sensibly while the user is still typing.
+    """
+    tokens = _TOKEN_RE.findall(query or '')
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens[:-1]]
+    terms.append(f'"{tokens[-1]}"*')
+    return ' '.join(terms)
+
+def search_books(query, page=1, per_page=20):
+    """Return (books, total) for one page of BM25-ranked search results."""
+    match = build_match_query(query)
+    if match is None:
+        return [], 0
+
+    total = db.session.execute(
+        text('SELECT count(*) FROM book_fts WHERE book_fts MATCH :match'),
+        {'match': match}
+    ).scalar()
+
+    # Title hits weigh more than author hits
+    books = db.session.query(Book).from_statement(text(
+        'SELECT book.* FROM book_fts JOIN book ON book.id = book_fts.rowid '
+        'WHERE book_fts MATCH :match '
+        'ORDER BY bm25(book_fts, 10.0, 5.0), book.id '
+        'LIMIT :limit OFFSET :offset'
+    )).params(match=match, limit=per_page, offset=(page - 1) * per_page).all()
+
+    return books, total
+
+def _prefix_range(expression, prefix):
+    # A range on the indexed expression; unlike LIKE it always uses the index
+    return and_(expression >= prefix, expression < prefix + '\U0010ffff')
+
+def student_prefix_filter(query):
+    """Students whose name or PRN starts with ``query``, case-insensitively."""
+    prefix = query.strip().lower()
+    return and_(User.role == 'student', or_(_prefix_range(func.lower(User.name), prefix),
+                                            _prefix_range(func.lower(User.prn_number), prefix)))
+
+def student_prefix_query(expression, prefix, limit):
+    """Up to ``limit`` students whose ``expression`` starts with ``prefix``, in ``expression`` order."""
+    return User.query.filter(User.role == 'student', _prefix_range(expression, prefix)) \
+        .order_by(expression, User.id).limit(limit)
+
+def search_students(query, limit=20):
+    """Return (students, truncated) for a name or PRN prefix, at most ``limit`` of them.
+
+    Each key is one bounded range scan on its (role, lower(...)) index, so
+    the cost depends on ``limit``, not on how many students match.
+    """
+    prefix = query.strip().lower()
+    if not prefix:
+        return [], False
+
+    found = {}
+    for expression in (func.lower(User.name), func.lower(User.prn_number)):
+        for student in student_prefix_query(expression, prefix, limit + 1):
+            found[student.id] = student
+    students = sorted(found.values(), key=lambda student: (student.name.lower(), student.id))
+    return students[:limit], len(students) > limit
+
+def create_search_index():
+    for statement in FTS_DDL:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+def rebuild_search_index():
+    """Create the index if missing and repopulate it from the book table."""
+    create_search_index()
+    db.session.execute(text("INSERT INTO book_fts(book_fts) VALUES ('rebuild')"))
+    db.session.execute(text("INSERT INTO book_fts(book_fts) VALUES ('optimize')"))
+    db.session.commit()
+    return db.session.execute(text('SELECT count(*) FROM book')).scalar()
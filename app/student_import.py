@@ -0,0 +1,127 @@
+import csv
+import os
+import re
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from sqlalchemy import insert, select, or_
+from app.extensions import db
+from app.models import User
+from app.notices import backfill_broadcasts
+from app.passwords import password_hasher, hash_password
+from app.transactions import run_with_retry
+
+REQUIRED_COLUMNS = ('prn_number', 'name', 'email', 'mother_name', 'dob')
+OPTIONAL_COLUMNS = ('phone', 'address', 'year', 'course')
+YEARS = ('1st', '2nd', '3rd', '4th', '5th')
+COURSES = ('BSC IT', 'BSC CS', 'BTech Computer Science', 'BTech Data Science')
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+class StudentImportError(Exception):
+    """The file itself can't be imported, e.g. a required column is missing."""
+
+def _validate(row):
+    """Return (student dict, None) for a valid CSV row, else (None, error)."""
+    student = {column: (row.get(column) or '').strip() for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+    missing = [column for column in REQUIRED_COLUMNS if not student[column]]
+    if missing:
+        return None, 'Missing ' + ', '.join(missing)
+    if not EMAIL_RE.match(student['email']):
+        return None, f"Invalid email '{student['email']}'"
+    if not re.fullmatch(r'\d{8}', student['dob']):
+        return None, 'Date of birth must be DDMMYYYY'
+    if student['year'] and student['year'] not in YEARS:
+        return None, f"Unknown year '{student['year']}'"
+    if student['course'] and student['course'] not in COURSES:
+        return None, f"Unknown course '{student['course']}'"
+    for column in OPTIONAL_COLUMNS:
+        student[column] = student[column] or None
+    student['username'] = student['prn_number'].lower()
+    return student, None
+
+def _existing_keys(students):
+    """PRNs, emails and usernames of ``students`` already taken, in one query."""
+    prns = [student['prn_number'] for student in students]
+    emails = [student['email'] for student in students]
+    usernames = [student['username'] for student in students]
+    taken = set()
+    for prn, email, username in db.session.execute(
+        select(User.prn_number, User.email, User.username).where(or_(
+            User.prn_number.in_(prns), User.email.in_(emails), User.username.in_(usernames)
+        ))
+    ):
+        taken.update((('prn', prn), ('email', email), ('username', username)))
+    return taken
+
+def _insert_batch(rows):
+    user_ids = db.session.scalars(insert(User).returning(User.id), rows).all()
+    backfill_broadcasts(user_ids)
+    return len(user_ids)
+
+def import_students(stream, batch_size=250, workers=None):
+    """Create students from a CSV text stream.
+
+    Rows are read, checked and inserted ``batch_size`` at a time, so memory
+    stays flat for any file size. Duplicates within the file and against the
+    database are found with one query per batch, passwords (mother's name +
+    date of birth, as in add_student) are hashed in ``workers`` processes (all
+    cores by default, in this thread if 0), and each batch is committed as
+    one executemany INSERT. Returns ``(created, errors)`` where ``errors`` is
+    a list of ``(line_number, message)``.
+    """
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None:
+        raise StudentImportError('The file is empty.')
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    missing = [column for column in REQUIRED_COLUMNS if column not in reader.fieldnames]
+    if missing:
+        raise StudentImportError('Missing column(s): ' + ', '.join(missing))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    created = 0
+    errors = []
+    seen = set()
+    with ProcessPoolExecutor(max_workers=workers) if workers else nullcontext() as executor:
+        while True:
+            rows = []
+            for row in islice(reader, batch_size):
+                rows.append((reader.line_num, row))
+            if not rows:
+                break
+
+            batch = []
+            for line_number, row in rows:
+                student, error = _validate(row)
+                if error:
+                    errors.append((line_number, error))
+                else:
+                    batch.append((line_number, student))
+
+            taken = _existing_keys([student for _, student in batch]) if batch else set()
+            accepted = []
+            for line_number, student in batch:
+                keys = {('prn', student['prn_number']), ('email', student['email']),
+                        ('username', student['username'])}
+                if keys & taken:
+                    errors.append((line_number, 'PRN or email already registered'))
+                elif keys & seen:
+                    errors.append((line_number, 'Duplicate PRN or email earlier in the file'))
+                else:
+                    seen.update(keys)
+                    accepted.append(student)
+            if not accepted:
+                continue
+
+            passwords = [student['mother_name'] + student['dob'] for student in accepted]
+            methods = [password_hasher.method] * len(passwords)
+            if executor is None:
+                hashes = map(hash_password, passwords, methods)
+            else:
+                hashes = executor.map(hash_password, passwords, methods,
+                                      chunksize=max(1, len(passwords) // (workers * 4)))
+            for student, password_hash in zip(accepted, hashes):
+                student['password_hash'] = password_hash
+                student['role'] = 'student'
+            created += run_with_retry(lambda: _insert_batch(accepted))
+    return created, errors
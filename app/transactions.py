@@ -0,0 +1,29 @@
+import time
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+from app.extensions import db
+
+def _is_busy_error(error):
+    message = str(error.orig).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+def run_with_retry(operation):
+    """Run ``operation`` in its own transaction, retrying on SQLite busy errors.
+
+    ``operation`` must be safe to re-run from scratch: the session is rolled
+    back before every retry.
+    """
+    attempts = current_app.config['DB_BUSY_RETRIES']
+    for attempt in range(attempts):
+        try:
+            result = operation()
+            db.session.commit()
+            return result
+        except OperationalError as e:
+            db.session.rollback()
+            if not _is_busy_error(e) or attempt == attempts - 1:
+                raise
+            time.sleep(0.05 * (2 ** attempt))
+        except Exception:
+            db.session.rollback()
+            raise
@@ -8,4 +8,76 @@ class Config:
     basedir = os.path.abspath(os.path.dirname(__file__))
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'library.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
\ No newline at end of file
+    DB_BUSY_RETRIES = 5  # attempts for write transactions that hit 'database is locked'
+    PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
+    
+    # Pagination
+    SEARCH_RESULTS_PER_PAGE = 20
+    CATALOG_PER_PAGE = 24
+    CATALOG_MAX_PER_PAGE = 96
+    LOANS_PER_PAGE = 20
+    NOTICES_PER_PAGE = 20
+    EXTENSIONS_PER_PAGE = 25
+    USERS_PER_PAGE = 50
+    STUDENT_SEARCH_LIMIT = 20
+    
+    # Background delivery of broadcast notices
+    NOTICE_WORKER_ENABLED = os.environ.get('NOTICE_WORKER_ENABLED', '1') == '1'
+    NOTICE_DELIVERY_BATCH_SIZE = 500
+    NOTICE_DELIVERY_POLL_SECONDS = 5
+    NOTICE_DELIVERY_STALE_SECONDS = 300
+    
+    # Archiving of expired extension request decisions
+    EXTENSION_SWEEPER_ENABLED = os.environ.get('EXTENSION_SWEEPER_ENABLED', '1') == '1'
+    EXTENSION_SWEEP_INTERVAL_SECONDS = 300
+    
+    # Password hashing; changing the method rehashes each password at its next login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))  # per app process; 0 hashes inline
+    PASSWORD_HASH_QUEUE_TIMEOUT = 10  # seconds a login waits for a free slot before giving up
+    
+    # Cache of logged-in users' identities; role changes and deletes take up to the TTL to reach other processes
+    IDENTITY_CACHE_TTL = 60  # seconds
+    IDENTITY_CACHE_SIZE = 10000
+    
+    # Library gate scanners
+    GATE_API_TOKEN = os.environ.get('GATE_API_TOKEN')  # sent by gates as X-Gate-Token; unset allows admins only
+    GATE_FLUSH_SECONDS = 1.0
+    GATE_BATCH_SIZE = 200
+    GATE_STUDENT_CACHE_SIZE = 10000  # PRNs resolved in memory
+    GATE_STUDENT_CACHE_TTL = 300  # seconds; edits made in other processes reach the gate within this
+    GATE_LOCK_FILE = os.environ.get('GATE_LOCK_FILE')  # held by the process serving the gate API; default instance/gate.lock
+    
+    # Bulk student import
+    STUDENT_IMPORT_BATCH_SIZE = 250  # rows per transaction; keeps IN lists under SQLite's variable limit
+    STUDENT_IMPORT_MAX_BYTES = 5 * 1024 * 1024
+    STUDENT_IMPORT_WEB_WORKERS = 2  # hashing processes for uploads; 0 hashes in the request thread, the CLI uses all cores
+    
+    # Bulk library attendance upload
+    ATTENDANCE_IMPORT_BATCH_SIZE = 400  # rows per transaction; two bound values per row in the duplicate check
+    ATTENDANCE_IMPORT_MAX_BYTES = 5 * 1024 * 1024
+    
+    # Library occupancy analytics
+    LIBRARY_SEATS = int(os.environ.get('LIBRARY_SEATS', '100'))
+    LIBRARY_OPENING_HOURS = (8, 20)  # seat utilization is measured over these hours
+    OCCUPANCY_CACHE_DAYS = 400  # daily summaries kept per process
+    OCCUPANCY_REPORT_MAX_DAYS = 366
+    
+    # Circulation reports, read from summary tables folded in from the loan table
+    REPORTS_REFRESH_ENABLED = os.environ.get('REPORTS_REFRESH_ENABLED', '1') == '1'
+    REPORTS_REFRESH_INTERVAL_SECONDS = 600
+    REPORTS_RETURN_LAG_SECONDS = 60  # returns are counted once this old, so none commit behind the watermark
+    REPORTS_TOP_BOOKS = 20
+    
+    # "Borrowed together" recommendations, rebuilt offline by `flask build-recommendations`
+    RECOMMENDATIONS_TOP_K = 10  # neighbors stored per book
+    RECOMMENDATIONS_METRIC = 'cosine'  # or 'lift'
+    RECOMMENDATIONS_MIN_TOGETHER = 2  # students who must share a pair before it counts
+    RECOMMENDATIONS_MAX_BASKET = 200  # most recent books per student used in the build
+    RECOMMENDATIONS_SHOWN = 6
+    
+    # Server-Sent Events
+    SSE_QUEUE_SIZE = 50
+    SSE_HEARTBEAT_SECONDS = 20
+    SSE_MAX_STREAM_SECONDS = 300  # streams then close and the browser reconnects, freeing the thread
+    DUE_SOON_DAYS = 2
\ No newline at end of file
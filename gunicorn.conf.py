@@ -0,0 +1,16 @@
+# Production server settings, loaded automatically by `gunicorn run:app`.
+#
+# The app keeps per-process state: the /events streams only receive events
+# published in their own process, and the gate API answers scans from an
+# in-memory index of open sessions. Run a single process and scale with
+# threads; every open /events stream holds one thread for up to
+# SSE_MAX_STREAM_SECONDS.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = 1
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '64'))
+# Thread workers are not killed for long requests; this only bounds a stuck worker
+timeout = 60
+graceful_timeout = 30
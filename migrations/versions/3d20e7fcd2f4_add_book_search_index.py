@@ -0,0 +1,42 @@
+"""Add book full-text search index
+
+Revision ID: 3d20e7fcd2f4
+Revises: 9695dcce88f7
+Create Date: 2026-10-18 09:12:41.508113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d20e7fcd2f4'
+down_revision = '9695dcce88f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(
+        title, author, content='book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""")
+    # Index the existing catalog
+    op.execute("INSERT INTO book_fts(book_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS book_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS book_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS book_fts_ai')
+    op.execute('DROP TABLE IF EXISTS book_fts')
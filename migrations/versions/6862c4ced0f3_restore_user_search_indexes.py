@@ -0,0 +1,28 @@
+"""Restore the user search indexes lost when 948bde7bea20 rebuilt the user table
+
+Revision ID: 6862c4ced0f3
+Revises: b03b77f8d5bc
+Create Date: 2026-10-19 09:12:40.381927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6862c4ced0f3'
+down_revision = 'b03b77f8d5bc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases upgraded before 948bde7bea20 recreated these lost them in its
+    # batch rebuild of the user table; new databases already have them
+    op.execute('CREATE INDEX IF NOT EXISTS ix_user_role_lower_name ON "user" (role, lower(name))')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_user_role_lower_prn_number ON "user" (role, lower(prn_number))')
+
+
+def downgrade():
+    # The indexes belong to bd6060892896; nothing to undo here
+    pass
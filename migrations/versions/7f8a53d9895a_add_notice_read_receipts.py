@@ -0,0 +1,62 @@
+"""Add per-user notice read receipts and unread counters
+
+Revision ID: 7f8a53d9895a
+Revises: 94cb34fe3628
+Create Date: 2026-10-18 14:55:08.146720
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f8a53d9895a'
+down_revision = '94cb34fe3628'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notice_recipient', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('read_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unread_notice_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('notice', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recipient_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.drop_column('is_read')
+
+    # Deliver existing broadcasts to every student. Notices sent before read
+    # receipts existed are treated as already read so counters start at zero.
+    op.execute(
+        "INSERT INTO notice_recipient (notice_id, user_id, read_at) "
+        "SELECT notice.id, user.id, notice.created_date FROM notice, user "
+        "WHERE notice.recipient_type IN ('all', 'student') AND user.role = 'student'"
+    )
+    op.execute(
+        "UPDATE notice_recipient SET read_at = "
+        "(SELECT created_date FROM notice WHERE notice.id = notice_recipient.notice_id) "
+        "WHERE read_at IS NULL"
+    )
+    op.execute(
+        "UPDATE notice SET recipient_count = "
+        "(SELECT count(*) FROM notice_recipient WHERE notice_recipient.notice_id = notice.id)"
+    )
+
+
+def downgrade():
+    op.execute(
+        "DELETE FROM notice_recipient WHERE notice_id IN "
+        "(SELECT id FROM notice WHERE recipient_type IN ('all', 'student'))"
+    )
+
+    with op.batch_alter_table('notice', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_read', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.drop_column('recipient_count')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('unread_notice_count')
+
+    with op.batch_alter_table('notice_recipient', schema=None) as batch_op:
+        batch_op.drop_column('read_at')
@@ -0,0 +1,58 @@
+"""Add circulation summary tables and their refresh watermark
+
+Revision ID: 8da936a6aa05
+Revises: dcd597a5c0cd
+Create Date: 2026-10-18 22:41:09.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8da936a6aa05'
+down_revision = 'dcd597a5c0cd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('book_circulation',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('loans_count', sa.Integer(), nullable=False),
+    sa.Column('returned_count', sa.Integer(), nullable=False),
+    sa.Column('on_time_count', sa.Integer(), nullable=False),
+    sa.Column('loan_days', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['book.id'], ),
+    sa.PrimaryKeyConstraint('book_id')
+    )
+    with op.batch_alter_table('book_circulation', schema=None) as batch_op:
+        batch_op.create_index('ix_book_circulation_loans_count', ['loans_count'], unique=False)
+
+    op.create_table('course_circulation',
+    sa.Column('period', sa.String(length=7), nullable=False),
+    sa.Column('course', sa.String(length=50), nullable=False),
+    sa.Column('loans_count', sa.Integer(), nullable=False),
+    sa.Column('returned_count', sa.Integer(), nullable=False),
+    sa.Column('on_time_count', sa.Integer(), nullable=False),
+    sa.Column('loan_days', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('period', 'course')
+    )
+    op.create_table('report_watermark',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('last_loan_id', sa.Integer(), nullable=False),
+    sa.Column('returned_until', sa.DateTime(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # The summaries start empty; the first `flask refresh-reports` (or the
+    # background refresher) folds in the whole loan history
+
+
+def downgrade():
+    op.drop_table('report_watermark')
+    op.drop_table('course_circulation')
+    with op.batch_alter_table('book_circulation', schema=None) as batch_op:
+        batch_op.drop_index('ix_book_circulation_loans_count')
+
+    op.drop_table('book_circulation')
@@ -0,0 +1,79 @@
+"""Replace user library hour counters with per-period aggregates
+
+Revision ID: 948bde7bea20
+Revises: c8fb56b36649
+Create Date: 2026-10-18 20:58:12.340771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '948bde7bea20'
+down_revision = 'c8fb56b36649'
+branch_labels = None
+depends_on = None
+
+
+def _restore_user_search_indexes():
+    # On SQLite, batch mode rebuilds the user table and can't reflect the
+    # expression indexes from bd6060892896, so the rebuild drops them
+    op.execute('CREATE INDEX IF NOT EXISTS ix_user_role_lower_name ON "user" (role, lower(name))')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_user_role_lower_prn_number ON "user" (role, lower(prn_number))')
+
+
+def upgrade():
+    op.create_table('library_hours',
+    sa.Column('period', sa.String(length=7), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('hours', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('period', 'user_id')
+    )
+    with op.batch_alter_table('library_hours', schema=None) as batch_op:
+        batch_op.create_index('ix_library_hours_period_hours', ['period', 'hours'], unique=False)
+
+    with op.batch_alter_table('library_session', schema=None) as batch_op:
+        batch_op.create_index('ix_library_session_check_in', ['check_in'], unique=False)
+
+    # The old counters were never reset, so rebuild from the sessions instead
+    # (same as `flask reconcile-library-hours`)
+    op.execute(
+        "INSERT INTO library_hours (period, user_id, hours) "
+        "SELECT strftime('%Y-%m', check_in), user_id, sum(duration_hours) FROM library_session "
+        "WHERE duration_hours IS NOT NULL GROUP BY strftime('%Y-%m', check_in), user_id "
+        "UNION ALL "
+        "SELECT strftime('%Y', check_in), user_id, sum(duration_hours) FROM library_session "
+        "WHERE duration_hours IS NOT NULL GROUP BY strftime('%Y', check_in), user_id"
+    )
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('library_hours_this_year')
+        batch_op.drop_column('library_hours_this_month')
+
+    _restore_user_search_indexes()
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('library_hours_this_month', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('library_hours_this_year', sa.Float(), nullable=True))
+
+    _restore_user_search_indexes()
+
+    op.execute(
+        "UPDATE user SET "
+        "library_hours_this_month = coalesce((SELECT hours FROM library_hours "
+        "WHERE library_hours.user_id = user.id AND period = strftime('%Y-%m', 'now')), 0), "
+        "library_hours_this_year = coalesce((SELECT hours FROM library_hours "
+        "WHERE library_hours.user_id = user.id AND period = strftime('%Y', 'now')), 0)"
+    )
+
+    with op.batch_alter_table('library_session', schema=None) as batch_op:
+        batch_op.drop_index('ix_library_session_check_in')
+
+    with op.batch_alter_table('library_hours', schema=None) as batch_op:
+        batch_op.drop_index('ix_library_hours_period_hours')
+
+    op.drop_table('library_hours')
@@ -0,0 +1,59 @@
+"""Replace notice.recipient_ids with a notice_recipient table
+
+Revision ID: 94cb34fe3628
+Revises: cc1bc22ca032
+Create Date: 2026-10-18 13:40:22.915306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '94cb34fe3628'
+down_revision = 'cc1bc22ca032'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notice_recipient',
+    sa.Column('notice_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['notice_id'], ['notice.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('notice_id', 'user_id')
+    )
+    with op.batch_alter_table('notice_recipient', schema=None) as batch_op:
+        batch_op.create_index('ix_notice_recipient_user_id_notice_id', ['user_id', 'notice_id'], unique=False)
+
+    # Move the comma-separated recipient lists into rows, skipping unknown users
+    bind = op.get_bind()
+    user_ids = {row[0] for row in bind.execute(sa.text('SELECT id FROM user'))}
+    rows = []
+    for notice_id, recipient_ids in bind.execute(sa.text(
+            'SELECT id, recipient_ids FROM notice WHERE recipient_ids IS NOT NULL')):
+        ids = {int(id.strip()) for id in recipient_ids.split(',') if id.strip().isdigit()}
+        rows.extend({'notice_id': notice_id, 'user_id': user_id} for user_id in sorted(ids & user_ids))
+    if rows:
+        bind.execute(sa.text(
+            'INSERT INTO notice_recipient (notice_id, user_id) VALUES (:notice_id, :user_id)'
+        ), rows)
+
+    with op.batch_alter_table('notice', schema=None) as batch_op:
+        batch_op.drop_column('recipient_ids')
+
+
+def downgrade():
+    with op.batch_alter_table('notice', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recipient_ids', sa.Text(), nullable=True))
+
+    op.execute(
+        'UPDATE notice SET recipient_ids = ('
+        'SELECT group_concat(user_id) FROM notice_recipient WHERE notice_recipient.notice_id = notice.id)'
+    )
+
+    with op.batch_alter_table('notice_recipient', schema=None) as batch_op:
+        batch_op.drop_index('ix_notice_recipient_user_id_notice_id')
+
+    op.drop_table('notice_recipient')
@@ -0,0 +1,33 @@
+"""Add book_neighbor table of borrowed-together recommendations
+
+Revision ID: b03b77f8d5bc
+Revises: 8da936a6aa05
+Create Date: 2026-10-18 23:17:52.064417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b03b77f8d5bc'
+down_revision = '8da936a6aa05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('book_neighbor',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('neighbor_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('together', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['book.id'], ),
+    sa.ForeignKeyConstraint(['neighbor_id'], ['book.id'], ),
+    sa.PrimaryKeyConstraint('book_id', 'rank')
+    )
+
+
+def downgrade():
+    op.drop_table('book_neighbor')
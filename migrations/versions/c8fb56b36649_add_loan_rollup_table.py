@@ -0,0 +1,37 @@
+"""Add loan_rollup table of monthly loan counts per user
+
+Revision ID: c8fb56b36649
+Revises: bd6060892896
+Create Date: 2026-10-18 20:22:37.604418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8fb56b36649'
+down_revision = 'bd6060892896'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('loan_rollup',
+    sa.Column('period', sa.String(length=7), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('loans_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('period', 'user_id')
+    )
+
+    # Same as `flask backfill-loan-rollups`
+    op.execute(
+        "INSERT INTO loan_rollup (period, user_id, loans_count) "
+        "SELECT strftime('%Y-%m', issue_date), user_id, count(id) FROM loan "
+        "GROUP BY strftime('%Y-%m', issue_date), user_id"
+    )
+
+
+def downgrade():
+    op.drop_table('loan_rollup')
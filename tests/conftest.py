@@ -0,0 +1,36 @@
+import pytest
+from app import create_app
+from app.extensions import db
+from app.gate import gate_recorder
+from app.identity import identity_cache
+from app.occupancy import occupancy_cache
+from config import Config
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'library.db')
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+        DB_BUSY_RETRIES = 50
+        NOTICE_WORKER_ENABLED = False
+        EXTENSION_SWEEPER_ENABLED = False
+        REPORTS_REFRESH_ENABLED = False
+        PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+        PASSWORD_HASH_WORKERS = 0
+        GATE_LOCK_FILE = str(tmp_path / 'gate.lock')
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        # Module-level caches outlive the app; ids repeat between test databases
+        identity_cache.clear()
+        gate_recorder.reset()
+        occupancy_cache.clear()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import template_rendered
+from sqlalchemy import event
+from app.extensions import db
+from app.models import User, Book, Loan, ExtensionRequest
+
+START = datetime(2026, 1, 1)  # request dates of make_extension_requests
+
+def make_user(prn_number, role='student', **fields):
+    user = User(prn_number=prn_number, username=prn_number.lower(), name=fields.pop('name', prn_number),
+                email=f'{prn_number.lower()}@college.edu', mother_name='Usha', dob='01012000', role=role,
+                **fields)
+    user.set_password('Usha01012000')
+    db.session.add(user)
+    return user
+
+def make_books(count, copies=1):
+    books = [Book(title=f'Book {number:05d}', author='Author', copies_total=copies, copies_available=copies)
+             for number in range(count)]
+    db.session.add_all(books)
+    return books
+
+def make_extension_requests(statuses, first=0):
+    """One extension request per status, each on its own student, book and loan, a day apart."""
+    books = make_books(len(statuses))
+    students = [make_user(f'PRN{first + number:04d}') for number in range(len(statuses))]
+    db.session.flush()
+    loans = [Loan(user_id=student.id, book_id=book.id, due_date=START + timedelta(days=14))
+             for student, book in zip(students, books)]
+    db.session.add_all(loans)
+    db.session.flush()
+    requests = [ExtensionRequest(loan_id=loan.id, requested_days=7, reason='Exams', status=status,
+                                 request_date=START + timedelta(days=first + number))
+                for number, (loan, status) in enumerate(zip(loans, statuses))]
+    db.session.add_all(requests)
+    db.session.commit()
+    return requests
+
+def log_in(client, user):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+
+@contextmanager
+def captured_templates(app):
+    """Yield a list that collects the context of every template rendered."""
+    contexts = []
+    def record(sender, template, context, **extra):
+        contexts.append(context)
+    with template_rendered.connected_to(record, app):
+        yield contexts
+
+@contextmanager
+def count_statements():
+    """Yield a list that collects every SQL statement the engine runs."""
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
@@ -0,0 +1,91 @@
+import io
+import sqlite3
+from sqlalchemy.exc import OperationalError
+from app import attendance
+from app.attendance import import_sessions, json_rows
+from app.extensions import db
+from app.models import LibrarySession, LibraryHours
+from tests.helpers import make_user, log_in
+
+def hours_of(student, period):
+    row = db.session.get(LibraryHours, (period, student.id), populate_existing=True)
+    return row.hours if row else 0.0
+
+def test_retried_batch_reports_each_row_error_once(app, monkeypatch):
+    student = make_user('PRN0001')
+    db.session.commit()
+    add_many = attendance.add_many
+    calls = []
+
+    def locked_once(sessions):
+        calls.append(sessions)
+        if len(calls) == 1:
+            raise OperationalError('INSERT', {}, sqlite3.OperationalError('database is locked'))
+        return add_many(sessions)
+    monkeypatch.setattr(attendance, 'add_many', locked_once)
+
+    created, errors = import_sessions(json_rows([
+        ['PRN0001', '2026-01-05', 2], ['PRN9999', '2026-01-05', 1], ['PRN0001', '2026-01-05', 3],
+    ]))
+
+    assert len(calls) == 2
+    assert created == 1
+    assert errors == [(2, 'Unknown PRN PRN9999'), (3, 'Session already recorded for this date')]
+    assert LibrarySession.query.count() == 1
+    assert hours_of(student, '2026-01') == hours_of(student, '2026') == 2.0
+
+def test_rows_are_validated_and_days_are_not_counted_twice(app):
+    student = make_user('PRN0001')
+    db.session.commit()
+    rows = [{'prn': 'PRN0001', 'date': '2026-01-05', 'hours': 2.5},
+            {'prn': 'PRN0001', 'date': '2026-02-01', 'hours': '1'},
+            {'prn': '', 'date': '2026-01-06', 'hours': 1},
+            {'prn': 'PRN0001', 'date': '05/01/2026', 'hours': 1},
+            {'prn': 'PRN0001', 'date': '2026-01-07', 'hours': 13},
+            'not a row']
+
+    assert import_sessions(json_rows(rows), batch_size=2) == (2, [
+        (3, 'Missing PRN'), (4, 'Date must be YYYY-MM-DD'), (5, 'Hours must be between 0 and 12'),
+        (6, 'Missing PRN'),
+    ])
+    created, errors = import_sessions(json_rows(rows[:1]))
+
+    assert (created, errors) == (0, [(1, 'Session already recorded for this date')])
+    assert (hours_of(student, '2026-01'), hours_of(student, '2026-02'), hours_of(student, '2026')) == (2.5, 1.0, 3.5)
+
+def test_upload_endpoint_takes_csv_or_json(app, client):
+    admin = make_user('ADM0001', role='admin')
+    make_user('PRN0001')
+    make_user('PRN0002')
+    db.session.commit()
+    log_in(client, admin)
+    register = io.BytesIO(b'prn,date,hours\nPRN0001,2026-01-05,2\nPRN0003,2026-01-05,2\n')
+
+    by_csv = client.post('/library-attendance/bulk', data={'csv_file': (register, 'register.csv')}).get_json()
+    by_json = client.post('/library-attendance/bulk', json={'rows': [['PRN0002', '2026-01-05', 4]]}).get_json()
+
+    assert (by_csv['created'], by_csv['errors']) == (1, [{'row': 3, 'error': 'Unknown PRN PRN0003'}])
+    assert (by_json['created'], by_json['errors']) == (1, [])
+    assert client.post('/library-attendance/bulk', json={'rows': 'PRN0002'}).status_code == 400
+
+def test_oversized_uploads_are_refused(app, client):
+    app.config['ATTENDANCE_IMPORT_MAX_BYTES'] = 10
+    admin = make_user('ADM0001', role='admin')
+    db.session.commit()
+    log_in(client, admin)
+
+    response = client.post('/library-attendance/bulk', json={'rows': [['PRN0001', '2026-01-05', 2]]})
+
+    assert response.status_code == 413
+
+def test_import_attendance_command(app, tmp_path):
+    make_user('PRN0001')
+    db.session.commit()
+    register = tmp_path / 'register.csv'
+    register.write_text('prn,date,hours\nPRN0001,2026-01-05,2\nPRN0001,2026-01-05,2\n')
+
+    result = app.test_cli_runner().invoke(args=['import-attendance', str(register)])
+
+    assert result.exit_code == 0, result.output
+    assert 'Session already recorded for this date' in result.output
+    assert LibrarySession.query.count() == 1
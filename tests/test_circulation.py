@@ -0,0 +1,76 @@
+from datetime import datetime
+from app import circulation
+from app.extensions import db
+from app.models import Loan
+from tests.helpers import make_user, make_books, log_in, captured_templates
+
+def lend(user, book, issued, due, returned=None):
+    loan = Loan(user_id=user.id, book_id=book.id, issue_date=issued, due_date=due, return_date=returned)
+    db.session.add(loan)
+    return loan
+
+def history():
+    """Two students on two courses; one loan back on time, one late, one still out."""
+    asha, bala = make_user('PRN0001', course='BSC IT'), make_user('PRN0002')
+    books = make_books(2)
+    db.session.flush()
+    lend(asha, books[0], datetime(2025, 3, 1), datetime(2025, 3, 15), datetime(2025, 3, 10))
+    lend(bala, books[0], datetime(2025, 3, 5), datetime(2025, 3, 19), datetime(2025, 3, 25))
+    out = lend(asha, books[1], datetime(2025, 4, 1), datetime(2025, 4, 15))
+    db.session.commit()
+    return books, out
+
+def summaries():
+    return (circulation.year_summary('2025'), circulation.course_summary('2025'),
+            [(book.id, rates) for book, rates in circulation.most_borrowed()])
+
+def test_refresh_counts_each_loan_and_return_once(app):
+    books, out = history()
+
+    assert circulation.refresh(lag_seconds=0) == (3, 2)
+    assert circulation.refresh(lag_seconds=0) == (0, 0)
+    assert circulation.year_summary('2025') == {'loans': 3, 'returned': 2, 'on_time_rate': 0.5, 'average_days': 14.5}
+
+    out.return_date = datetime.utcnow()
+    db.session.commit()
+
+    assert circulation.refresh(lag_seconds=0) == (0, 1)
+    courses = {course: (rates['loans'], rates['returned'], rates['on_time_rate'])
+               for course, rates in circulation.course_summary('2025')}
+    assert courses == {'BSC IT': (2, 2, 0.5), 'Unassigned': (1, 1, 0.0)}
+    assert [(book.id, rates['loans']) for book, rates in circulation.most_borrowed()] == [(books[0].id, 2),
+                                                                                         (books[1].id, 1)]
+    incremental = summaries()
+    assert circulation.refresh(full=True, lag_seconds=0) == (3, 3)
+    assert summaries() == incremental
+
+def test_recent_returns_wait_for_the_lag(app):
+    _, out = history()
+    circulation.refresh(lag_seconds=0)
+    out.return_date = datetime.utcnow()
+    db.session.commit()
+
+    assert circulation.refresh(lag_seconds=3600) == (0, 0)
+    assert circulation.refresh(lag_seconds=0) == (0, 1)
+
+def test_report_page_reads_the_summaries_until_refreshed(app, client):
+    admin = make_user('ADM0001', role='admin')
+    history()
+    log_in(client, admin)
+
+    with captured_templates(app) as rendered:
+        client.get('/reports/')
+        client.post('/reports/refresh', data={'year': '2025'})
+        client.get('/reports/?year=2025')
+
+    assert rendered[0]['summary']['loans'] == 0
+    assert rendered[1]['summary']['loans'] == 3
+    assert rendered[1]['years'] == ['2025']
+
+def test_refresh_reports_command(app):
+    history()
+
+    result = app.test_cli_runner().invoke(args=['refresh-reports', '--full'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Counted 3 loan(s) and 2 return(s).' in result.output
@@ -0,0 +1,34 @@
+from app.extensions import db
+from app.identity import identity_cache
+from app.models import Loan
+from tests.helpers import make_user, make_books, log_in, count_statements
+
+def render_dashboard_with(client, book_count):
+    admin = make_user('ADM0001', role='admin')
+    student = make_user('PRN0001')
+    db.session.flush()
+    books = make_books(book_count, copies=2)
+    db.session.flush()
+    db.session.add_all(Loan(user_id=student.id, book_id=book.id) for book in books)
+    db.session.commit()
+    log_in(client, admin)
+
+    # The first request loads the admin into the identity cache
+    assert client.get('/admin-dashboard').status_code == 200
+    with count_statements() as statements:
+        response = client.get('/admin-dashboard')
+    assert response.status_code == 200
+    return len(statements)
+
+def test_admin_dashboard_statement_count_does_not_grow_with_books(app, client):
+    # A page holding one book against a full page, so a query per row shows up
+    single = render_dashboard_with(client, 1)
+
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    identity_cache.clear()
+    full = render_dashboard_with(client, app.config['CATALOG_PER_PAGE'])
+
+    # Catalog page, its active-loan counts, the two loan lists, the totals and recent notices
+    assert single == full == 6
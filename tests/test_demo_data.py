@@ -0,0 +1,21 @@
+from app.extensions import db
+from app.models import Notice, NoticeDelivery, NoticeRecipient
+from tests.helpers import make_user
+
+def test_demo_data_reset_removes_notice_queue_and_inbox_rows(app, client):
+    admin = make_user('ADM0001', role='admin')
+    student = make_user('PRN0001')
+    db.session.flush()
+    broadcast = Notice(title='Broadcast', message='To everyone', created_by=admin.id, recipient_type='all')
+    targeted = Notice(title='Targeted', message='To one', created_by=admin.id, recipient_type='specific')
+    db.session.add_all([broadcast, targeted])
+    db.session.flush()
+    db.session.add(NoticeDelivery(notice_id=broadcast.id, total=1))
+    db.session.add(NoticeRecipient(notice_id=targeted.id, user_id=student.id))
+    db.session.commit()
+
+    assert client.get('/create-demo-data').status_code == 200
+
+    db.session.expire_all()
+    assert NoticeDelivery.query.count() == 0
+    assert NoticeRecipient.query.count() == 0
@@ -0,0 +1,29 @@
+import threading
+from datetime import datetime, timedelta
+from app.events import broker
+from app.extensions import db
+from app.models import Loan
+from tests.helpers import make_user, make_books, log_in
+
+def test_stream_sends_reminders_and_events_then_closes(app, client):
+    app.config.update(SSE_HEARTBEAT_SECONDS=0.1, SSE_MAX_STREAM_SECONDS=0.5)
+    student = make_user('PRN0001')
+    book, = make_books(1)
+    db.session.flush()
+    db.session.add(Loan(user_id=student.id, book_id=book.id, due_date=datetime.utcnow() + timedelta(days=1)))
+    db.session.commit()
+    student_id = student.id
+    log_in(client, student)
+    publisher = threading.Timer(0.2, broker.publish, (student_id, 'notice', {'id': 1, 'title': 'Exams'}))
+    publisher.start()
+
+    response = client.get('/events')
+    body = response.get_data(as_text=True)
+    publisher.join()
+
+    assert response.mimetype == 'text/event-stream'
+    assert body.startswith('retry: 10000\n\nevent: due_soon\n')
+    assert 'event: notice\ndata: {"id": 1, "title": "Exams"}\n\n' in body
+    assert ': keep-alive\n\n' in body
+    assert body.endswith('retry: 1000\n\n')
+    assert broker.connection_count() == 0
@@ -0,0 +1,27 @@
+from app.explain import main_queries, explain_query, is_full_scan, EXPECTED_SCANS
+from app.models import ExtensionRequest
+
+def plan(query):
+    return ' '.join(explain_query(query))
+
+def test_every_registered_query_can_be_explained(app):
+    for label, query in main_queries():
+        assert explain_query(query), label
+
+def test_only_expected_queries_scan_whole_tables(app):
+    scanning = {label for label, query in main_queries() if any(map(is_full_scan, explain_query(query)))}
+
+    assert scanning == EXPECTED_SCANS
+
+def test_extension_requests_of_a_loan_use_the_loan_index(app):
+    assert 'ix_extension_request_loan_id_archived_at (loan_id=? AND archived_at=?)' in \
+        plan(ExtensionRequest.current_for([1, 2]))
+    assert 'ix_extension_request_loan_id_archived_at (loan_id=?)' in plan(ExtensionRequest.pending_for(1))
+
+def test_db_explain_command_reports_every_query(app):
+    result = app.test_cli_runner().invoke(args=['db-explain', '--fail-on-scan'])
+
+    assert result.exit_code == 0, result.output
+    for label, _ in main_queries():
+        assert label in result.output
+    assert f'0 unexpected full table scan(s) found, {len(EXPECTED_SCANS)} expected.' in result.output
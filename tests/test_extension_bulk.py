@@ -0,0 +1,61 @@
+from app.extensions import db
+from app.models import Loan, ExtensionRequest
+from tests.helpers import make_user, log_in, count_statements, make_extension_requests
+
+def respond(client, **payload):
+    return client.post('/respond-extensions/bulk', json=payload)
+
+def test_approving_shifts_due_dates_and_reports_each_request(app, client):
+    admin = make_user('ADM0001', role='admin')
+    pending, answered, other = make_extension_requests(['pending', 'rejected', 'pending'])
+    log_in(client, admin)
+
+    response = respond(client, request_ids=[pending.id, answered.id, 999, pending.id], action='approve')
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [(result['id'], result['result']) for result in results] == \
+        [(pending.id, 'approved'), (answered.id, 'skipped'), (999, 'skipped')]
+    assert results[0]['due_date'] == '2026-01-22'
+    db.session.expire_all()
+    assert db.session.get(Loan, pending.loan_id).due_date.strftime('%Y-%m-%d') == '2026-01-22'
+    assert db.session.get(ExtensionRequest, pending.id).responded_by == admin.id
+    assert db.session.get(ExtensionRequest, other.id).status == 'pending'
+
+def test_statement_count_does_not_grow_with_the_batch(app, client):
+    admin = make_user('ADM0001', role='admin')
+    request_ids = [request.id for request in make_extension_requests(['pending'] * 12)]
+    log_in(client, admin)
+    client.get('/manage-extensions')
+
+    def approve(batch):
+        with count_statements() as statements:
+            assert respond(client, request_ids=batch, action='approve').status_code == 200
+        return len(statements)
+
+    # Read the requests, then one UPDATE for the requests and one executemany for the loans
+    assert approve(request_ids[:1]) == approve(request_ids[1:]) == 3
+
+def test_rejects_request_ids_that_are_not_a_list_of_integers(app, client):
+    admin = make_user('ADM0001', role='admin')
+    pending, = make_extension_requests(['pending'])
+    log_in(client, admin)
+
+    for request_ids in (str(pending.id), [True], [pending.id, str(pending.id)], [1.0], {'id': pending.id}, None):
+        response = respond(client, request_ids=request_ids, action='approve')
+        assert response.status_code == 400, request_ids
+        assert response.get_json()['error'] == 'request_ids must be a list of integers.'
+    assert client.post('/respond-extensions/bulk', json=[pending.id]).status_code == 400
+
+    db.session.expire_all()
+    assert db.session.get(ExtensionRequest, pending.id).status == 'pending'
+
+def test_rejections_need_a_reason(app, client):
+    admin = make_user('ADM0001', role='admin')
+    pending, = make_extension_requests(['pending'])
+    log_in(client, admin)
+
+    assert respond(client, request_ids=[pending.id], action='reject').status_code == 400
+    response = respond(client, request_ids=[pending.id], action='reject', admin_response='Too late')
+
+    assert response.get_json()['results'][0]['result'] == 'rejected'
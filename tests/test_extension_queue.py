@@ -0,0 +1,66 @@
+from app.extensions import db
+from tests.helpers import (make_user, log_in, captured_templates, count_statements,
+                           make_extension_requests, START)
+
+def ids(page):
+    return [item.id for item in page.items]
+
+def test_pending_queue_pages_oldest_first(app, client):
+    app.config['EXTENSIONS_PER_PAGE'] = 2
+    admin = make_user('ADM0001', role='admin')
+    requests = make_extension_requests(['pending', 'approved', 'pending', 'pending'])
+    log_in(client, admin)
+
+    with captured_templates(app) as rendered:
+        assert client.get('/manage-extensions').status_code == 200
+        cursor = rendered[0]['pending_requests'].next_cursor
+        assert client.get('/manage-extensions?pending_after=' + cursor).status_code == 200
+
+    assert rendered[0]['pending_total'] == 3
+    assert ids(rendered[0]['pending_requests']) == [requests[0].id, requests[2].id]
+    assert ids(rendered[1]['pending_requests']) == [requests[3].id]
+
+def test_history_filters_by_status_and_request_date(app, client):
+    admin = make_user('ADM0001', role='admin')
+    requests = make_extension_requests(['approved', 'rejected', 'approved', 'approved'])
+    requests[3].archived_at = START
+    db.session.commit()
+    log_in(client, admin)
+
+    with captured_templates(app) as rendered:
+        client.get('/manage-extensions?status=approved')
+        client.get('/manage-extensions?date_from=2026-01-02&date_to=2026-01-03')
+        client.get('/manage-extensions?status=approved&archived=1')
+
+    assert ids(rendered[0]['all_requests']) == [requests[2].id, requests[0].id]
+    assert ids(rendered[1]['all_requests']) == [requests[2].id, requests[1].id]
+    assert ids(rendered[2]['all_requests']) == [requests[3].id, requests[2].id, requests[0].id]
+
+def test_statement_count_does_not_grow_with_the_page(app, client):
+    admin = make_user('ADM0001', role='admin')
+    make_extension_requests(['pending', 'approved'])
+    log_in(client, admin)
+    client.get('/manage-extensions')
+
+    def render():
+        with count_statements() as statements:
+            assert client.get('/manage-extensions').status_code == 200
+        return len(statements)
+
+    small = render()
+    make_extension_requests(['pending', 'approved'] * 5, first=2)
+
+    # Pending page, pending total and history page, with loans, borrowers and books joined in
+    assert small == render() == 3
+
+def test_details_endpoint_describes_one_request(app, client):
+    admin = make_user('ADM0001', role='admin')
+    extension_request, = make_extension_requests(['pending'])
+    log_in(client, admin)
+
+    data = client.get(f'/extension-request/{extension_request.id}').get_json()
+
+    assert data['student'] == 'PRN0000'
+    assert data['book'] == 'Book 00000'
+    assert (data['due_date'], data['new_due_date']) == ('2026-01-15', '2026-01-22')
+    assert data['respond_url'].endswith(f'/respond-extension/{extension_request.id}')
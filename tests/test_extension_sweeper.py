@@ -0,0 +1,39 @@
+from datetime import timedelta
+from app import extension_requests
+from app.explain import explain_query
+from app.extensions import db
+from app.models import ExtensionRequest
+from tests.helpers import make_extension_requests, START
+
+def test_sweep_archives_only_expired_decisions(app):
+    expired, fresh, pending = make_extension_requests(['approved', 'rejected', 'pending'])
+    expired.status_expires_at = START
+    fresh.status_expires_at = START + timedelta(days=2)
+    db.session.commit()
+    now = START + timedelta(days=1)
+
+    assert extension_requests.sweep_expired(now) == 1
+    db.session.commit()
+    assert extension_requests.sweep_expired(now) == 0
+
+    db.session.expire_all()
+    assert expired.archived_at == now
+    assert fresh.archived_at is None and pending.archived_at is None
+    assert ExtensionRequest.current(now).order_by(ExtensionRequest.id).all() == [fresh, pending]
+    assert ExtensionRequest.history().order_by(ExtensionRequest.id).all() == [fresh, pending]
+    assert ExtensionRequest.history(archived=True).count() == 3
+
+def test_sweep_reads_the_expiry_index(app):
+    plan = ' '.join(explain_query(extension_requests.archive_expired(START)))
+
+    assert 'ix_extension_request_archived_at_status_expires_at' in plan
+
+def test_sweep_command_reports_the_count(app):
+    decided, = make_extension_requests(['rejected'])
+    decided.status_expires_at = START
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['sweep-extensions'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Archived 1 expired extension request(s).' in result.output
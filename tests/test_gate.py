@@ -0,0 +1,104 @@
+import fcntl
+from datetime import datetime
+import pytest
+from app.extensions import db
+from app.gate import GateRecorder, GateBusy, GateError, gate_recorder
+from app.models import User, LibrarySession, LibraryHours
+from tests.helpers import make_user
+
+AT = datetime(2026, 1, 15, 9, 0)
+
+def recorder_for(app, **config):
+    app.config.update(config)
+    recorder = GateRecorder()
+    recorder.init_app(app)
+    return recorder
+
+def test_scans_toggle_sessions_and_are_written_in_one_batch(app):
+    recorder = recorder_for(app)
+    student = make_user('PRN0001')
+    db.session.commit()
+
+    assert recorder.scan('PRN0001', AT)['action'] == 'check_in'
+    assert recorder.occupancy() == 1
+    assert recorder.scan('PRN0001', AT.replace(hour=11))['hours'] == 2.0
+    with pytest.raises(GateError):
+        recorder.scan('PRN9999', AT)
+
+    assert recorder.flush() == 2
+    session = LibrarySession.query.one()
+    assert (session.user_id, session.check_out, session.duration_hours) == (student.id, AT.replace(hour=11), 2.0)
+    assert db.session.get(LibraryHours, ('2026-01', student.id)).hours == 2.0
+    assert recorder.occupancy() == 0
+
+def test_student_cache_is_bounded_and_forgets_edited_students(app):
+    recorder = recorder_for(app, GATE_STUDENT_CACHE_SIZE=2)
+    students = [make_user(f'PRN000{number}', name=f'Student {number}') for number in range(3)]
+    db.session.commit()
+
+    for student in students:
+        recorder.scan(student.prn_number, AT)
+    assert recorder.stats()['cached_students'] == 2
+
+    students[2].name = 'Renamed'
+    db.session.commit()
+    assert recorder.scan('PRN0002', AT.replace(hour=10))['name'] == 'Student 2'
+    recorder.forget(students[2].id)
+    assert recorder.scan('PRN0002', AT.replace(hour=11))['name'] == 'Renamed'
+
+def test_expired_cache_entries_are_read_again(app):
+    recorder = recorder_for(app, GATE_STUDENT_CACHE_TTL=0)
+    student = make_user('PRN0001', name='Before')
+    db.session.commit()
+    recorder.scan('PRN0001', AT)
+
+    student.name = 'After'
+    db.session.commit()
+
+    assert recorder.scan('PRN0001', AT.replace(hour=10))['name'] == 'After'
+
+def test_reset_drops_open_sessions_and_cached_ids(app):
+    recorder = recorder_for(app)
+    make_user('PRN0001')
+    db.session.commit()
+    recorder.scan('PRN0001', AT)
+
+    # As the demo data reset does: every user replaced, ids reused by other students
+    User.query.delete()
+    db.session.commit()
+    make_user('PRN0002')
+    replacement = make_user('PRN0001')
+    db.session.commit()
+    recorder.reset()
+
+    assert recorder.occupancy() == 0
+    assert recorder.scan('PRN0001', AT.replace(hour=10))['action'] == 'check_in'
+    recorder.flush()
+    assert LibrarySession.query.one().user_id == replacement.id
+
+def test_deleted_students_leave_the_index(app):
+    recorder = recorder_for(app)
+    student = make_user('PRN0001')
+    db.session.commit()
+    recorder.scan('PRN0001', AT)
+
+    recorder.forget(student.id, deleted=True)
+
+    assert recorder.occupancy() == 0
+    assert recorder.flush() == 0
+
+def test_a_second_process_is_refused(app, client, monkeypatch):
+    recorder = recorder_for(app, GATE_API_TOKEN='secret')
+    make_user('PRN0001')
+    db.session.commit()
+    # The app's recorder may hold an earlier test's lock file
+    monkeypatch.setattr(gate_recorder, '_lock_file', None)
+
+    with open(app.config['GATE_LOCK_FILE'], 'a') as other_process:
+        fcntl.flock(other_process, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        with pytest.raises(GateBusy):
+            recorder.scan('PRN0001', AT)
+        response = client.get('/api/gate/occupancy', headers={'X-Gate-Token': 'secret'})
+
+    assert response.status_code == 503
+    assert recorder.scan('PRN0001', AT)['action'] == 'check_in'
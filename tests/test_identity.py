@@ -0,0 +1,35 @@
+from sqlalchemy import event
+from app.extensions import db
+from app.identity import UserSnapshot, identity_cache
+from tests.helpers import make_user
+
+def test_unread_notice_count_is_queried_once_per_request(app):
+    student = make_user('PRN0001', unread_notice_count=3)
+    db.session.commit()
+    snapshot = UserSnapshot(student)
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        # Each request runs in its own app context, and so gets its own g
+        with app.app_context(), app.test_request_context():
+            assert snapshot.unread_notice_count == 3
+            assert snapshot.unread_notice_count == 3
+        with app.app_context(), app.test_request_context():
+            assert snapshot.unread_notice_count == 3
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert len(statements) == 2
+
+def test_demo_data_reset_clears_cached_identities(app, client):
+    student = make_user('PRN0001')
+    db.session.commit()
+    assert identity_cache.get(student.id) is not None
+    assert identity_cache.stats()['size'] == 1
+
+    assert client.get('/create-demo-data').status_code == 200
+
+    assert identity_cache.stats()['size'] == 0
@@ -0,0 +1,56 @@
+from datetime import datetime
+import pytest
+from app import loans
+from app.explain import explain_query
+from app.extensions import db
+from app.models import Loan, LoanRollup
+from tests.helpers import make_user, make_books, log_in, captured_templates
+
+def rollups():
+    return {(row.period, row.user_id): row.loans_count for row in LoanRollup.query}
+
+def test_borrowing_counts_the_loan_in_this_months_rollup(app):
+    first, second = make_user('PRN0001'), make_user('PRN0002')
+    books = make_books(3)
+    db.session.commit()
+    period = LoanRollup.period_of(datetime.utcnow())
+
+    for user, book in ((first, books[0]), (first, books[1]), (second, books[2])):
+        loans.borrow_book(user.id, book.id)
+    with pytest.raises(loans.LoanError):
+        loans.borrow_book(first.id, books[2].id)
+
+    assert rollups() == {(period, first.id): 2, (period, second.id): 1}
+
+def test_backfill_rebuilds_the_rollups_from_history(app):
+    student = make_user('PRN0001')
+    books = make_books(3)
+    db.session.flush()
+    db.session.add_all(Loan(user_id=student.id, book_id=book.id, issue_date=issued)
+                       for book, issued in zip(books, (datetime(2025, 11, 3), datetime(2025, 11, 30),
+                                                       datetime(2025, 12, 1))))
+    db.session.add(LoanRollup(period='2025-10', user_id=student.id, loans_count=9))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['backfill-loan-rollups'])
+
+    assert 'Rebuilt 2 loan rollup row(s).' in result.output
+    assert rollups() == {('2025-11', student.id): 2, ('2025-12', student.id): 1}
+
+def test_user_activity_reads_only_this_months_rollup(app, client):
+    admin = make_user('ADM0001', role='admin')
+    first, second = make_user('PRN0001', name='Asha'), make_user('PRN0002', name='Bala')
+    db.session.flush()
+    period = LoanRollup.period_of(datetime.utcnow())
+    db.session.add_all([LoanRollup(period=period, user_id=first.id, loans_count=1),
+                        LoanRollup(period=period, user_id=second.id, loans_count=3),
+                        LoanRollup(period='2000-01', user_id=first.id, loans_count=7)])
+    db.session.commit()
+    log_in(client, admin)
+
+    with captured_templates(app) as rendered:
+        assert client.get('/user-activity').status_code == 200
+
+    assert [tuple(row) for row in rendered[0]['monthly_loans']] == [(second.id, 'Bala', 3), (first.id, 'Asha', 1)]
+    plan = ' '.join(explain_query(LoanRollup.top_borrowers(period)))
+    assert 'SEARCH loan_rollup USING' in plan
@@ -0,0 +1,101 @@
+import random
+import threading
+from sqlalchemy import func
+from app import loans
+from app.extensions import db
+from app.models import Book, Loan
+from tests.helpers import make_user, make_books
+
+def run_concurrently(app, jobs):
+    """Run each job in its own thread and app context, all released at once."""
+    start = threading.Barrier(len(jobs))
+    errors = []
+
+    def worker(job):
+        with app.app_context():
+            start.wait()
+            try:
+                job()
+            except Exception as e:  # surfaced by the assertion below
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(job,)) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+def try_borrow(user_id, book_id, outcomes):
+    def job():
+        try:
+            loans.borrow_book(user_id, book_id)
+            outcomes.append('borrowed')
+        except loans.LoanError:
+            outcomes.append('refused')
+    return job
+
+def assert_invariants():
+    db.session.expire_all()
+    for book in Book.query.all():
+        active = Loan.query.filter_by(book_id=book.id, return_date=None).count()
+        assert book.copies_available >= 0
+        assert book.copies_available == book.copies_total - active
+    most_active = db.session.query(func.count(Loan.id)).filter(
+        Loan.return_date.is_(None)).group_by(Loan.user_id).order_by(func.count(Loan.id).desc()).first()
+    assert most_active is None or most_active[0] <= loans.MAX_ACTIVE_LOANS
+
+def test_last_copies_go_to_exactly_as_many_borrowers(app):
+    students = [make_user(f'PRN{number:04d}') for number in range(12)]
+    book, = make_books(1, copies=3)
+    db.session.commit()
+
+    outcomes = []
+    run_concurrently(app, [try_borrow(student.id, book.id, outcomes) for student in students])
+
+    assert outcomes.count('borrowed') == 3
+    assert outcomes.count('refused') == 9
+    db.session.refresh(book)
+    assert book.copies_available == 0
+    assert_invariants()
+
+def test_active_loan_limit_holds_under_concurrent_borrows(app):
+    student = make_user('PRN0001')
+    books = make_books(6, copies=1)
+    db.session.commit()
+
+    outcomes = []
+    run_concurrently(app, [try_borrow(student.id, book.id, outcomes) for book in books])
+
+    assert outcomes.count('borrowed') == loans.MAX_ACTIVE_LOANS
+    assert Loan.query.filter_by(user_id=student.id, return_date=None).count() == loans.MAX_ACTIVE_LOANS
+    assert_invariants()
+
+def test_invariants_hold_under_mixed_borrows_and_returns(app):
+    students = [make_user(f'PRN{number:04d}') for number in range(8)]
+    books = make_books(4, copies=2)
+    db.session.commit()
+    student_ids = [student.id for student in students]
+    book_ids = [book.id for book in books]
+
+    def churn(seed):
+        chooser = random.Random(seed)
+        def job():
+            for _ in range(15):
+                user_id = chooser.choice(student_ids)
+                open_loans = [loan_id for loan_id, in db.session.query(Loan.id).filter_by(
+                    user_id=user_id, return_date=None)]
+                db.session.rollback()
+                try:
+                    if open_loans and chooser.random() < 0.5:
+                        loans.return_loan(chooser.choice(open_loans))
+                    else:
+                        loans.borrow_book(user_id, chooser.choice(book_ids))
+                except loans.LoanError:
+                    pass
+        return job
+
+    run_concurrently(app, [churn(seed) for seed in range(8)])
+    assert_invariants()
@@ -0,0 +1,59 @@
+from datetime import datetime
+from app import library_hours
+from app.extensions import db
+from tests.helpers import make_user, log_in, captured_templates, count_statements
+
+def add_students(count, first=0):
+    students = [make_user(f'PRN{number:04d}', name=f'Student {number}') for number in range(first, first + count)]
+    db.session.flush()
+    library_hours.add_many((student.id, datetime.utcnow(), 1.5) for student in students)
+    db.session.commit()
+    return students
+
+def test_students_are_paged_with_their_hours(app, client):
+    app.config['USERS_PER_PAGE'] = 2
+    admin = make_user('ADM0001', role='admin')
+    students = add_students(3)
+    log_in(client, admin)
+
+    with captured_templates(app) as rendered:
+        first = client.get('/manage-students')
+        client.get('/manage-students?after=' + rendered[0]['students'].next_cursor)
+
+    assert [student.id for student in rendered[0]['students'].items] == [students[0].id, students[1].id]
+    assert [student.id for student in rendered[1]['students'].items] == [students[2].id]
+    assert rendered[0]['hours'] == {students[0].id: (1.5, 1.5), students[1].id: (1.5, 1.5)}
+    assert f'after={rendered[0]["students"].next_cursor}'.encode() in first.data
+
+def test_search_matches_name_or_prn_prefixes_and_keeps_the_query_when_paging(app, client):
+    app.config['USERS_PER_PAGE'] = 1
+    admin = make_user('ADM0001', role='admin')
+    add_students(3)
+    make_user('PRN0100', name='Asha Rao')
+    db.session.commit()
+    log_in(client, admin)
+
+    with captured_templates(app) as rendered:
+        response = client.get('/manage-students?q=prn000')
+        client.get('/manage-students?q=asha')
+
+    assert [student.prn_number for student in rendered[0]['students'].items] == ['PRN0000']
+    assert b'q=prn000' in response.data and b'after=' in response.data
+    assert [student.prn_number for student in rendered[1]['students'].items] == ['PRN0100']
+
+def test_statement_count_does_not_grow_with_the_page(app, client):
+    admin = make_user('ADM0001', role='admin')
+    add_students(1)
+    log_in(client, admin)
+    client.get('/manage-students')
+
+    def render():
+        with count_statements() as statements:
+            assert client.get('/manage-students').status_code == 200
+        return len(statements)
+
+    small = render()
+    add_students(app.config['USERS_PER_PAGE'] - 1, first=1)
+
+    # Students page and their library hours
+    assert small == render() == 2
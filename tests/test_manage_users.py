@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import Loan
+from tests.helpers import make_user, make_books, log_in, captured_templates, count_statements
+
+def lend(student, books, returned=()):
+    now = datetime.utcnow()
+    db.session.add_all(Loan(user_id=student.id, book_id=book.id, due_date=now + timedelta(days=len(books) - number),
+                            return_date=now if number in returned else None)
+                       for number, book in enumerate(books))
+
+def test_users_are_paged_with_their_active_loan_counts(app, client):
+    app.config['USERS_PER_PAGE'] = 2
+    admin = make_user('ADM0001', role='admin')
+    first, second, third = make_user('PRN0001'), make_user('PRN0002'), make_user('PRN0003')
+    books = make_books(4)
+    db.session.flush()
+    lend(first, books[:3], returned=(0,))
+    lend(third, books[3:])
+    db.session.commit()
+    log_in(client, admin)
+
+    with captured_templates(app) as rendered:
+        client.get('/manage-users')
+        client.get('/manage-users?after=' + rendered[0]['users'].next_cursor)
+        client.get('/manage-users?search=PRN000')
+
+    assert [user.id for user in rendered[0]['users'].items] == [admin.id, first.id]
+    assert [user.id for user in rendered[1]['users'].items] == [second.id, third.id]
+    assert rendered[0]['active_loan_counts'] == {first.id: 2}
+    assert rendered[1]['active_loan_counts'] == {third.id: 1}
+    assert rendered[0]['total_users'] == 4
+    assert rendered[2]['total_users'] == 3
+
+def test_statement_count_does_not_grow_with_the_page(app, client):
+    admin = make_user('ADM0001', role='admin')
+    db.session.commit()
+    log_in(client, admin)
+    client.get('/manage-users')
+
+    def render():
+        with count_statements() as statements:
+            assert client.get('/manage-users').status_code == 200
+        return len(statements)
+
+    alone = render()
+    books = make_books(app.config['USERS_PER_PAGE'])
+    students = [make_user(f'PRN{number:04d}') for number in range(len(books))]
+    db.session.flush()
+    for student, book in zip(students, books):
+        lend(student, [book])
+    db.session.commit()
+
+    # Users page, total and the grouped active-loan counts
+    assert render() == alone == 3
+
+def test_user_details_fragment_lists_active_loans_by_due_date(app, client):
+    admin = make_user('ADM0001', role='admin')
+    student = make_user('PRN0001', name='Asha Rao')
+    books = make_books(3)
+    db.session.flush()
+    lend(student, books, returned=(1,))
+    db.session.commit()
+    log_in(client, admin)
+
+    page = client.get(f'/manage-users/{student.id}/details').get_data(as_text=True)
+
+    assert 'Asha Rao' in page
+    assert 'Book 00001' not in page
+    assert page.index('Book 00002') < page.index('Book 00000')
+
+def test_user_details_are_admin_only(app, client):
+    student = make_user('PRN0001')
+    db.session.commit()
+    log_in(client, student)
+
+    assert client.get(f'/manage-users/{student.id}/details').status_code == 403
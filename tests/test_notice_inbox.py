@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
+from app import notices
+from app.explain import explain_query
+from app.extensions import db
+from app.models import Notice, NoticeRecipient
+from tests.helpers import make_user, log_in, captured_templates
+
+def send(admin, title, user_ids, created_date=None):
+    notice = Notice(title=title, message=title, created_by=admin.id, recipient_type='specific',
+                    created_date=created_date or datetime.utcnow())
+    db.session.add(notice)
+    notices.deliver_notice(notice, user_ids)
+    db.session.commit()
+    return notice
+
+def test_targeted_notices_reach_only_their_recipients(app):
+    admin = make_user('ADM0001', role='admin')
+    first, second, other = make_user('PRN0001'), make_user('PRN0002'), make_user('PRN0003')
+    db.session.commit()
+
+    notice = send(admin, 'Fine reminder', [first.id, second.id, second.id])
+
+    assert notice.recipient_count == 2
+    assert {link.user_id for link in NoticeRecipient.query} == {first.id, second.id}
+    assert Notice.inbox_for(first.id).all() == [notice]
+    assert Notice.inbox_for(other.id).all() == []
+
+def test_inbox_is_newest_first_without_sorting(app):
+    admin = make_user('ADM0001', role='admin')
+    student = make_user('PRN0001')
+    db.session.commit()
+    start = datetime(2026, 1, 1)
+    sent = [send(admin, f'Notice {number}', [student.id], start + timedelta(days=number)) for number in range(4)]
+
+    assert Notice.inbox_for(student.id).limit(3).all() == sent[:0:-1]
+    plan = explain_query(Notice.inbox_for(student.id).options(joinedload(Notice.creator)).limit(5))
+    assert 'ix_notice_recipient_user_id_notice_id' in plan[0]
+    assert not any('TEMP B-TREE' in detail for detail in plan)
+
+def test_student_dashboard_shows_the_five_latest_notices(app, client):
+    admin = make_user('ADM0001', role='admin')
+    student = make_user('PRN0001')
+    db.session.commit()
+    sent = [send(admin, f'Notice {number}', [student.id]) for number in range(7)]
+    log_in(client, student)
+
+    with captured_templates(app) as rendered:
+        assert client.get('/student-dashboard').status_code == 200
+
+    assert [notice.id for notice in rendered[0]['recent_notices']] == [notice.id for notice in sent[:1:-1]]
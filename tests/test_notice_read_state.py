@@ -0,0 +1,66 @@
+from app import notices
+from app.extensions import db
+from app.models import User, Notice, NoticeRecipient
+from tests.helpers import make_user, log_in
+
+def broadcast(admin, title):
+    notice = Notice(title=title, message=title, created_by=admin.id, recipient_type='student')
+    db.session.add(notice)
+    notices.deliver_notice(notice)
+    db.session.commit()
+    return notice
+
+def unread_count(user):
+    return db.session.get(User, user.id, populate_existing=True).unread_notice_count
+
+def test_broadcasts_count_as_unread_until_the_board_is_opened(app, client):
+    admin = make_user('ADM0001', role='admin')
+    student = make_user('PRN0001')
+    db.session.commit()
+    first, second = broadcast(admin, 'Holiday'), broadcast(admin, 'Exams')
+    assert notices.process_deliveries(batch_size=10, stale_after=60) == 2
+    assert unread_count(student) == 2
+    log_in(client, student)
+
+    assert client.get('/notices/unread-count').get_json()['unread'] == 2
+    assert client.get('/notices').status_code == 200
+
+    assert unread_count(student) == 0
+    assert notices.unread_ids(student.id, [first.id, second.id]) == set()
+    assert notices.mark_read(student.id, [first.id]) == 0
+    assert unread_count(student) == 0
+
+def test_students_added_later_see_earlier_broadcasts_as_read(app, client):
+    admin = make_user('ADM0001', role='admin')
+    make_user('PRN0001')
+    db.session.commit()
+    notice = broadcast(admin, 'Library timings')
+    notices.process_deliveries(batch_size=10, stale_after=60)
+    log_in(client, admin)
+
+    response = client.post('/add-student', data={
+        'prn_number': 'PRN0002', 'name': 'Late Student', 'email': 'prn0002@college.edu',
+        'mother_name': 'Usha', 'dob': '01012000', 'year': '1st', 'course': 'BSC IT'
+    })
+
+    assert response.status_code == 302
+    late = User.query.filter_by(prn_number='PRN0002').one()
+    assert Notice.inbox_for(late.id).all() == [notice]
+    assert unread_count(late) == 0
+
+def test_queued_broadcast_skips_students_it_was_backfilled_for(app):
+    admin = make_user('ADM0001', role='admin')
+    student = make_user('PRN0001')
+    db.session.commit()
+    notice = broadcast(admin, 'Fee deadline')
+    late = make_user('PRN0002')
+    db.session.flush()
+    assert notices.backfill_broadcasts([late.id]) == 1
+    db.session.commit()
+
+    notices.process_deliveries(batch_size=10, stale_after=60)
+
+    assert NoticeRecipient.query.filter_by(notice_id=notice.id).count() == 2
+    assert unread_count(student) == 1
+    assert unread_count(late) == 0
+    assert db.session.get(Notice, notice.id, populate_existing=True).recipient_count == 1
@@ -0,0 +1,76 @@
+from datetime import date, datetime
+from app.extensions import db
+from app.models import User, LibrarySession
+from app.occupancy import OccupancyCache
+from tests.helpers import make_user, log_in
+
+DAY = date(2026, 1, 5)
+NOW = datetime(2026, 1, 10, 12, 0)
+
+def add_sessions(*intervals):
+    student = User.query.filter_by(prn_number='PRN0001').first() or make_user('PRN0001')
+    db.session.flush()
+    for check_in, check_out in intervals:
+        session = LibrarySession(user_id=student.id, check_in=check_in, check_out=check_out)
+        session.calculate_duration()
+        db.session.add(session)
+    db.session.commit()
+
+def cache_for(app, **config):
+    app.config.update(config)
+    cache = OccupancyCache()
+    cache.init_app(app)
+    return cache
+
+def test_overlapping_sessions_add_up_minute_by_minute(app):
+    cache = cache_for(app, LIBRARY_SEATS=2, LIBRARY_OPENING_HOURS=(8, 20))
+    add_sessions((datetime(2026, 1, 4, 23, 0), datetime(2026, 1, 5, 1, 0)),
+                 (datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 11, 0)),
+                 (datetime(2026, 1, 5, 10, 0), datetime(2026, 1, 5, 12, 30)))
+
+    day, = cache.days(DAY, DAY, NOW)
+
+    assert day['hourly_mean'][:13] == [1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 2, 1, 0.5]
+    assert day['hourly_peak'][10] == 2
+    assert (day['peak'], day['peak_at'], day['peak_hour']) == (2, '10:00', 10)
+    assert day['seat_hours'] == 5.5
+    assert day['utilization'] == round(4.5 / 12 / 2, 4)
+
+def test_open_sessions_stop_at_the_end_of_their_day(app):
+    cache = cache_for(app)
+    add_sessions((datetime(2026, 1, 6, 19, 0), None))
+
+    first, second = cache.days(date(2026, 1, 6), date(2026, 1, 7), NOW)
+    today, = cache.days(NOW.date(), NOW.date(), NOW.replace(hour=18))
+
+    assert (first['seat_hours'], second['seat_hours'], today['seat_hours']) == (5.0, 0.0, 0.0)
+    assert second['peak_at'] is None
+
+def test_past_days_are_cached_until_their_sessions_change(app):
+    cache = cache_for(app)
+    add_sessions((datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 10, 0)))
+    cache.days(DAY, DAY, NOW)
+
+    assert cache.days(DAY, DAY, NOW)[0]['seat_hours'] == 1.0
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+    # A late register upload for the day before runs over midnight into it
+    add_sessions((datetime(2026, 1, 4, 23, 0), datetime(2026, 1, 5, 2, 0)))
+
+    assert cache.days(DAY, DAY, NOW)[0]['seat_hours'] == 3.0
+    assert cache.stats()['misses'] == 2
+
+def test_report_endpoint_returns_peaks_as_json(app, client):
+    admin = make_user('ADM0001', role='admin')
+    add_sessions((datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 11, 0)))
+    log_in(client, admin)
+
+    report = client.get('/admin/occupancy?start=2026-01-04&end=2026-01-06&format=json').get_json()
+    reversed_range = client.get('/admin/occupancy?start=2026-01-06&end=2026-01-04&format=json')
+
+    assert [day['date'] for day in report['days']] == ['2026-01-04', '2026-01-05', '2026-01-06']
+    assert report['peak_hours'] == [9, 10]
+    assert report['busiest_day']['date'] == '2026-01-05'
+    assert report['seat_hours'] == 2.0
+    assert reversed_range.status_code == 400
+    assert client.get('/admin/occupancy').status_code == 200
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from app.explain import explain_query
+from app.extensions import db
+from app.models import Loan
+from tests.helpers import make_user, make_books, log_in, captured_templates
+
+def make_loans(student, *due_offsets, returned=()):
+    books = make_books(len(due_offsets))
+    db.session.flush()
+    now = datetime.utcnow()
+    loans = [Loan(user_id=student.id, book_id=book.id, due_date=now + timedelta(days=offset),
+                  return_date=now if index in returned else None)
+             for index, (book, offset) in enumerate(zip(books, due_offsets))]
+    db.session.add_all(loans)
+    db.session.commit()
+    return loans
+
+def test_overdue_selects_only_active_loans_past_due(app):
+    student = make_user('PRN0001')
+    late, returned_late, not_due = make_loans(student, -3, -5, 4, returned=(1,))
+
+    assert Loan.overdue().all() == [late]
+    assert late.is_overdue and not returned_late.is_overdue and not not_due.is_overdue
+
+def test_overdue_query_reads_the_return_date_due_date_index(app):
+    plan = ' '.join(explain_query(Loan.overdue().order_by(Loan.due_date, Loan.id)))
+
+    assert 'ix_loan_return_date_due_date' in plan
+    assert 'TEMP B-TREE' not in plan
+
+def test_admin_dashboard_pages_overdue_loans_oldest_first(app, client):
+    app.config['LOANS_PER_PAGE'] = 2
+    admin = make_user('ADM0001', role='admin')
+    student = make_user('PRN0001')
+    loans = make_loans(student, -2, -1, 3, -4, -6, returned=(3,))
+    log_in(client, admin)
+
+    with captured_templates(app) as rendered:
+        first = client.get('/admin-dashboard')
+        second = client.get('/admin-dashboard?overdue_after=' + rendered[0]['overdue_loans'].next_cursor)
+
+    assert first.status_code == second.status_code == 200
+    assert rendered[0]['overdue_total'] == 3
+    assert rendered[0]['active_loan_total'] == 4
+    assert [loan.id for loan in rendered[0]['overdue_loans'].items] == [loans[4].id, loans[0].id]
+    assert [loan.id for loan in rendered[1]['overdue_loans'].items] == [loans[1].id]
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import Book, Loan
+from app.pagination import keyset_paginate, encode_cursor, decode_cursor
+from tests.helpers import make_user, make_books, log_in
+
+def catalog(**kwargs):
+    return keyset_paginate(Book.query, (Book.title, Book.id), **kwargs)
+
+def ids(page):
+    return [item.id for item in page.items]
+
+def test_walks_forward_and_back_over_duplicate_keys(app):
+    # Same titles, so pages must break ties on id
+    books = [Book(title=f'Title {number % 3}', author='Author') for number in range(10)]
+    db.session.add_all(books)
+    db.session.commit()
+    expected = [book.id for book in sorted(books, key=lambda book: (book.title, book.id))]
+
+    pages = [catalog(per_page=4)]
+    while pages[-1].has_next:
+        pages.append(catalog(after=pages[-1].next_cursor, per_page=4))
+
+    assert [ids(page) for page in pages] == [expected[0:4], expected[4:8], expected[8:10]]
+    assert not pages[0].has_prev
+    assert pages[-1].has_prev
+
+    back = catalog(before=pages[-1].prev_cursor, per_page=4)
+    assert ids(back) == expected[4:8]
+    assert back.has_prev and back.has_next
+    assert ids(catalog(before=back.prev_cursor, per_page=4)) == expected[0:4]
+
+def test_descending_order_with_datetime_keys(app):
+    student = make_user('PRN0001')
+    books = make_books(5)
+    db.session.flush()
+    start = datetime(2026, 1, 1)
+    loans = [Loan(user_id=student.id, book_id=book.id, due_date=start + timedelta(days=number))
+             for number, book in enumerate(books)]
+    db.session.add_all(loans)
+    db.session.commit()
+    columns = (Loan.due_date, Loan.id)
+
+    first = keyset_paginate(Loan.query, columns, per_page=2, descending=True)
+    second = keyset_paginate(Loan.query, columns, after=first.next_cursor, per_page=2, descending=True)
+
+    assert ids(first) == [loans[4].id, loans[3].id]
+    assert ids(second) == [loans[2].id, loans[1].id]
+    assert decode_cursor(first.next_cursor) == [loans[3].due_date, loans[3].id]
+
+def test_malformed_cursors_fall_back_to_the_first_page(app):
+    make_books(3)
+    db.session.commit()
+    first = ids(catalog(per_page=2))
+
+    for cursor in ('not-a-cursor', encode_cursor(['only one value']), encode_cursor([])):
+        assert ids(catalog(after=cursor, per_page=2)) == first
+    assert decode_cursor('!!!') is None
+
+def test_dashboard_catalog_links_to_the_next_page(app, client):
+    make_books(30)
+    student = make_user('PRN0001')
+    db.session.commit()
+    log_in(client, student)
+
+    page = catalog(per_page=app.config['CATALOG_PER_PAGE'])
+    response = client.get('/student-dashboard')
+
+    assert response.status_code == 200
+    assert f'after={page.next_cursor}'.encode() in response.data
+    response = client.get(f'/student-dashboard?after={page.next_cursor}')
+    assert b'Book 00029' in response.data
+    assert b'Book 00000' not in response.data
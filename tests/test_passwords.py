@@ -0,0 +1,35 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from app.passwords import PasswordHasher, normalize_method, hash_method
+
+def hasher_for(app, method):
+    app.config['PASSWORD_HASH_METHOD'] = method
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    return hasher
+
+@pytest.mark.parametrize('method', ['scrypt', 'pbkdf2:sha256', 'pbkdf2:sha256:1000'])
+def test_fresh_hash_does_not_need_rehash(app, method):
+    hasher = hasher_for(app, method)
+
+    password_hash = hasher.hash('Usha01012000')
+
+    assert hasher.verify(password_hash, 'Usha01012000')
+    assert not hasher.needs_rehash(password_hash)
+
+def test_hash_made_with_other_parameters_needs_rehash(app):
+    hasher = hasher_for(app, 'pbkdf2:sha256:1000')
+
+    assert hasher.needs_rehash(generate_password_hash('Usha01012000', 'pbkdf2:sha256:2000'))
+
+@pytest.mark.parametrize('method', ['scrypt', 'scrypt:16384:8:2', 'pbkdf2', 'pbkdf2:sha512',
+                                    'pbkdf2:sha256:1000'])
+def test_method_is_normalized_like_werkzeug_stores_it(method):
+    assert normalize_method(method) == hash_method(generate_password_hash('x', method))
+
+def test_init_app_does_not_hash(app, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('hashed at startup')
+    monkeypatch.setattr('app.passwords.generate_password_hash', fail)
+
+    assert hasher_for(app, 'scrypt').method == 'scrypt:32768:8:1'
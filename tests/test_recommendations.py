@@ -0,0 +1,88 @@
+import math
+from collections import Counter
+from itertools import permutations
+import numpy as np
+from app import recommendations
+from app.extensions import db
+from app.models import Loan, BookNeighbor
+from tests.helpers import make_user, make_books, log_in, captured_templates
+
+def borrow(student, *books):
+    db.session.add_all(Loan(user_id=student.id, book_id=book.id) for book in books)
+
+def shelf():
+    """Books A to D and three students: {A, B, C}, {A, B} and {A, C, D}."""
+    books = make_books(4)
+    students = [make_user(f'PRN000{number}') for number in range(3)]
+    db.session.flush()
+    a, b, c, d = books
+    borrow(students[0], a, b, c)
+    borrow(students[1], a, b)
+    borrow(students[2], a, c, d)
+    db.session.commit()
+    return books, students
+
+def neighbors():
+    return [(row.book_id, row.rank, row.neighbor_id, round(row.score, 6), row.together)
+            for row in BookNeighbor.query.order_by(BookNeighbor.book_id, BookNeighbor.rank)]
+
+def test_co_occurrence_matches_counting_pairs_basket_by_basket(monkeypatch):
+    random = np.random.default_rng(7)
+    baskets = [random.choice(40, size=random.integers(1, 12), replace=False) for _ in range(200)]
+    users = np.repeat(np.arange(len(baskets)), [len(basket) for basket in baskets])
+    books = np.concatenate(baskets)
+    expected = Counter(pair for basket in baskets for pair in permutations(basket.tolist(), 2))
+    # Small chunks so the pairs are counted over several passes and merged
+    monkeypatch.setattr(recommendations, 'CHUNK_PAIRS', 500)
+
+    a, b, together = recommendations.co_occurrence(users, books)
+
+    assert dict(zip(zip(a.tolist(), b.tolist()), together.tolist())) == expected
+
+def test_build_keeps_the_top_scoring_neighbors_of_each_book(app):
+    (a, b, c, d), _ = shelf()
+
+    assert recommendations.build(k=2, metric='cosine', min_together=2) == 4
+    # A: 3 borrowers, B and C: 2 each, both pairs shared by 2 students; D pairs are dropped as noise
+    cosine = round(2 / math.sqrt(6), 6)
+    assert neighbors() == [(a.id, 1, b.id, cosine, 2), (a.id, 2, c.id, cosine, 2),
+                           (b.id, 1, a.id, cosine, 2), (c.id, 1, a.id, cosine, 2)]
+
+    # Lift favours the rarer book: C and D are shared once, but D has a single borrower
+    recommendations.build(k=1, metric='lift', min_together=1)
+    assert neighbors() == [(a.id, 1, b.id, 1.0, 2), (b.id, 1, a.id, 1.0, 2),
+                           (c.id, 1, d.id, 1.5, 1), (d.id, 1, c.id, 1.5, 1)]
+
+def test_large_baskets_keep_the_latest_books(app):
+    books = make_books(3)
+    student = make_user('PRN0001')
+    db.session.flush()
+    borrow(student, *books)
+    db.session.commit()
+
+    users, kept = recommendations.baskets(max_basket=2)
+
+    assert (users.tolist(), kept.tolist()) == ([student.id] * 2, [books[2].id, books[1].id])
+
+def test_dashboard_suggests_neighbors_the_student_has_not_borrowed(app, client):
+    (a, b, c, d), students = shelf()
+    recommendations.build(min_together=1)
+    log_in(client, students[1])
+
+    with captured_templates(app) as rendered:
+        assert client.get('/student-dashboard').status_code == 200
+
+    # {A, B}: A's neighbors C and D, not B's A again
+    assert [book.id for book in rendered[0]['suggested_books']] == [c.id, d.id]
+
+def test_book_details_lists_books_borrowed_together(app, client):
+    (a, b, c, d), _ = shelf()
+    admin = make_user('ADM0001', role='admin')
+    db.session.commit()
+    app.test_cli_runner().invoke(args=['build-recommendations', '--top-k', '1'])
+    log_in(client, admin)
+
+    with captured_templates(app) as rendered:
+        assert client.get(f'/book-details/{b.id}').status_code == 200
+
+    assert [book.id for book, _ in rendered[0]['borrowed_together']] == [a.id]
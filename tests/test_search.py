@@ -0,0 +1,70 @@
+import os
+from app.extensions import db
+from app.models import Book
+from app.search import search_books, rebuild_search_index
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+def add_books(*books):
+    db.session.add_all(Book(title=title, author=author) for title, author in books)
+    db.session.commit()
+
+def titles(query, **kwargs):
+    books, total = search_books(query, **kwargs)
+    return [book.title for book in books], total
+
+def test_every_word_must_match_and_the_last_is_a_prefix(app):
+    add_books(('Python Programming', 'John Smith'), ('Programming Pearls', 'Jon Bentley'),
+              ('Data Structures', 'Robert Johnson'))
+
+    found, total = titles('prog')
+    assert sorted(found) == ['Programming Pearls', 'Python Programming']
+    assert total == 2
+    assert titles('python prog') == (['Python Programming'], 1)
+    assert titles('smith') == (['Python Programming'], 1)
+    assert titles('  ') == ([], 0)
+
+def test_title_hits_rank_above_author_hits(app):
+    add_books(('Cooking Basics', 'Ada Python'), ('Python Cookbook', 'David Beazley'))
+
+    assert titles('python')[0] == ['Python Cookbook', 'Cooking Basics']
+
+def test_index_follows_book_updates_and_deletes(app):
+    add_books(('Web Development', 'Sarah Wilson'))
+    book = Book.query.one()
+
+    book.title = 'Network Security'
+    db.session.commit()
+    assert titles('web') == ([], 0)
+    assert titles('network') == (['Network Security'], 1)
+
+    db.session.delete(book)
+    db.session.commit()
+    assert titles('network') == ([], 0)
+
+def test_results_are_paginated(app):
+    add_books(*((f'Algorithms {number:02d}', 'Author') for number in range(5)))
+
+    first, total = titles('algorithms', page=1, per_page=2)
+    last, _ = titles('algorithms', page=3, per_page=2)
+
+    assert total == 5
+    assert first == ['Algorithms 00', 'Algorithms 01']
+    assert last == ['Algorithms 04']
+
+def test_rebuild_reindexes_the_catalog(app):
+    add_books(('Database Systems', 'Mike Brown'))
+    db.session.execute(db.text("INSERT INTO book_fts(book_fts) VALUES ('delete-all')"))
+    db.session.commit()
+    assert titles('database') == ([], 0)
+
+    assert rebuild_search_index() == 1
+    assert titles('database') == (['Database Systems'], 1)
+
+def test_autogenerate_leaves_the_search_index_alone(app):
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=['db', 'stamp', '-d', MIGRATIONS, 'head']).exit_code == 0
+
+    result = runner.invoke(args=['db', 'check', '-d', MIGRATIONS])
+
+    assert result.exit_code == 0, result.output
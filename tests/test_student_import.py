@@ -0,0 +1,70 @@
+import io
+from app.extensions import db
+from app.models import User
+from app.student_import import import_students
+from tests.helpers import make_user, log_in, captured_templates
+
+HEADER = 'prn_number,name,email,mother_name,dob,year\n'
+
+def csv_file(*rows):
+    return io.StringIO(HEADER + ''.join(row + '\n' for row in rows))
+
+def test_valid_rows_are_created_and_bad_rows_reported(app):
+    make_user('PRN0001')
+    db.session.commit()
+
+    created, errors = import_students(csv_file(
+        'PRN0002,Asha Rao,asha@college.edu,Meera,01012004,1st',
+        'PRN0001,Taken,taken@college.edu,Meera,01012004,',
+        'PRN0003,Bad Email,not-an-email,Meera,01012004,',
+        'PRN0002,Again,again@college.edu,Meera,01012004,',
+        'PRN0004,,ravi@college.edu,Meera,01012004,',
+        'PRN0005,Bad Year,bad@college.edu,Meera,01012004,9th',
+    ), workers=0)
+
+    assert created == 1
+    assert sorted(errors) == [
+        (3, 'PRN or email already registered'),
+        (4, "Invalid email 'not-an-email'"),
+        (5, 'Duplicate PRN or email earlier in the file'),
+        (6, 'Missing name'),
+        (7, "Unknown year '9th'"),
+    ]
+    student = User.query.filter_by(prn_number='PRN0002').one()
+    assert (student.username, student.role, student.year) == ('prn0002', 'student', '1st')
+    assert student.check_password('Meera01012004')
+
+def test_passwords_can_be_hashed_in_worker_processes(app):
+    created, errors = import_students(csv_file(
+        *(f'PRN{number:04d},Student {number},s{number}@college.edu,Meera,01012004,' for number in range(4))
+    ), workers=2)
+
+    assert (created, errors) == (4, [])
+    assert all(student.check_password('Meera01012004') for student in User.query.filter_by(role='student'))
+
+def test_upload_page_imports_with_the_web_worker_count(app, client):
+    app.config['STUDENT_IMPORT_WEB_WORKERS'] = 0
+    admin = make_user('ADM0001', role='admin')
+    db.session.commit()
+    log_in(client, admin)
+    upload = io.BytesIO(HEADER.encode() + b'PRN0002,Asha Rao,asha@college.edu,Meera,01012004,\n'
+                                          b'PRN0003,No Dob,ravi@college.edu,Meera,,\n')
+
+    with captured_templates(app) as rendered:
+        response = client.post('/import-students', data={'csv_file': (upload, 'students.csv')})
+
+    assert response.status_code == 200
+    assert rendered[0]['created'] == 1
+    assert rendered[0]['errors'] == [(3, 'Missing dob')]
+
+def test_oversized_uploads_are_refused_before_parsing(app, client):
+    app.config['STUDENT_IMPORT_MAX_BYTES'] = 100
+    admin = make_user('ADM0001', role='admin')
+    db.session.commit()
+    log_in(client, admin)
+    upload = io.BytesIO(HEADER.encode() + b'PRN0002,Asha Rao,asha@college.edu,Meera,01012004,\n' * 5)
+
+    response = client.post('/import-students', data={'csv_file': (upload, 'students.csv')})
+
+    assert b'File is too large' in response.data
+    assert User.query.filter_by(role='student').count() == 0
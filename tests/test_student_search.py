@@ -0,0 +1,55 @@
+from sqlalchemy import func
+from app.explain import explain_query
+from app.extensions import db
+from app.models import User
+from app.search import search_students, student_prefix_query
+from tests.helpers import make_user, log_in
+
+def add_students(*names):
+    students = [make_user(f'PRN{number:04d}', name=name) for number, name in enumerate(names)]
+    db.session.commit()
+    return students
+
+def test_matches_name_or_prn_prefixes_case_insensitively(app):
+    asha, ashok, bala = add_students('Asha Rao', 'ashok Iyer', 'Bala Asher')
+    make_user('ADM0001', role='admin', name='Ashwin Admin')
+    db.session.commit()
+
+    assert search_students('ash') == ([asha, ashok], False)
+    assert search_students('prn0002') == ([bala], False)
+    assert search_students('rao') == ([], False)
+    assert search_students('   ') == ([], False)
+
+def test_results_are_capped(app):
+    add_students(*(f'Student {number:02d}' for number in range(5)))
+
+    students, truncated = search_students('student', limit=3)
+
+    assert [student.name for student in students] == ['Student 00', 'Student 01', 'Student 02']
+    assert truncated
+
+def test_prefix_lookups_use_the_expression_indexes(app):
+    for expression, index in ((func.lower(User.name), 'ix_user_role_lower_name'),
+                              (func.lower(User.prn_number), 'ix_user_role_lower_prn_number')):
+        plan = ' '.join(explain_query(student_prefix_query(expression, 'ash', 21)))
+        assert index in plan
+        assert 'TEMP B-TREE' not in plan
+
+def test_api_caps_the_limit(app, client):
+    app.config['STUDENT_SEARCH_LIMIT'] = 2
+    admin = make_user('ADM0001', role='admin')
+    students = add_students('Asha Rao', 'Asha Kumar', 'Asha Iyer')
+    log_in(client, admin)
+
+    data = client.get('/api/students/search?q=asha&limit=50').get_json()
+
+    assert [result['name'] for result in data['results']] == ['Asha Iyer', 'Asha Kumar']
+    assert data['results'][0] == {'id': students[2].id, 'prn': 'PRN0002', 'name': 'Asha Iyer',
+                                  'year': None, 'course': None}
+    assert data['truncated']
+
+def test_api_is_admin_only(app, client):
+    student, = add_students('Asha Rao')
+    log_in(client, student)
+
+    assert client.get('/api/students/search?q=asha').status_code == 403